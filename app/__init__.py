@@ -1,11 +1,12 @@
 # app/__init__.py
 import os
 import logging
-from flask import Flask, session, jsonify, request
+from flask import Flask, session, jsonify, request, flash, redirect, url_for
 from flask_session import Session
 from datetime import timedelta
 from config.settings import Config
 from config.celery import make_celery
+from app.utils.redis_client import get_redis
 
 # Initialize extensions
 sess = Session()
@@ -17,10 +18,17 @@ def create_app(config_class=Config):
     # Configure application
     app.config.from_object(config_class)
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-key-for-testing')
-    app.config['SESSION_TYPE'] = 'filesystem'
-    app.config['SESSION_FILE_DIR'] = os.path.join('instance', 'flask_session')
-    app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(minutes=30)  # Session timeout
+    if getattr(config_class, 'SESSION_BACKEND', 'filesystem') == 'redis':
+        # Sessions shared by every web node; they only hold ids of stored artifacts
+        app.config['SESSION_TYPE'] = 'redis'
+        app.config['SESSION_REDIS'] = get_redis(config_class.SESSION_REDIS_URL)
+        app.config['SESSION_KEY_PREFIX'] = 'session:'
+    else:
+        app.config['SESSION_TYPE'] = 'filesystem'
+        app.config['SESSION_FILE_DIR'] = os.path.join('instance', 'flask_session')
+    # Every request pushes back the expiry, so sessions time out after 30 minutes of inactivity
     app.config['SESSION_REFRESH_EACH_REQUEST'] = True
+    app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(minutes=30)  # Session timeout
     app.config['ALLOWED_EXTENSIONS'] = {'pdf', 'docx', 'txt'}
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
     app.config['UPLOAD_FOLDER'] = 'instance/uploads'
@@ -34,7 +42,9 @@ def create_app(config_class=Config):
 
     @app.before_request
     def make_session_permanent():
-        session.permanent = True
+        # Assigning marks the session modified, so only do it once
+        if not session.permanent:
+            session.permanent = True
         
     @app.after_request
     def after_request(response):
@@ -54,6 +64,17 @@ def create_app(config_class=Config):
         flash('Invalid request. Please check your input.')
         return redirect(url_for('main.index'))
 
+    @app.errorhandler(413)
+    def too_large_error(error):
+        """Handle uploads over the size limits."""
+        if request.headers.get('Accept') == 'application/json':
+            return jsonify({
+                'error': 'File too large',
+                'message': 'The uploaded file is too large. Please upload a smaller file.'
+            }), 413
+        flash('The uploaded file is too large. Please upload a smaller file.')
+        return redirect(url_for('main.index'))
+
     @app.errorhandler(500)
     def internal_error(error):
         """Handle internal server errors."""
@@ -1,9 +1,16 @@
-from flask import Blueprint, request, jsonify, session, current_app as app, redirect, url_for, render_template, flash
+from flask import Blueprint, request, jsonify, session, current_app as app, redirect, url_for, render_template, flash, Response, stream_with_context
 from app.utils.validation import validate_resume_text
-from app.services.job_scraper import extract_job_description, ScrapingError
-from app.services.ai_analysis import analyze_resume_for_job, test_ollama_connection
-from app.tasks import analyze_resume_task, celery
+from app.services.job_scraper import validate_job_url, cached_job_description, scrape_cache, ScrapingError
+from app.services.batch_scraper import dedupe_job_urls
+from app.services.ai_analysis import analyze_resume_for_job, test_ollama_connection, analysis_cache, structure_cache
+from app.utils.file_handling import parse_cache
+from app.services.task_events import iter_task_events, format_sse
+from app.tasks import analyze_resume_task, queue_job_scrape, scrape_job_batch_task, celery, task_snapshot
+from app.services.artifact_store import get_session_value
 from celery.exceptions import TimeoutError
+from config.settings import Config
+import gzip
+import hashlib
 import json
 import time
 
@@ -19,13 +26,18 @@ def test_ollama():
         app.logger.error(f"Ollama connection test error: {str(e)}")
         return jsonify({'error': 'Failed to test Ollama connection'}), 500
 
+@analysis_bp.route('/cache_stats')
+def cache_stats():
+    """Report hit/miss counters for the result caches."""
+    return jsonify({cache.namespace: cache.stats() for cache in (analysis_cache, structure_cache, parse_cache, scrape_cache)})
+
 @analysis_bp.route('/optimize', methods=['POST'])
 def optimize_resume():
     """Analyze and optimize resume against job description."""
     try:
         # Get and validate inputs
         job_description = request.form.get('job_description', '').strip()
-        resume_text = session.get('modified_text', '').strip()
+        resume_text = (get_session_value('modified_text') or '').strip()
         
         # Debug logging
         app.logger.info(f"Processing request with session ID: {session.get('_id', 'No ID')}")
@@ -58,8 +70,11 @@ def optimize_resume():
             flash(error_msg)
             return redirect(url_for('main.index'))
 
+        # Allow callers to skip the analysis cache and force a fresh generation
+        use_cache = request.form.get('bypass_cache', '').lower() not in ('1', 'true', 'yes')
+
         # Save current task details in session
-        task = analyze_resume_task.delay(resume_text, job_description)
+        task = analyze_resume_task.delay(resume_text, job_description, use_cache=use_cache)
         session['current_task'] = {
             'id': task.id,
             'start_time': time.time(),
@@ -87,14 +102,31 @@ def optimize_resume():
 
 @analysis_bp.route('/fetch_job_description', methods=['POST'])
 def fetch_job_description():
-    """Fetch job description from URL."""
+    """
+    Fetch a job description from a URL. Cached postings are answered right
+    away; otherwise the fetch is queued and status_url is polled for it.
+    """
     try:
-        url = request.json.get('url')
+        url = (request.json or {}).get('url')
         if not url:
             return jsonify({'error': 'No URL provided'}), 400
+        validate_job_url(url)
 
-        description = extract_job_description(url)
-        return jsonify({'description': description})
+        cached = cached_job_description(url)
+        if cached is not None:
+            description, stale = cached
+            if stale:
+                # Serve the cached copy now and revalidate it in the worker
+                queue_job_scrape(url)
+            return jsonify({'description': description, 'cached': True, 'stale': stale})
+
+        task_id = queue_job_scrape(url)
+        response = jsonify({
+            'task_id': task_id,
+            'status_url': url_for('analysis.job_description_status', task_id=task_id)
+        })
+        response.headers['Retry-After'] = str(Config.STATUS_POLL_INTERVAL)
+        return response, 202
 
     except ScrapingError as e:
         return jsonify({'error': str(e)}), 400
@@ -102,6 +134,147 @@ def fetch_job_description():
         app.logger.error(f"Job fetch error: {str(e)}")
         return jsonify({'error': 'Failed to fetch job description'}), 500
 
+@analysis_bp.route('/fetch_job_description/<task_id>')
+def job_description_status(task_id):
+    """Report a job description fetch: 202 while running, then the description or the error."""
+    try:
+        state, info = task_snapshot(celery.AsyncResult(task_id))
+    except Exception as e:
+        app.logger.error(f"Job fetch status error: {str(e)}")
+        return jsonify({'error': 'Failed to fetch job description'}), 500
+
+    if state == 'SUCCESS' and isinstance(info, dict):
+        return jsonify({'state': state, 'description': info.get('description', '')})
+
+    if state == 'FAILURE':
+        if isinstance(info, dict):
+            exc_type, message = info.get('exc_type'), info.get('exc_message')
+        else:
+            exc_type, message = type(info).__name__, str(info)
+        # Scraping errors are meant for the user; anything else stays generic
+        if exc_type == 'ScrapingError':
+            return jsonify({'state': state, 'error': message}), 400
+        app.logger.error(f"Job fetch error: {exc_type}: {message}")
+        return jsonify({'state': state, 'error': 'Failed to fetch job description'}), 500
+
+    response = jsonify({'state': state, 'status': 'Fetching job posting...'})
+    response.headers['Retry-After'] = str(Config.STATUS_POLL_INTERVAL)
+    return response, 202
+
+@analysis_bp.route('/fetch_job_descriptions', methods=['POST'])
+def fetch_job_descriptions():
+    """
+    Fetch a list of job postings at once. `urls` is a list or newline-separated
+    text; duplicates are dropped. Results arrive on stream_url as each posting
+    finishes, and status_url reports them all once the batch is done.
+    """
+    try:
+        urls = (request.json or {}).get('urls') or []
+        if isinstance(urls, str):
+            urls = urls.splitlines()
+        elif not isinstance(urls, list) or not all(isinstance(url, str) and url.strip() for url in urls):
+            return jsonify({'error': 'urls must be a list of non-empty strings'}), 400
+        urls = dedupe_job_urls(urls)
+        if not urls:
+            return jsonify({'error': 'No URLs provided'}), 400
+        if len(urls) > Config.SCRAPE_BATCH_MAX_URLS:
+            return jsonify({'error': f'At most {Config.SCRAPE_BATCH_MAX_URLS} URLs can be fetched at once'}), 400
+
+        task = scrape_job_batch_task.delay(urls)
+        response = jsonify({
+            'task_id': task.id,
+            'urls': urls,
+            'stream_url': url_for('analysis.stream_task_events', task_id=task.id),
+            'status_url': url_for('analysis.job_descriptions_status', task_id=task.id)
+        })
+        response.headers['Retry-After'] = str(Config.STATUS_POLL_INTERVAL)
+        return response, 202
+
+    except Exception as e:
+        app.logger.error(f"Batch job fetch error: {str(e)}")
+        return jsonify({'error': 'Failed to fetch job descriptions'}), 500
+
+@analysis_bp.route('/fetch_job_descriptions/<task_id>')
+def job_descriptions_status(task_id):
+    """Report a batch fetch: 202 with progress while running, then every URL's result."""
+    try:
+        state, info = task_snapshot(celery.AsyncResult(task_id))
+    except Exception as e:
+        app.logger.error(f"Batch job fetch status error: {str(e)}")
+        return jsonify({'error': 'Failed to fetch job descriptions'}), 500
+
+    if state == 'SUCCESS' and isinstance(info, dict):
+        return jsonify({'state': state, **info})
+
+    if state == 'FAILURE':
+        app.logger.error(f"Batch job fetch error: {info}")
+        return jsonify({'state': state, 'error': 'Failed to fetch job descriptions'}), 500
+
+    response = jsonify({'state': state, **(info if isinstance(info, dict) else {'status': 'Fetching job postings...'})})
+    response.headers['Retry-After'] = str(Config.STATUS_POLL_INTERVAL)
+    return response, 202
+
+@analysis_bp.route('/stream/<task_id>')
+def stream_task_events(task_id):
+    """
+    Stream task progress, model tokens and the final result as Server-Sent
+    Events. Each connection is closed after EVENT_STREAM_WINDOW seconds so it
+    does not tie up a web worker for the whole task; the EventSource then
+    reconnects with Last-Event-ID and only receives the events after it.
+    """
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID', 0))
+    except ValueError:
+        last_event_id = 0
+
+    def generate():
+        # Reconnect after the usual polling interval once this window closes
+        yield f"retry: {Config.STATUS_POLL_INTERVAL * 1000}\n\n"
+        try:
+            for event in iter_task_events(task_id, last_event_id, max_duration=Config.EVENT_STREAM_WINDOW):
+                if event is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield format_sse(event)
+        except Exception as e:
+            app.logger.error(f"Error streaming events for task {task_id}: {str(e)}", exc_info=True)
+            yield format_sse({
+                'id': 0,
+                'event': 'error',
+                'data': {
+                    'exc_type': type(e).__name__,
+                    'exc_message': 'Lost connection to the analysis event stream',
+                    'exc_module': 'app.routes.analysis',
+                    'exc_cls': type(e).__name__
+                }
+            })
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def _retry_after(state: str):
+    """Seconds a client should wait before polling a task in `state` again."""
+    if state in ('SUCCESS', 'FAILURE', 'REVOKED'):
+        return None
+    if state == 'PENDING':
+        return Config.STATUS_POLL_INTERVAL * 2
+    return Config.STATUS_POLL_INTERVAL
+
+def _conditional_json(payload: dict, retry_after=None) -> Response:
+    """
+    JSON response tagged with an ETag of its body; a client that already has
+    this exact body gets a bodiless 304 instead.
+    """
+    response = jsonify(payload)
+    response.set_etag(hashlib.sha1(response.get_data()).hexdigest())
+    response.headers['Cache-Control'] = 'no-cache'
+    if retry_after:
+        response.headers['Retry-After'] = str(retry_after)
+    return response.make_conditional(request)
+
 @analysis_bp.route('/status/<task_id>')
 def get_task_status(task_id):
     """Get the status of a background task."""
@@ -110,7 +283,7 @@ def get_task_status(task_id):
         
         # Handle case where task state can't be decoded
         try:
-            current_state = task.state
+            current_state, info = task_snapshot(task)
         except ValueError:
             error_info = {
                 'exc_type': 'TaskStateError',
@@ -131,7 +304,7 @@ def get_task_status(task_id):
             }
         elif current_state == 'FAILURE':
             # Extract error information from task.info if available
-            error_info = task.info
+            error_info = info
             if isinstance(error_info, Exception):
                 error_info = {
                     'exc_type': type(error_info).__name__,
@@ -152,38 +325,31 @@ def get_task_status(task_id):
                 'status': error_info.get('exc_message', 'Task failed'),
                 'error': error_info
             }
+        elif current_state == 'SUCCESS' and isinstance(info, dict):
+            # The final payload is served once by get_task_result
+            response = {
+                'state': current_state,
+                'result_url': url_for('analysis.get_task_result', task_id=task_id)
+            }
+        elif isinstance(info, dict):
+            response = {
+                'state': current_state,
+                'chunk': json.dumps(info)
+            }
+        elif info:
+            response = {
+                'state': current_state,
+                'status': str(info)
+            }
         else:
-            if task.info:
-                if isinstance(task.info, dict):
-                    if 'status' in task.info:  # Progress update
-                        response = {
-                            'state': current_state,
-                            'chunk': json.dumps(task.info)
-                        }
-                    else:  # Final result
-                        response = {
-                            'state': current_state,
-                            'chunk': json.dumps({
-                                'status': 'completed',
-                                'result': task.info.get('analysis', {}),
-                                'optimized_text': task.info.get('optimized_text', ''),
-                                'original_text': task.info.get('original_text', '')
-                            })
-                        }
-                else:
-                    response = {
-                        'state': current_state,
-                        'status': str(task.info)
-                    }
-            else:
-                response = {
-                    'state': current_state,
-                    'chunk': json.dumps({
-                        'status': 'Processing...'
-                    })
-                }
+            response = {
+                'state': current_state,
+                'chunk': json.dumps({
+                    'status': 'Processing...'
+                })
+            }
         
-        return jsonify(response)
+        return _conditional_json(response, retry_after=_retry_after(current_state))
     except TimeoutError:
         error_info = {
             'exc_type': 'TimeoutError',
@@ -208,4 +374,37 @@ def get_task_status(task_id):
             'state': 'FAILURE',
             'status': str(e),
             'error': error_info
-        }), 500
\ No newline at end of file
+        }), 500
+
+@analysis_bp.route('/result/<task_id>')
+def get_task_result(task_id):
+    """
+    Serve the final result of a finished analysis task.
+
+    Results never change once a task has succeeded, so the response is
+    cacheable by the browser and revalidates against the task id as ETag;
+    the JSON is gzip-compressed for clients that accept it.
+    """
+    if task_id in request.if_none_match:
+        return Response(status=304, headers={'ETag': f'"{task_id}"'})
+
+    state, info = task_snapshot(celery.AsyncResult(task_id))
+    if state != 'SUCCESS' or not isinstance(info, dict):
+        return jsonify({'state': state, 'error': 'Result is not available yet'}), 404
+
+    body = json.dumps({
+        'status': 'completed',
+        'result': info.get('analysis', {}),
+        'optimized_text': info.get('optimized_text', ''),
+        'original_text': info.get('original_text', '')
+    }).encode('utf-8')
+    response = Response(mimetype='application/json')
+    if request.accept_encodings['gzip']:
+        response.set_data(gzip.compress(body, compresslevel=6))
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response.set_data(body)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = f'private, max-age={Config.TASK_RESULT_MAX_AGE}'
+    response.set_etag(task_id)
+    return response
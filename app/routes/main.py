@@ -1,18 +1,31 @@
-from flask import Blueprint, render_template, redirect, request, url_for, flash, session, jsonify
+from flask import Blueprint, render_template, redirect, request, url_for, flash, session, jsonify, abort
 from flask import current_app as app
 from app.utils.validation import allowed_file
-from app.utils.file_handling import save_uploaded_file, parse_uploaded_file
-from app.services.ai_analysis import analyze_document_structure  # Updated import path
+from app.utils.file_handling import stash_upload, upload_cache_key, parse_cache, UploadTooLarge
+from werkzeug.utils import secure_filename
+from app.tasks import parse_document_task, celery, task_snapshot
+from app.services.artifact_store import set_session_value, get_session_value, has_session_value
+from config.settings import Config
 import os
+import time
+
+# Session fields filled in from a finished parse_document_task
+UPLOAD_SESSION_FIELDS = ('modified_text', 'original_file_type', 'original_filename', 'formatting', 'upload_timestamp')
 
 main_bp = Blueprint('main', __name__)
 
+def _store_upload(values: dict):
+    """Replace the session with a freshly parsed upload."""
+    session.clear()
+    for field in UPLOAD_SESSION_FIELDS:
+        set_session_value(field, values.get(field))
+
 @main_bp.route('/')
 def index():
     """Render the main upload page."""
     # Store example resume text in session for testing
-    if 'modified_text' not in session:
-        session['modified_text'] = """John Doe
+    if not has_session_value('modified_text'):
+        set_session_value('modified_text', """John Doe
         Senior Software Engineer
 
         SUMMARY
@@ -43,7 +56,7 @@ def index():
         EDUCATION
         Bachelor of Science in Computer Science
         Technical University | 2014 - 2018
-        """
+        """)
     return render_template('index.html')
 
 @main_bp.route('/health')
@@ -73,41 +86,89 @@ def upload_file():
             flash('Invalid file type. Please upload a PDF, DOCX, or TXT file.')
             return redirect(url_for('main.index'))
             
-        filename, file_path = save_uploaded_file(file)
-        text, formatting = parse_uploaded_file(file_path, filename)
-        
-        if not text or len(text.strip()) < 100:
-            app.logger.error(f"Parsed text too short or empty: {len(text) if text else 0} chars")
-            flash('The uploaded file contains insufficient text content. Please ensure your resume is complete.')
-            return redirect(url_for('main.index'))
-        
-        # Clear and update session with new data
-        session.clear()
-        session_data = {
-            'modified_text': text,
-            'original_file_type': os.path.splitext(filename)[1][1:],
-            'original_filename': filename,
-            'formatting': formatting if formatting else None,
-            'upload_timestamp': os.path.getmtime(file_path)
-        }
-        session.update(session_data)
-        
-        # Verify session data was stored
-        app.logger.info(f"Session after upload: {dict(session)}")
-        if 'modified_text' not in session:
-            raise ValueError("Failed to store resume text in session")
-            
-        # Clean up the temporary file
-        os.remove(file_path)
-        app.logger.info(f"File upload successful: {filename}")
-        
-        return redirect(url_for('main.processing'))
+        # A file that was parsed before is served straight from the parse cache.
+        # Entries are keyed by content, so the filename is this upload's own
+        filename = secure_filename(file.filename)
+        cache_key = upload_cache_key(file)
+        cached = parse_cache.get(cache_key)
+        if cached is not None:
+            _store_upload(dict(cached, original_filename=filename, upload_timestamp=time.time()))
+            app.logger.info(f"Parse cache hit for {cached.get('original_filename')}")
+            if request.headers.get('Accept') == 'application/json':
+                return jsonify({'state': 'SUCCESS', 'redirect': url_for('main.processing')}), 200
+            return redirect(url_for('main.processing'))
+
+        # Parsing runs in the worker from the in-memory upload; nothing is
+        # written under instance/uploads. The session is filled in by upload_status
+        upload_key = stash_upload(file)
+        task = parse_document_task.delay(upload_key, filename, cache_key)
+        session['upload_task'] = task.id
+        app.logger.info(f"Queued parsing of {filename} as task {task.id}")
+
+        if request.headers.get('Accept') == 'application/json':
+            return jsonify({
+                'task_id': task.id,
+                'status_url': url_for('main.upload_status', task_id=task.id)
+            }), 202
+
+        return redirect(url_for('main.upload_progress', task_id=task.id))
+
+    except UploadTooLarge as e:
+        app.logger.warning(f"Upload rejected: {str(e)}")
+        abort(413)
         
     except Exception as e:
         app.logger.error(f"File upload error: {str(e)}", exc_info=True)
         flash('Error processing file. Please try again.')
         return redirect(url_for('main.index'))
 
+@main_bp.route('/upload/<task_id>')
+def upload_progress(task_id):
+    """Show parsing progress for an uploaded resume."""
+    return render_template('uploading.html', task_id=task_id)
+
+@main_bp.route('/upload/status/<task_id>')
+def upload_status(task_id):
+    """Report parsing progress and store the parsed resume in the session when done."""
+    if session.get('upload_task') != task_id:
+        return jsonify({'state': 'FAILURE', 'error': {
+            'exc_type': 'UploadError',
+            'exc_message': 'This upload does not belong to the current session.',
+            'exc_module': 'app.routes.main',
+            'exc_cls': 'UploadError'
+        }}), 404
+
+    state, info = task_snapshot(celery.AsyncResult(task_id))
+
+    if state == 'SUCCESS':
+        result = info or {}
+        if session.get('upload_applied') != task_id:
+            _store_upload(result)
+            session['upload_task'] = task_id
+            session['upload_applied'] = task_id
+            app.logger.info(f"File upload successful: {result.get('original_filename')}")
+        return jsonify({'state': state, 'redirect': url_for('main.processing')})
+
+    if state == 'FAILURE':
+        error_info = info if isinstance(info, dict) else {
+            'exc_type': type(info).__name__,
+            'exc_message': str(info) or 'Error processing file. Please try again.',
+            'exc_module': 'app.routes.main',
+            'exc_cls': type(info).__name__
+        }
+        return jsonify({'state': state, 'error': error_info})
+
+    info = info if isinstance(info, dict) else {}
+    response = jsonify({
+        'state': state,
+        'status': info.get('status', 'Waiting for a worker...'),
+        'current': info.get('current', 0),
+        'total': info.get('total', 100)
+    })
+    # A task still waiting for a worker is polled half as often
+    response.headers['Retry-After'] = str(Config.STATUS_POLL_INTERVAL * (2 if state == 'PENDING' else 1))
+    return response
+
 @main_bp.route('/processing')
 def processing():
     """Show processing page after successful upload."""
@@ -116,7 +177,8 @@ def processing():
     if task_id:
         return render_template('processing.html', task_id=task_id)
     
-    if 'modified_text' not in session:
+    content = get_session_value('modified_text')
+    if content is None:
         return redirect(url_for('main.index'))
         
-    return render_template('result.html', content=session['modified_text'])
\ No newline at end of file
+    return render_template('result.html', content=content)
\ No newline at end of file
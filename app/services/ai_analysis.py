@@ -1,11 +1,16 @@
+import copy
 import json
 import ollama
 import logging.config
 import os
+import threading
 import time
-from typing import Dict, Optional
+import httpx
+from typing import Callable, Dict, Optional
 from functools import wraps
-from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from config.settings import Config
+from app.services.result_cache import ResultCache, normalize_text
+from app.services.stream_parser import IncrementalJSONParser, StreamParseError
 
 # Configure logging
 config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 
@@ -16,8 +21,67 @@ logger.setLevel(logging.DEBUG)  # Set to DEBUG level
 
 # Constants
 LOG_SENDING_PROMPT = "Sending prompt to Ollama"
-
-def retry_on_connection_error(max_retries: int = 3, delay: float = 1.0):
+# Bump whenever the analysis prompt changes so stale cached results are not reused
+ANALYSIS_PROMPT_VERSION = "3"
+
+# Bump whenever the structure prompt or schema changes
+STRUCTURE_PROMPT_VERSION = "1"
+
+# Returned when the model output cannot be parsed; never cached
+INVALID_RESPONSE_RESULT = {
+    "missing_skills": [{
+        "skill": "ERROR",
+        "suggestion": "Analysis failed due to invalid response format"
+    }],
+    "improvement_suggestions": [{
+        "current": "ERROR",
+        "suggested": "Please try again",
+        "reason": "Invalid response received from AI"
+    }],
+    "emphasis_suggestions": [{
+        "experience": "ERROR",
+        "why_relevant": "Invalid response format",
+        "how_to_emphasize": "Please try the analysis again"
+    }],
+    "general_suggestions": [
+        "The analysis failed due to an invalid response format. Please try again.",
+        "If the problem persists, try with a shorter resume or job description."
+    ]
+}
+
+# Shared Ollama client, created lazily per process by get_ollama_client()
+_ollama_client = None
+_ollama_client_pid = None
+_ollama_client_lock = threading.Lock()
+
+analysis_cache = ResultCache(
+    'analysis',
+    ttl=Config.ANALYSIS_CACHE_TTL,
+    max_entries=Config.ANALYSIS_CACHE_MAX_ENTRIES,
+    enabled=Config.ANALYSIS_CACHE_ENABLED
+)
+
+structure_cache = ResultCache(
+    'structure',
+    ttl=Config.ANALYSIS_CACHE_TTL,
+    max_entries=Config.ANALYSIS_CACHE_MAX_ENTRIES,
+    enabled=Config.ANALYSIS_CACHE_ENABLED
+)
+
+def analysis_cache_key(resume_text: str, job_description: str) -> str:
+    """Build the content-addressed cache key for a resume/job analysis."""
+    return analysis_cache.make_key(
+        normalize_text(resume_text),
+        normalize_text(job_description),
+        Config.OLLAMA_MODEL,
+        ANALYSIS_PROMPT_VERSION
+    )
+
+# Errors worth retrying: the request never reached Ollama or the connection dropped.
+# Timeouts and bad output are not retried, since that would repeat a full generation.
+RETRYABLE_ERRORS = (ConnectionError, httpx.ConnectError, httpx.RemoteProtocolError, httpx.WriteError)
+
+def retry_on_connection_error(max_retries: int = 3, delay: float = 1.0, exceptions: tuple = RETRYABLE_ERRORS):
     """Decorator to retry functions on connection errors."""
     def decorator(func):
         @wraps(func)
@@ -26,7 +90,7 @@ def retry_on_connection_error(max_retries: int = 3, delay: float = 1.0):
             for attempt in range(max_retries):
                 try:
                     return func(*args, **kwargs)
-                except Exception as e:
+                except exceptions as e:
                     last_error = e
                     logger.warning(f"Attempt {attempt + 1}/{max_retries} failed: {str(e)}")
                     if attempt < max_retries - 1:
@@ -36,142 +100,408 @@ def retry_on_connection_error(max_retries: int = 3, delay: float = 1.0):
         return wrapper
     return decorator
 
+# Required keys of each entry in the analysis lists; None means entries are plain strings
+ANALYSIS_FIELDS = {
+    'missing_skills': ('skill', 'suggestion'),
+    'improvement_suggestions': ('current', 'suggested', 'reason'),
+    'emphasis_suggestions': ('experience', 'why_relevant', 'how_to_emphasize'),
+    'general_suggestions': None
+}
+
+# Maximum number of entries kept per analysis list
+ANALYSIS_ITEM_LIMITS = {
+    'missing_skills': Config.ANALYSIS_MAX_MISSING_SKILLS,
+    'improvement_suggestions': Config.ANALYSIS_MAX_IMPROVEMENTS,
+    'emphasis_suggestions': Config.ANALYSIS_MAX_EMPHASIS,
+    'general_suggestions': Config.ANALYSIS_MAX_GENERAL
+}
+
+def _validate_analysis_item(field: str, item) -> bool:
+    """Validate a single entry of one of the analysis lists."""
+    required = ANALYSIS_FIELDS[field]
+    if required is None:
+        return isinstance(item, str)
+    return isinstance(item, dict) and all(key in item for key in required)
+
+def _find_invalid_fields(response: Dict) -> list:
+    """Return the analysis fields that are missing or do not match the schema."""
+    if not isinstance(response, dict):
+        return list(ANALYSIS_FIELDS)
+    return [
+        field for field in ANALYSIS_FIELDS
+        if not isinstance(response.get(field), list)
+        or not all(_validate_analysis_item(field, item) for item in response[field])
+    ]
+
 def _validate_analysis_response(response: Dict) -> bool:
     """Validate that the response contains all required fields in the correct format."""
-    required_keys = ['missing_skills', 'improvement_suggestions', 'emphasis_suggestions', 'general_suggestions']
-    
-    if not all(key in response for key in required_keys):
-        return False
-    
     try:
-        # Validate missing_skills structure
-        if not isinstance(response['missing_skills'], list):
-            return False
-        for skill in response['missing_skills']:
-            if not isinstance(skill, dict) or 'skill' not in skill or 'suggestion' not in skill:
-                return False
-        
-        # Validate improvement_suggestions structure
-        if not isinstance(response['improvement_suggestions'], list):
-            return False
-        for suggestion in response['improvement_suggestions']:
-            if not isinstance(suggestion, dict) or 'current' not in suggestion or 'suggested' not in suggestion or 'reason' not in suggestion:
-                return False
-        
-        # Validate emphasis_suggestions structure
-        if not isinstance(response['emphasis_suggestions'], list):
-            return False
-        for emphasis in response['emphasis_suggestions']:
-            if not isinstance(emphasis, dict) or 'experience' not in emphasis or 'why_relevant' not in emphasis or 'how_to_emphasize' not in emphasis:
-                return False
-        
-        # Validate general_suggestions structure
-        if not isinstance(response['general_suggestions'], list):
-            return False
-        for suggestion in response['general_suggestions']:
-            if not isinstance(suggestion, str):
-                return False
-                
-        return True
+        return not _find_invalid_fields(response)
     except Exception:
         return False
 
+def _analysis_json_schema(fields: tuple = tuple(ANALYSIS_FIELDS)) -> Dict:
+    """Build the JSON schema for the given analysis fields from ANALYSIS_FIELDS."""
+    properties = {}
+    for field in fields:
+        required = ANALYSIS_FIELDS[field]
+        if required is None:
+            items = {'type': 'string'}
+        else:
+            items = {
+                'type': 'object',
+                'properties': {key: {'type': 'string'} for key in required},
+                'required': list(required)
+            }
+        properties[field] = {'type': 'array', 'items': items, 'maxItems': ANALYSIS_ITEM_LIMITS[field]}
+    return {'type': 'object', 'properties': properties, 'required': list(fields)}
+
+# Schema passed to Ollama's structured output mode; mirrors _validate_analysis_response
+ANALYSIS_SCHEMA = _analysis_json_schema()
+
+# Schema for the combined structure/section analysis; mirrors _validate_structure_response
+STRUCTURE_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'sections': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'name': {'type': 'string'},
+                    'content': {'type': 'array', 'items': {'type': 'string'}},
+                    'formatting': {
+                        'type': 'object',
+                        'properties': {
+                            'is_header': {'type': 'boolean'},
+                            'suggested_font_size': {'type': 'number'}
+                        },
+                        'required': ['is_header', 'suggested_font_size']
+                    }
+                },
+                'required': ['name', 'content', 'formatting']
+            }
+        }
+    },
+    'required': ['sections']
+}
+
+def _analysis_output_format():
+    """Return the Ollama `format` option for analysis requests per Config.OLLAMA_STRUCTURED_OUTPUT."""
+    mode = Config.OLLAMA_STRUCTURED_OUTPUT
+    if mode == 'schema':
+        return ANALYSIS_SCHEMA
+    if mode == 'json':
+        return 'json'
+    return None
+
+def _repair_analysis_field(field: str, broken_value, raw_response: str) -> Optional[list]:
+    """
+    Ask the model to rewrite a single broken analysis field into the schema.
+
+    Only the offending value (or, when the field is missing, the raw response)
+    is sent back, with a schema restricted to that field, so the repair costs a
+    short generation instead of re-running the whole analysis.
+    """
+    if broken_value is not None:
+        source = json.dumps(broken_value)
+        instruction = f'This "{field}" value does not have the required structure'
+    else:
+        source = raw_response[-4000:]
+        instruction = f'This resume analysis is missing its "{field}" list'
+
+    example = ANALYSIS_FIELDS[field] and {key: "..." for key in ANALYSIS_FIELDS[field]} or "..."
+    prompt = f"""{instruction}:
+
+{source}
+
+Rewrite it as a JSON object of the form {{"{field}": [{json.dumps(example)}]}}.
+Keep the original wording. Return ONLY the JSON object."""
+
+    try:
+        logger.info(f"Repairing analysis field '{field}'")
+        response = get_ollama_client().chat(
+            model=Config.OLLAMA_MODEL,
+            messages=[{'role': 'user', 'content': prompt}],
+            format=_analysis_json_schema((field,)),
+            keep_alive=Config.OLLAMA_KEEP_ALIVE,
+            options={'num_predict': Config.OLLAMA_REPAIR_NUM_PREDICT}
+        )
+        repaired = json.loads(response['message']['content']).get(field)
+        if isinstance(repaired, list):
+            return [item for item in repaired if _validate_analysis_item(field, item)]
+    except Exception as e:
+        logger.error(f"Failed to repair analysis field '{field}': {str(e)}")
+    return None
+
+def _repair_analysis_response(response: Dict, invalid_fields: list, raw_response: str) -> Dict:
+    """Repair each invalid field of an otherwise parsed analysis response."""
+    repaired = dict(response)
+    for field in invalid_fields:
+        value = _repair_analysis_field(field, response.get(field), raw_response)
+        if value is not None:
+            repaired[field] = value
+    return repaired
+
+def get_ollama_client() -> ollama.Client:
+    """
+    Return the shared Ollama client for this process, creating it on first use.
+
+    The client keeps a pool of keep-alive HTTP connections to Config.OLLAMA_HOST
+    and enforces connect/read timeouts natively, so every request (and every
+    Celery task handled by a worker process) reuses the same connections. A new
+    client is built after a fork so prefork children never share sockets.
+    """
+    global _ollama_client, _ollama_client_pid
+    pid = os.getpid()
+    if _ollama_client is None or _ollama_client_pid != pid:
+        with _ollama_client_lock:
+            if _ollama_client is None or _ollama_client_pid != pid:
+                _ollama_client = ollama.Client(
+                    host=Config.OLLAMA_HOST,
+                    timeout=httpx.Timeout(Config.OLLAMA_READ_TIMEOUT, connect=Config.OLLAMA_CONNECT_TIMEOUT),
+                    limits=httpx.Limits(
+                        max_connections=Config.OLLAMA_MAX_CONNECTIONS,
+                        max_keepalive_connections=Config.OLLAMA_MAX_CONNECTIONS,
+                        keepalive_expiry=Config.OLLAMA_KEEPALIVE_EXPIRY
+                    )
+                )
+                _ollama_client_pid = pid
+    return _ollama_client
+
+def _generation_budget(prompt: str) -> int:
+    """
+    Cap the number of generated tokens in proportion to the prompt size.
+
+    Suggestions quote and rewrite resume text, so longer inputs get a larger
+    budget (roughly one output token per four prompt tokens, at ~4 characters
+    per token) on top of a fixed base, up to OLLAMA_NUM_PREDICT_MAX.
+    """
+    budget = Config.OLLAMA_NUM_PREDICT_BASE + len(prompt) // 16
+    return min(budget, Config.OLLAMA_NUM_PREDICT_MAX)
+
+def _apply_item_limits(response: Dict) -> Dict:
+    """Trim the analysis lists to ANALYSIS_ITEM_LIMITS."""
+    for field, limit in ANALYSIS_ITEM_LIMITS.items():
+        if isinstance(response.get(field), list):
+            response[field] = response[field][:limit]
+    return response
+
 @retry_on_connection_error()
-def _send_ollama_request(prompt: str, timeout: int = 300) -> Optional[Dict]:
-    """Send a request to Ollama with retry logic and timeout."""
+def _send_ollama_request(prompt: str, timeout: int = 300,
+                         on_token: Optional[Callable[[str], None]] = None,
+                         on_item: Optional[Callable[[str, object], None]] = None,
+                         num_predict: Optional[int] = None,
+                         response_format=None,
+                         repair: bool = False) -> Optional[Dict]:
+    """
+    Send a request to Ollama with retry logic and timeout.
+
+    The client's read timeout bounds the wait for each streamed chunk, and
+    `timeout` bounds the whole generation; the stream is closed as soon as
+    either is exceeded. `on_token` is called with each streamed piece of text.
+
+    The stream is parsed incrementally: every entry of the analysis lists is
+    validated as soon as it is complete and passed to `on_item(field, entry)`,
+    and a malformed or invalid entry aborts the generation immediately
+    (unless `repair` is set, see below).
+
+    Generation is bounded by `num_predict` (derived from the prompt size by
+    default) and the stream is closed as soon as the top-level JSON object is
+    balanced, or once every analysis list has reached its item limit. If the
+    token budget runs out first, the entries validated so far are returned
+    with `partial` set.
+
+    `response_format` is passed to Ollama as its `format` option ('json' or a
+    JSON schema). With `repair=True`, invalid entries do not abort the stream;
+    fields of the parsed response that fail validation are instead fixed by a
+    targeted repair pass rather than discarding the whole generation.
+    """
     logger.debug(f"Sending request to Ollama with prompt: {prompt[:100]}...")
+    deadline = time.monotonic() + timeout
+    collected = {field: [] for field in ANALYSIS_FIELDS}
+
+    def handle_item(field: str, item):
+        if field not in ANALYSIS_FIELDS:
+            return
+        if not _validate_analysis_item(field, item):
+            if not repair:
+                raise StreamParseError(f"Invalid entry in '{field}': {item!r}")
+            # Left in the parsed response for the repair pass; keep generating
+            logger.warning(f"Invalid entry in '{field}', will repair: {item!r}")
+            return
+        if len(collected[field]) >= ANALYSIS_ITEM_LIMITS[field]:
+            return  # Over the per-field budget; dropped
+        collected[field].append(item)
+        if on_item:
+            on_item(field, item)
+
+    def budget_exhausted() -> bool:
+        return all(len(collected[field]) >= limit for field, limit in ANALYSIS_ITEM_LIMITS.items())
+
+    parser = IncrementalJSONParser(on_item=handle_item)
+    full_response = ""
+    done_reason = None
 
-    def execute_request():
+    try:
+        response = get_ollama_client().chat(
+            model=Config.OLLAMA_MODEL,
+            messages=[{
+                'role': 'user',
+                'content': prompt
+            }],
+            stream=True,  # Enable streaming for progress updates
+            keep_alive=Config.OLLAMA_KEEP_ALIVE,
+            format=response_format,
+            options={'num_predict': num_predict or _generation_budget(prompt)}
+        )
+
+        # Accumulate streamed response
         try:
-            response = ollama.chat(
-                model='mistral',
-                messages=[{
-                    'role': 'user',
-                    'content': prompt
-                }],
-                stream=True  # Enable streaming for progress updates
-            )
-            
-            # Accumulate streamed response
-            full_response = ""
             for chunk in response:
                 if chunk and 'message' in chunk and 'content' in chunk['message']:
-                    full_response += chunk['message']['content']
+                    content = chunk['message']['content']
+                    full_response += content
                     # Log progress for monitoring
-                    logger.debug(f"Received chunk: {chunk['message']['content'][:50]}...")
-            
-            logger.debug(f"Raw Ollama response: {full_response}")
-            
-            if not full_response.strip():
-                logger.error("Empty response received from Ollama")
-                raise ValueError("Empty response received from Ollama")
-            
-            try:
-                # Try to find JSON content within the response
-                json_start = full_response.find('{')
-                json_end = full_response.rfind('}') + 1
-                if json_start >= 0 and json_end > json_start:
-                    json_content = full_response[json_start:json_end]
-                    parsed_response = json.loads(json_content)
-                else:
-                    parsed_response = json.loads(full_response)
-                
-                # Check if the response is empty
-                if not parsed_response:
-                    logger.error("Parsed response is empty")
-                    raise ValueError("Empty JSON response from Ollama")
-                
-                logger.info(f"Successfully parsed JSON response: {parsed_response}")
-                
-                # Validate the response format
-                if _validate_analysis_response(parsed_response):
-                    return parsed_response
-                else:
-                    logger.error("Invalid response format")
-                    raise ValueError("Invalid response format from Ollama")
-                
-            except (json.JSONDecodeError, ValueError) as e:
-                logger.error(f"Failed to parse or validate response: {str(e)}")
-                logger.error(f"Raw content that failed to parse: {full_response}")
-                return {
-                    "missing_skills": [{
-                        "skill": "ERROR",
-                        "suggestion": "Analysis failed due to invalid response format"
-                    }],
-                    "improvement_suggestions": [{
-                        "current": "ERROR",
-                        "suggested": "Please try again",
-                        "reason": "Invalid response received from AI"
-                    }],
-                    "emphasis_suggestions": [{
-                        "experience": "ERROR",
-                        "why_relevant": "Invalid response format",
-                        "how_to_emphasize": "Please try the analysis again"
-                    }],
-                    "general_suggestions": [
-                        "The analysis failed due to an invalid response format. Please try again.",
-                        "If the problem persists, try with a shorter resume or job description."
-                    ]
-                }
-                
-        except Exception as e:
-            logger.error(f"Error in Ollama request: {str(e)}", exc_info=True)
-            raise
+                    logger.debug(f"Received chunk: {content[:50]}...")
+                    if on_token and content:
+                        on_token(content)
+                    parser.feed(content)
+                    if parser.complete or budget_exhausted():
+                        logger.debug("Analysis JSON complete; closing stream early")
+                        break
+                if chunk and chunk.get('done'):
+                    done_reason = chunk.get('done_reason')
+                if time.monotonic() > deadline:
+                    logger.error(f"Ollama request timed out after {timeout} seconds")
+                    raise TimeoutError(f"Request timed out after {timeout} seconds")
+        finally:
+            response.close()
+    except StreamParseError as e:
+        logger.error(f"Aborted malformed Ollama response: {str(e)}")
+        logger.error(f"Raw content before abort: {full_response}")
+        return copy.deepcopy(INVALID_RESPONSE_RESULT)
+    except httpx.TimeoutException as e:
+        logger.error(f"Ollama request timed out: {str(e)}")
+        raise TimeoutError(f"Request timed out: {str(e)}")
+    except Exception as e:
+        logger.error(f"Error in Ollama request: {str(e)}", exc_info=True)
+        raise
 
-    # Execute with timeout
-    with ThreadPoolExecutor(max_workers=1) as executor:
-        try:
-            future = executor.submit(execute_request)
-            return future.result(timeout=timeout)
-        except FuturesTimeoutError:
-            logger.error(f"Ollama request timed out after {timeout} seconds")
-            raise TimeoutError(f"Request timed out after {timeout} seconds")
+    logger.debug(f"Raw Ollama response: {full_response}")
+
+    if not full_response.strip():
+        logger.error("Empty response received from Ollama")
+        raise ValueError("Empty response received from Ollama")
+
+    if not parser.complete and budget_exhausted():
+        # Every list is full; the rest of the object would only be trimmed away
+        logger.info("Every analysis list is full; using the collected entries")
+        return collected
+    if not parser.complete and done_reason == 'length' and any(collected.values()):
+        # The token budget ran out mid-object: keep what was validated, marked as partial
+        logger.warning("Token budget ran out; using the entries collected before the stream ended")
+        return {**collected, 'partial': True}
 
-def analyze_resume_sections(text: str) -> Dict:
-    """Analyze the sections of a resume using AI."""
     try:
-        logger.info("Starting resume sections analysis")
-        prompt = f"""Analyze this resume and identify its sections:
+        if parser.complete:
+            parsed_response = parser.result()
+        else:
+            # Try to find JSON content within the response
+            json_start = full_response.find('{')
+            json_end = full_response.rfind('}') + 1
+            if json_start >= 0 and json_end > json_start:
+                json_content = full_response[json_start:json_end]
+                parsed_response = json.loads(json_content)
+            else:
+                parsed_response = json.loads(full_response)
+
+        # Check if the response is empty
+        if not parsed_response:
+            logger.error("Parsed response is empty")
+            raise ValueError("Empty JSON response from Ollama")
+
+        logger.info(f"Successfully parsed JSON response: {parsed_response}")
+
+        # Validate the response format, repairing only the broken fields
+        invalid_fields = _find_invalid_fields(parsed_response)
+        if invalid_fields and repair and isinstance(parsed_response, dict):
+            logger.warning(f"Invalid fields in Ollama response: {invalid_fields}")
+            parsed_response = _repair_analysis_response(parsed_response, invalid_fields, full_response)
+            invalid_fields = _find_invalid_fields(parsed_response)
+
+        if not invalid_fields:
+            return _apply_item_limits(parsed_response)
+        else:
+            logger.error("Invalid response format")
+            raise ValueError("Invalid response format from Ollama")
+
+    except (json.JSONDecodeError, ValueError) as e:
+        logger.error(f"Failed to parse or validate response: {str(e)}")
+        logger.error(f"Raw content that failed to parse: {full_response}")
+        return copy.deepcopy(INVALID_RESPONSE_RESULT)
+
+def _validate_structure_section(section) -> bool:
+    """Check one entry of a structure analysis against STRUCTURE_SCHEMA."""
+    if not isinstance(section, dict) or not isinstance(section.get('name'), str):
+        return False
+    content = section.get('content')
+    if not isinstance(content, list) or not all(isinstance(line, str) for line in content):
+        return False
+    fmt = section.get('formatting')
+    return (
+        isinstance(fmt, dict)
+        and isinstance(fmt.get('is_header'), bool)
+        and isinstance(fmt.get('suggested_font_size'), (int, float))
+    )
+
+def _validate_structure_response(response: Dict) -> bool:
+    """Validate a structure analysis response."""
+    return (
+        isinstance(response, dict)
+        and isinstance(response.get('sections'), list)
+        and all(_validate_structure_section(section) for section in response['sections'])
+    )
+
+def structure_cache_key(text: str) -> str:
+    """Build the per-document cache key for a structure analysis."""
+    return structure_cache.make_key(normalize_text(text), Config.OLLAMA_MODEL, STRUCTURE_PROMPT_VERSION)
+
+@retry_on_connection_error()
+def _send_structure_request(prompt: str) -> Dict:
+    """Run a schema-constrained, non-streaming structure analysis request."""
+    try:
+        response = get_ollama_client().chat(
+            model=Config.OLLAMA_MODEL,
+            messages=[{'role': 'user', 'content': prompt}],
+            format=STRUCTURE_SCHEMA,
+            keep_alive=Config.OLLAMA_KEEP_ALIVE,
+            options={'num_predict': Config.OLLAMA_STRUCTURE_NUM_PREDICT}
+        )
+    except httpx.TimeoutException as e:
+        logger.error(f"Ollama structure request timed out: {str(e)}")
+        raise TimeoutError(f"Request timed out: {str(e)}")
+    return json.loads(response['message']['content'])
+
+def analyze_resume_structure(text: str, use_cache: bool = True) -> Dict:
+    """
+    Identify the sections of a resume and how each should be formatted.
+
+    One schema-constrained generation serves both the document structure and
+    the section analysis, and the result is cached per document (normalized
+    text, model and STRUCTURE_PROMPT_VERSION), so re-uploading the same resume
+    costs no generation at all. Returns {"sections": []} on failure.
+    """
+    cache_key = structure_cache_key(text)
+    if use_cache:
+        cached = structure_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Structure cache hit for {cache_key[:12]}")
+            return cached
+
+    try:
+        logger.info("Starting resume structure analysis")
+        prompt = f"""Analyze this resume and identify its sections in reading order:
 
         RESUME:
         {text}
@@ -181,7 +511,7 @@ def analyze_resume_sections(text: str) -> Dict:
             "sections": [
                 {{
                     "name": "section name (e.g., Education, Experience)",
-                    "content": "section content",
+                    "content": ["each line of the section content"],
                     "formatting": {{
                         "is_header": true,
                         "suggested_font_size": 14
@@ -190,43 +520,46 @@ def analyze_resume_sections(text: str) -> Dict:
             ]
         }}"""
 
-        return _send_ollama_request(prompt) or {"sections": []}
+        response = _send_structure_request(prompt)
+        if not _validate_structure_response(response):
+            logger.error(f"Invalid structure analysis response: {response}")
+            return {"sections": []}
+
+        response['structure_analysis'] = {
+            'section_order': [section['name'] for section in response['sections']]
+        }
+        structure_cache.set(cache_key, response)
+        return response
 
     except Exception as e:
-        logger.error(f"Error in resume sections analysis: {str(e)}", exc_info=True)
+        logger.error(f"Error in resume structure analysis: {str(e)}", exc_info=True)
         return {"sections": []}
 
-def analyze_document_structure(text: str) -> Dict:
-    """Analyze the structure of a document using AI."""
-    try:
-        logger.info("Starting document structure analysis")
-        prompt = f"""Analyze this document's structure and identify its sections:
-
-        DOCUMENT:
-        {text}
+def analyze_resume_sections(text: str) -> Dict:
+    """Analyze the sections of a resume using AI (see analyze_resume_structure)."""
+    return analyze_resume_structure(text)
 
-        Format your response as a JSON object with these exact keys:
-        {{
-            "sections": [
-                {{
-                    "name": "section name",
-                    "content": "section content",
-                    "formatting": {{
-                        "is_header": boolean,
-                        "suggested_font_size": number
-                    }}
-                }}
-            ]
-        }}"""
+def analyze_document_structure(text: str) -> Dict:
+    """Analyze the structure of a document using AI (see analyze_resume_structure)."""
+    return analyze_resume_structure(text)
 
-        return _send_ollama_request(prompt) or {"sections": []}
+def analyze_resume_for_job(resume_text: str, job_description: str, timeout: int = 300,
+                           use_cache: bool = True,
+                           on_token: Optional[Callable[[str], None]] = None,
+                           on_item: Optional[Callable[[str, object], None]] = None) -> Dict:
+    """
+    Analyze and optimize resume for a specific job.
 
-    except Exception as e:
-        logger.error(f"Error in document structure analysis: {str(e)}", exc_info=True)
-        return {"sections": []}
+    Results are cached by the normalized resume and job description, the model
+    name and ANALYSIS_PROMPT_VERSION; pass use_cache=False to force a fresh
+    generation (the new result still replaces the cached one). `on_token`
+    receives the model output as it streams in, and `on_item(field, entry)`
+    each validated analysis entry as soon as it is complete (once, even when
+    the request is retried).
 
-def analyze_resume_for_job(resume_text: str, job_description: str, timeout: int = 300) -> Dict:
-    """Analyze and optimize resume for a specific job."""
+    Up to ANALYSIS_ATTEMPTS generations are tried: an invalid entry aborts an
+    attempt early, and only the last attempt repairs invalid fields instead.
+    """
     if not resume_text or not job_description:
         logger.warning("Empty resume text or job description provided")
         return {
@@ -236,6 +569,13 @@ def analyze_resume_for_job(resume_text: str, job_description: str, timeout: int
             "general_suggestions": ["No resume text or job description provided"]
         }
     
+    cache_key = analysis_cache_key(resume_text, job_description)
+    if use_cache:
+        cached = analysis_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Returning cached resume analysis")
+            return cached
+
     try:
         logger.info("Starting resume optimization analysis")
         prompt = f"""You are a professional resume optimization expert. Analyze the resume against the job description and provide feedback in valid JSON format.
@@ -252,6 +592,7 @@ Instructions:
 3. Suggest improvements for existing content
 4. Identify relevant experiences to emphasize
 5. Provide general optimization suggestions
+6. Keep it concise: at most {ANALYSIS_ITEM_LIMITS['missing_skills']} missing skills, {ANALYSIS_ITEM_LIMITS['improvement_suggestions']} improvement suggestions, {ANALYSIS_ITEM_LIMITS['emphasis_suggestions']} emphasis suggestions and {ANALYSIS_ITEM_LIMITS['general_suggestions']} general suggestions, most important first
 
 Return ONLY a JSON object with this EXACT structure, no other text:
 {{
@@ -281,8 +622,31 @@ Return ONLY a JSON object with this EXACT structure, no other text:
     ]
 }}"""
         
-        logger.debug(f"Sending prompt to Ollama")
-        response = _send_ollama_request(prompt, timeout=timeout)
+        # Retried requests stream the same entries again; publish each one once
+        emitted = set()
+
+        def publish_item(field, item):
+            key = (field, json.dumps(item, sort_keys=True))
+            if key in emitted:
+                return
+            emitted.add(key)
+            if on_item:
+                on_item(field, item)
+
+        # Earlier attempts abort on the first invalid entry; only the last one repairs
+        attempts = max(1, Config.ANALYSIS_ATTEMPTS)
+        for attempt in range(1, attempts + 1):
+            logger.debug(f"Sending prompt to Ollama (attempt {attempt}/{attempts})")
+            response = _send_ollama_request(
+                prompt,
+                timeout=timeout,
+                on_token=on_token,
+                on_item=publish_item,
+                response_format=_analysis_output_format(),
+                repair=attempt == attempts
+            )
+            if response != INVALID_RESPONSE_RESULT:
+                break
         logger.debug(f"Received response from Ollama")
         
         if not response or not isinstance(response, dict):
@@ -299,7 +663,10 @@ Return ONLY a JSON object with this EXACT structure, no other text:
                     "Try providing more specific details in both the resume and job requirements"
                 ]
             }
-            
+
+        # Partial analyses are returned but never cached
+        if response != INVALID_RESPONSE_RESULT and not response.get('partial') and _validate_analysis_response(response):
+            analysis_cache.set(cache_key, response)
         return response
         
     except TimeoutError as e:
@@ -502,21 +869,25 @@ def optimize_resume(resume_text: str, analysis_results: dict) -> str:
         return resume_text
 
 def test_ollama_connection() -> bool:
-    """Test the connection to Ollama service."""
+    """
+    Test the connection to Ollama service.
+
+    Lists the installed models over the shared client instead of running a
+    chat generation, and reports whether the configured model is available.
+    """
     try:
         logger.info("Testing Ollama connection")
-        response = ollama.chat(model='mistral', messages=[{
-            'role': 'user',
-            'content': 'Hi, this is a test message. Please respond with "OK" if you receive this.'
-        }])
-        
-        if response and response.get('message') and response['message'].get('content'):
+        response = get_ollama_client().list()
+        model_names = {model.get('model') or model.get('name') for model in response.get('models', [])}
+        wanted = Config.OLLAMA_MODEL
+        if any(name == wanted or (name and name.split(':')[0] == wanted) for name in model_names):
             logger.info("Successfully connected to Ollama")
             return True
+        logger.warning(f"Ollama is reachable but model '{wanted}' is not installed")
         return False
     except Exception as e:
         logger.error(f"Failed to connect to Ollama: {str(e)}")
         return False
 
 # Ensure the function is exported
-__all__ = ['analyze_resume_for_job', 'analyze_document_structure', 'analyze_resume_sections', 'test_ollama_connection', 'optimize_resume']
+__all__ = ['analyze_resume_for_job', 'analysis_cache', 'structure_cache', 'get_ollama_client', 'analyze_resume_structure', 'analyze_document_structure', 'analyze_resume_sections', 'test_ollama_connection', 'optimize_resume']
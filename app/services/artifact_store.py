@@ -0,0 +1,97 @@
+import hashlib
+import json
+import logging
+from typing import Any, Optional
+
+import redis
+from flask import current_app, session
+
+from app.utils.redis_client import get_redis
+from config.settings import Config
+
+logger = logging.getLogger(__name__)
+
+# Session values that are stored by reference when sessions live in Redis
+SESSION_ARTIFACT_FIELDS = ('modified_text', 'formatting')
+REF_SUFFIX = '_ref'
+
+class ArtifactStore:
+    """
+    Content-addressed store for bulky per-user data (resume text and
+    formatting) kept in Redis.
+
+    Values are serialized to JSON and stored under the SHA-256 of that JSON,
+    so identical artifacts are stored once and their ids can be shared by any
+    web node. Entries expire `ttl` seconds after they were last written or
+    read. Redis failures are logged; `put` then returns None and `get` a miss.
+    """
+
+    def __init__(self, namespace: str, ttl: int):
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def _key(self, artifact_id: str) -> str:
+        return f"artifact:{self.namespace}:{artifact_id}"
+
+    def put(self, value: Any) -> Optional[str]:
+        """Store `value` and return its id."""
+        try:
+            payload = json.dumps(value, sort_keys=True, separators=(',', ':'))
+            artifact_id = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+            client = get_redis()
+            # An existing copy only needs its expiry pushed back
+            if not client.set(self._key(artifact_id), payload, ex=self.ttl, nx=True):
+                client.expire(self._key(artifact_id), self.ttl)
+            return artifact_id
+        except (redis.RedisError, TypeError, ValueError) as e:
+            logger.warning(f"Artifact store failed for {self.namespace}: {str(e)}")
+            return None
+
+    def get(self, artifact_id: str) -> Optional[Any]:
+        """Return the artifact stored under `artifact_id`, or None if it is gone."""
+        try:
+            pipe = get_redis().pipeline()
+            pipe.get(self._key(artifact_id))
+            pipe.expire(self._key(artifact_id), self.ttl)
+            raw, _ = pipe.execute()
+            return json.loads(raw) if raw is not None else None
+        except (redis.RedisError, ValueError) as e:
+            logger.warning(f"Artifact lookup failed for {self.namespace}: {str(e)}")
+            return None
+
+artifact_store = ArtifactStore('session', Config.ARTIFACT_TTL)
+
+def artifacts_by_reference() -> bool:
+    """Bulky session values are stored by reference whenever sessions live in Redis."""
+    return current_app.config.get('SESSION_TYPE') == 'redis'
+
+def set_session_value(name: str, value: Any):
+    """
+    Put `value` in the session under `name`.
+
+    In Redis session mode, SESSION_ARTIFACT_FIELDS are written to the
+    artifact store and the session only keeps `<name>_ref`. If the store is
+    unreachable the value is kept inline so the request still succeeds.
+    """
+    if name in SESSION_ARTIFACT_FIELDS and value is not None and artifacts_by_reference():
+        artifact_id = artifact_store.put(value)
+        if artifact_id is not None:
+            session.pop(name, None)
+            session[name + REF_SUFFIX] = artifact_id
+            return
+    session.pop(name + REF_SUFFIX, None)
+    session[name] = value
+
+def get_session_value(name: str, default: Any = None) -> Any:
+    """Read a session value written by set_session_value, resolving references."""
+    artifact_id = session.get(name + REF_SUFFIX)
+    if artifact_id is not None:
+        value = artifact_store.get(artifact_id)
+        if value is None:
+            logger.warning(f"Session artifact {name} ({artifact_id}) has expired")
+            return default
+        return value
+    return session.get(name, default)
+
+def has_session_value(name: str) -> bool:
+    return name in session or name + REF_SUFFIX in session
@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional
+
+import httpx
+from urllib3.exceptions import MaxRetryError
+
+from app.services.job_scraper import (
+    SCRAPER_HEADERS, ScrapingError, cache_description, conditional_headers, extract_from_html,
+    normalize_job_url, scrape_cache, scrape_cache_key, scraper_retry, status_error,
+    touch_cached_description, validate_job_url
+)
+from config.settings import Config
+
+logger = logging.getLogger(__name__)
+
+def dedupe_job_urls(urls: Iterable[str]) -> List[str]:
+    """Drop blank entries and URLs that normalize to one already listed, keeping the first."""
+    unique, seen = [], set()
+    for url in urls:
+        url = (url or '').strip()
+        if not url:
+            continue
+        key = normalize_job_url(url)
+        if key not in seen:
+            seen.add(key)
+            unique.append(url)
+    return unique
+
+class _HostLimiter:
+    """
+    Per-host politeness: at most `per_host` requests in flight to one host,
+    and consecutive requests to it started at least `delay` seconds apart.
+    """
+
+    def __init__(self, per_host: int, delay: float):
+        self.per_host = per_host
+        self.delay = delay
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+        self._next_start: Dict[str, float] = {}
+
+    @asynccontextmanager
+    async def slot(self, host: str):
+        semaphore = self._slots.setdefault(host, asyncio.Semaphore(self.per_host))
+        async with semaphore:
+            now = asyncio.get_running_loop().time()
+            # Reserve the start time before waiting so concurrent requests queue up behind it
+            start = max(now, self._next_start.get(host, now))
+            self._next_start[host] = start + self.delay
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+class BatchScraper:
+    """
+    Fetches many job postings concurrently on one asyncio event loop.
+
+    Requests share an httpx.AsyncClient with keep-alive connections; at most
+    `concurrency` are in flight overall and at most `per_host` per job board,
+    spaced `host_delay` seconds apart. Pages are extracted with the same
+    strategies and scrape cache as extract_job_description, on a thread pool
+    of `parse_workers` so parsing one page does not stall the other fetches.
+    """
+
+    def __init__(self, concurrency: Optional[int] = None, per_host: Optional[int] = None,
+                 host_delay: Optional[float] = None, parse_workers: Optional[int] = None):
+        self.concurrency = concurrency or Config.SCRAPE_BATCH_CONCURRENCY
+        self.per_host = per_host or Config.SCRAPE_BATCH_PER_HOST
+        self.host_delay = Config.SCRAPE_BATCH_HOST_DELAY if host_delay is None else host_delay
+        self.parse_workers = parse_workers or Config.SCRAPE_BATCH_PARSE_WORKERS
+
+    async def iter_results(self, urls: Iterable[str]) -> AsyncIterator[Dict]:
+        """Yield one result per unique URL (see dedupe_job_urls) as soon as it is done."""
+        urls = dedupe_job_urls(urls)
+        if not urls:
+            return
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._hosts = _HostLimiter(self.per_host, self.host_delay)
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        timeout = httpx.Timeout(Config.SCRAPE_READ_TIMEOUT, connect=Config.SCRAPE_CONNECT_TIMEOUT)
+        with ThreadPoolExecutor(max_workers=self.parse_workers, thread_name_prefix='scrape-parse') as executor:
+            self._executor = executor
+            async with httpx.AsyncClient(headers=SCRAPER_HEADERS, limits=limits, timeout=timeout,
+                                         follow_redirects=True) as client:
+                self._client = client
+                tasks = [asyncio.ensure_future(self._scrape(url)) for url in urls]
+                try:
+                    for finished in asyncio.as_completed(tasks):
+                        yield await finished
+                finally:
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, fn: Callable, *args):
+        """Run blocking work (parsing, cache I/O) on the parse pool."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _scrape(self, url: str) -> Dict:
+        start = time.perf_counter()
+        try:
+            host = validate_job_url(url).netloc.lower()
+            entry = await self._run(scrape_cache.get, scrape_cache_key(url))
+            if entry and time.time() - entry.get('fetched_at', 0) <= Config.SCRAPE_CACHE_FRESH_TTL:
+                return self._completed(url, entry['description'], True, start)
+
+            async with self._hosts.slot(host), self._slots:
+                response = await self._get(url, conditional_headers(entry))
+
+            if entry and response.status_code == 304:
+                description = await self._run(touch_cached_description, url, entry)
+                return self._completed(url, description, True, start)
+            if not response.is_success:
+                raise status_error(response.status_code, f"{response.status_code} {response.reason_phrase}")
+
+            timings = {}
+            description = await self._run(extract_from_html, response.text, host, timings)
+            await self._run(cache_description, url, description, response.headers)
+            result = self._completed(url, description, False, start)
+            result['timings'] = timings
+            return result
+
+        except Exception as e:
+            if not isinstance(e, ScrapingError):
+                logger.error(f"Batch scrape of {url} failed: {str(e)}", exc_info=True)
+            return {
+                'url': url,
+                'status': 'failed',
+                'error': {
+                    'exc_type': type(e).__name__,
+                    'exc_message': str(e),
+                    'exc_module': e.__class__.__module__ or 'builtins',
+                    'exc_cls': e.__class__.__name__
+                },
+                'elapsed_ms': round((time.perf_counter() - start) * 1000, 2)
+            }
+
+    def _completed(self, url: str, description: str, cached: bool, start: float) -> Dict:
+        return {
+            'url': url,
+            'status': 'completed',
+            'description': description,
+            'cached': cached,
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 2)
+        }
+
+    async def _get(self, url: str, headers: Dict) -> httpx.Response:
+        """
+        GET under the same ScraperRetry policy as the scraping session (see
+        scraper_retry): it decides which responses and errors are retried,
+        how many attempts there are, the backoff between them and how much
+        of a Retry-After is honored.
+        """
+        retry = scraper_retry()
+        while True:
+            try:
+                response = await self._client.get(url, headers=headers)
+            except httpx.HTTPError as e:
+                try:
+                    retry = retry.increment('GET', url, error=e)
+                except MaxRetryError:
+                    if isinstance(e, httpx.TimeoutException):
+                        raise ScrapingError("Request timed out. Please check your internet connection.")
+                    raise ScrapingError(f"Failed to fetch job posting: {str(e)}")
+                delay = retry.get_backoff_time()
+            else:
+                if not retry.is_retry('GET', response.status_code, 'Retry-After' in response.headers):
+                    return response
+                try:
+                    retry = retry.increment('GET', url)
+                except MaxRetryError:
+                    return response
+                delay = retry.get_retry_after(response)
+                if delay is None:
+                    delay = retry.get_backoff_time()
+            await asyncio.sleep(delay)
+
+def scrape_job_batch(urls: Iterable[str], on_result: Optional[Callable[[Dict], None]] = None,
+                     scraper: Optional[BatchScraper] = None) -> List[Dict]:
+    """
+    Scrape a list of job posting URLs concurrently and return one result per
+    unique URL, in the order the URLs were given.
+
+    Each result has `url` and `status` ('completed' or 'failed'), plus
+    `description` and `cached` on success or an `error` dict on failure.
+    `on_result(result)` is called as each URL finishes, in completion order.
+    """
+    urls = dedupe_job_urls(urls)
+    scraper = scraper or BatchScraper()
+
+    async def run():
+        results = {}
+        async for result in scraper.iter_results(urls):
+            results[result['url']] = result
+            if on_result:
+                on_result(result)
+        return results
+
+    results = asyncio.run(run())
+    return [results[url] for url in urls if url in results]
@@ -0,0 +1,129 @@
+import html as html_lib
+import json
+import logging
+import re
+from typing import Dict, Iterator, List, Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+logger = logging.getLogger(__name__)
+
+# <script type="application/ld+json"> blocks, found without building a DOM
+_JSON_LD_SCRIPT = re.compile(
+    r'<script\b[^>]*\btype\s*=\s*["\']?application/ld\+json["\']?[^>]*>(.*?)</script\s*>',
+    re.IGNORECASE | re.DOTALL
+)
+_MICRODATA_TYPE = re.compile(r'schema\.org/JobPosting', re.IGNORECASE)
+
+# JobPosting properties that make up the description, in output order
+POSTING_FIELDS = (
+    ('description', None),
+    ('responsibilities', 'Responsibilities'),
+    ('qualifications', 'Qualifications'),
+    ('skills', 'Skills'),
+    ('experienceRequirements', 'Experience'),
+    ('educationRequirements', 'Education'),
+)
+
+def _is_job_posting(item: Dict) -> bool:
+    types = item.get('@type')
+    if isinstance(types, str):
+        types = [types]
+    return isinstance(types, list) and any(str(t).split('/')[-1] == 'JobPosting' for t in types)
+
+def _iter_items(data) -> Iterator[Dict]:
+    """Yield every JSON-LD node, descending into lists and @graph."""
+    if isinstance(data, list):
+        for item in data:
+            yield from _iter_items(item)
+    elif isinstance(data, dict):
+        yield data
+        if '@graph' in data:
+            yield from _iter_items(data['@graph'])
+
+def _to_text(value) -> str:
+    """Plain text of a JobPosting property: HTML is stripped, lists and objects flattened."""
+    if value is None:
+        return ''
+    if isinstance(value, list):
+        return '\n'.join(filter(None, (_to_text(v) for v in value)))
+    if isinstance(value, dict):
+        # e.g. EducationalOccupationalCredential / OccupationalExperienceRequirements
+        for key in ('description', 'credentialCategory', 'name', 'monthsOfExperience'):
+            if value.get(key):
+                return _to_text(value[key])
+        return ''
+    text = html_lib.unescape(str(value))
+    if '<' in text:
+        text = BeautifulSoup(text, 'html.parser').get_text(separator=' ', strip=True)
+    return text.strip()
+
+def _posting_from_json_ld(html: str) -> Optional[Dict]:
+    for match in _JSON_LD_SCRIPT.finditer(html):
+        raw = match.group(1).strip()
+        if 'JobPosting' not in raw:
+            continue
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            # Some sites leave HTML comments or trailing semicolons around the JSON
+            try:
+                data = json.loads(raw.strip('<!-->; \n'))
+            except ValueError as e:
+                logger.debug(f"Skipping malformed JSON-LD block: {str(e)}")
+                continue
+        for item in _iter_items(data):
+            if _is_job_posting(item):
+                return item
+    return None
+
+def _posting_from_microdata(html: str, parser: str) -> Optional[Dict]:
+    if not _MICRODATA_TYPE.search(html):
+        return None
+    soup = BeautifulSoup(html, parser, parse_only=SoupStrainer(attrs={'itemtype': _MICRODATA_TYPE}))
+    scope = soup.find(attrs={'itemtype': _MICRODATA_TYPE})
+    if scope is None:
+        return None
+    posting = {'@type': 'JobPosting'}
+    for element in scope.find_all(attrs={'itemprop': True}):
+        prop = element['itemprop']
+        if prop == 'title' or any(prop == field for field, _ in POSTING_FIELDS):
+            value = element.get('content') or element.get_text(separator='\n', strip=True)
+            posting[prop] = f"{posting[prop]}\n{value}" if prop in posting else value
+    return posting
+
+def extract_job_posting(html: str, parser: str = 'html.parser') -> Optional[Dict]:
+    """
+    Return the page's schema.org JobPosting, or None.
+
+    JSON-LD blocks are located with a regex over the raw page and decoded
+    without parsing the document; microdata is read from a partial parse of
+    the element carrying the JobPosting itemtype. The result maps `title`,
+    `description`, `responsibilities`, `qualifications`, `skills`,
+    `experience` and `education` to plain text (missing ones are left out)
+    plus `source` ('json_ld' or 'microdata').
+    """
+    posting, source = _posting_from_json_ld(html), 'json_ld'
+    if posting is None:
+        posting, source = _posting_from_microdata(html, parser), 'microdata'
+    if posting is None:
+        return None
+
+    result = {'source': source}
+    title = _to_text(posting.get('title'))
+    if title:
+        result['title'] = title
+    for field, label in POSTING_FIELDS:
+        text = _to_text(posting.get(field))
+        if text:
+            result[(label or field).lower()] = text
+    return result
+
+def format_job_posting(posting: Dict) -> str:
+    """Join a posting's description and labelled sections into one text."""
+    parts: List[str] = []
+    for field, label in POSTING_FIELDS:
+        text = posting.get((label or field).lower())
+        if text:
+            parts.append(f"{label}: {text}" if label else text)
+    return '\n\n'.join(parts)
@@ -1,7 +1,29 @@
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse
+import logging
+import os
+import random
 import re
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+import requests
+from bs4 import BeautifulSoup, ElementFilter, NavigableString, SoupStrainer, Tag
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+
+from app.services.job_posting_data import extract_job_posting, format_job_posting
+from app.services.result_cache import ResultCache
+from config.settings import Config
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:  # lxml is optional; BeautifulSoup's pure-Python parser is used without it
+    HTML_PARSER = 'html.parser'
+
+logger = logging.getLogger(__name__)
 
 class ScrapingError(Exception):
     """Custom exception for scraping errors."""
@@ -42,101 +64,408 @@ IMPORTANT_SECTIONS = {
     ]
 }
 
-def _clean_description(text: str) -> str:
+# Only advertise encodings urllib3 can decode here (br/zstd need optional packages)
+SCRAPER_HEADERS = {
+    'User-Agent': (
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+        'AppleWebKit/537.36 (KHTML, like Gecko) '
+        'Chrome/91.0.4472.124 Safari/537.36'
+    ),
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': ACCEPT_ENCODING,
+    'Connection': 'keep-alive',
+}
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {
+    'gclid', 'fbclid', 'msclkid', 'mc_cid', 'mc_eid', '_ga', '_gl', 'igshid',
+    'trk', 'trkinfo', 'refid', 'trackingid', 'ref', 'referrer', 'origin'
+}
+TRACKING_PREFIXES = ('utm_', '_hs')
+
+# Bump when extraction changes so cached descriptions are re-extracted
+SCRAPE_VERSION = "1"
+
+scrape_cache = ResultCache(
+    'scrape',
+    ttl=Config.SCRAPE_CACHE_TTL,
+    max_entries=Config.SCRAPE_CACHE_MAX_ENTRIES,
+    enabled=Config.SCRAPE_CACHE_ENABLED
+)
+
+# Shared scraping session, created lazily per process by get_scraping_session()
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+class ScraperRetry(Retry):
+    """
+    urllib3 retry policy for job boards: exponential backoff with full
+    jitter, and Retry-After honored up to SCRAPE_MAX_RETRY_AFTER seconds so
+    one throttled site cannot park a worker for minutes.
+    """
+
+    def get_backoff_time(self) -> float:
+        return random.uniform(0, super().get_backoff_time())
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, Config.SCRAPE_MAX_RETRY_AFTER)
+
+def scraper_retry() -> ScraperRetry:
+    """The retry policy shared by the scraping session and BatchScraper."""
+    return ScraperRetry(
+        total=Config.SCRAPE_MAX_RETRIES,
+        backoff_factor=Config.SCRAPE_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({'GET', 'HEAD'}),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+
+def _build_scraping_session() -> requests.Session:
+    adapter = HTTPAdapter(
+        pool_connections=Config.SCRAPE_POOL_HOSTS,
+        pool_maxsize=Config.SCRAPE_POOL_SIZE,
+        max_retries=scraper_retry()
+    )
+    session = requests.Session()
+    session.headers.update(SCRAPER_HEADERS)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def get_scraping_session() -> requests.Session:
+    """
+    Return this process's scraping session, creating it on first use (and
+    after a fork, so worker processes never share sockets).
+
+    Connections are kept alive in a pool per host (SCRAPE_POOL_HOSTS hosts,
+    SCRAPE_POOL_SIZE connections each), so repeat fetches from the same job
+    board reuse their TCP/TLS connection. Connection errors and 429/5xx
+    responses are retried according to ScraperRetry.
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                _session = _build_scraping_session()
+                _session_pid = pid
+    return _session
+
+# One matcher for every IMPORTANT_SECTIONS keyword, longest first
+_SECTION_KEYWORDS = re.compile('|'.join(
+    re.escape(keyword)
+    for keyword in sorted({k for keywords in IMPORTANT_SECTIONS.values() for k in keywords}, key=len, reverse=True)
+))
+_HEADING_TAGS = frozenset(('h1', 'h2', 'h3', 'h4', 'h5', 'h6'))
+# Elements whose text is never part of a posting
+_SKIP_TAGS = frozenset(('script', 'style', 'noscript', 'template', 'head'))
+
+class NoiseRule:
+    """
+    Removes page boilerplate: everything from a `start` match up to the
+    next `end` match (kept when `keep_end` is set), or to the end of the
+    text when `end` is None.
+
+    `start` and `end` are plain strings or simple regexes without nested or
+    lazy quantifiers. The position of the next `end` is remembered between
+    `start` matches, so a rule runs in linear time even when a page repeats
+    the start marker many times and never contains the end marker.
+    """
+
+    def __init__(self, start: str, end: Optional[str] = None, keep_end: bool = False, regex: bool = False):
+        self.start = re.compile(start if regex else re.escape(start))
+        self.end = re.compile(end if regex else re.escape(end)) if end is not None else None
+        self.keep_end = keep_end
+
+    def apply(self, text: str) -> str:
+        parts = []
+        pos = 0
+        next_end = None  # first end match at or after the current start, if still valid
+        while True:
+            start = self.start.search(text, pos)
+            if start is None:
+                break
+            if self.end is None:
+                parts.append(text[pos:start.start()])
+                pos = len(text)
+                break
+            if next_end is None or next_end.start() < start.end():
+                next_end = self.end.search(text, start.end())
+                if next_end is None:
+                    break  # no end marker anywhere after this point
+            parts.append(text[pos:start.start()])
+            pos = next_end.start() if self.keep_end else next_end.end()
+            next_end = None if pos > next_end.start() else next_end
+        parts.append(text[pos:])
+        return ''.join(parts)
+
+# Boilerplate removed from extracted descriptions, applied in order
+NOISE_RULES = (
+    NoiseRule('Toggle navigation', 'ProductActions', keep_end=True),  # Example: navigation block
+    NoiseRule('Join Our Talent Community'),
+    NoiseRule('Subscribe to our', 'inbox.'),
+    NoiseRule(r'©\s*\d{4}', regex=True),
+)
+
+def _clean_description(text: str, rules=NOISE_RULES) -> str:
     """
     Cleans the extracted text by removing extraneous navigation,
-    header, footer, and known noise patterns.
+    header, footer, and known noise patterns, then collapsing whitespace.
     """
-    ignore_patterns = [
-        r'Toggle navigation.*?(?=ProductActions)',  # Example: navigation block
-        r'Join Our Talent Community.*',
-        r'Subscribe to our.*?inbox\.',
-        r'©\s*\d{4}.*'
-    ]
-    for pattern in ignore_patterns:
-        text = re.sub(pattern, '', text, flags=re.DOTALL)
-    text = re.sub(r'\s+', ' ', text)
-    text = re.sub(r'\n\s*\n', '\n\n', text)
-    return text.strip()
+    for rule in rules:
+        text = rule.apply(text)
+    return ' '.join(text.split())
 
 def _scrape_by_candidate_sections(soup: BeautifulSoup) -> str:
     """
     Dynamically extracts content based on candidate section headings.
-    Scans all heading tags (h1-h6) for keywords that denote important job posting sections.
+
+    Walks the document once in order. A heading (h1-h6) matching one of the
+    IMPORTANT_SECTIONS keywords opens a section that collects the text
+    after it until the next heading or until the walk leaves the heading's
+    parent element; every text node belongs to at most one section, so
+    nested or overlapping headings are never re-traversed.
     """
     extracted_sections = []
-    for heading in soup.find_all(re.compile('^h[1-6]$')):
-        heading_text = heading.get_text(separator=' ', strip=True).lower()
-        for category, keywords in IMPORTANT_SECTIONS.items():
-            for keyword in keywords:
-                if keyword in heading_text:
-                    # If heading matches a candidate phrase, collect its text and subsequent siblings.
-                    section_text = heading.get_text(separator=' ', strip=True)
-                    sibling = heading.find_next_sibling()
-                    while sibling and sibling.name not in ['h1','h2','h3','h4','h5','h6']:
-                        section_text += " " + sibling.get_text(separator=' ', strip=True)
-                        sibling = sibling.find_next_sibling()
-                    if len(section_text) > 50:
-                        extracted_sections.append(section_text)
-                    break  # Keyword match found; no need to check other keywords in this heading.
+    current = None
+    current_depth = 0
+
+    def close():
+        if current is not None:
+            section_text = " ".join(current)
+            if len(section_text) > 50:
+                extracted_sections.append(section_text)
+
+    stack = [(iter(soup.contents), 0)]
+    while stack:
+        children, depth = stack[-1]
+        node = next(children, None)
+        if node is None:
+            stack.pop()
+            continue
+        if current is not None and depth < current_depth:
+            close()
+            current = None
+
+        if isinstance(node, Tag):
+            if node.name in _HEADING_TAGS:
+                close()
+                heading_text = node.get_text(separator=' ', strip=True)
+                if _SECTION_KEYWORDS.search(heading_text.lower()):
+                    current, current_depth = [heading_text], depth
+                else:
+                    current = None
+            elif node.name not in _SKIP_TAGS:
+                stack.append((iter(node.contents), depth + 1))
+        elif current is not None and type(node) is NavigableString:
+            text = node.strip()
+            if text:
+                current.append(text)
+    close()
+
     if extracted_sections:
         return _clean_description(" ".join(extracted_sections))
     return ""
 
-def extract_job_description(url: str) -> str:
-    """
-    Extracts the job description text from a job posting URL.
-    Uses specialized strategies for known domains and falls back to candidate-based extraction.
-    """
+def validate_job_url(url: str):
+    """Raise ScrapingError unless `url` is an absolute URL."""
     parsed_url = urlparse(url)
     if not parsed_url.scheme or not parsed_url.netloc:
         raise ScrapingError("Invalid URL format")
-    
-    headers = {
-        'User-Agent': (
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-            'AppleWebKit/537.36 (KHTML, like Gecko) '
-            'Chrome/91.0.4472.124 Safari/537.36'
-        ),
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-    }
+    return parsed_url
+
+def normalize_job_url(url: str) -> str:
+    """
+    Canonical form of a posting URL for caching: lowercase scheme and host,
+    no fragment or default port, tracking parameters dropped and the
+    remaining query parameters sorted.
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or '').lower()
+    if parsed.port and (scheme, parsed.port) not in (('http', 80), ('https', 443)):
+        host = f"{host}:{parsed.port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunparse((scheme, host, parsed.path or '/', parsed.params, urlencode(query), ''))
+
+def scrape_cache_key(url: str) -> str:
+    return scrape_cache.make_key(normalize_job_url(url), SCRAPE_VERSION)
+
+def cached_job_description(url: str) -> Optional[Tuple[str, bool]]:
+    """
+    Return (description, is_stale) for a cached posting, or None.
+
+    Entries are fresh for SCRAPE_CACHE_FRESH_TTL seconds after they were
+    last fetched or revalidated, and may be served stale for another
+    SCRAPE_CACHE_MAX_STALE seconds while a revalidation runs.
+    """
+    entry = scrape_cache.get(scrape_cache_key(url))
+    if not entry:
+        return None
+    age = time.time() - entry.get('fetched_at', 0)
+    if age > Config.SCRAPE_CACHE_FRESH_TTL + Config.SCRAPE_CACHE_MAX_STALE:
+        return None
+    return entry['description'], age > Config.SCRAPE_CACHE_FRESH_TTL
+
+def conditional_headers(validators: Optional[Dict]) -> Dict:
+    """Request headers revalidating a cached entry's etag/last_modified."""
+    headers = {}
+    if validators:
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+    return headers
 
+def status_error(status_code: int, detail: str) -> ScrapingError:
+    """The ScrapingError reported for an unsuccessful HTTP response."""
+    if status_code == 403:
+        return ScrapingError("Access denied. This job posting might require authentication.")
+    if status_code == 404:
+        return ScrapingError("Job posting not found. The link might be expired or invalid.")
+    return ScrapingError(f"Failed to fetch job posting: {detail}")
+
+def cache_description(url: str, description: str, headers) -> None:
+    """Cache a freshly extracted description with the page's validators."""
+    scrape_cache.set(scrape_cache_key(url), {
+        'url': normalize_job_url(url),
+        'description': description,
+        'etag': headers.get('ETag'),
+        'last_modified': headers.get('Last-Modified'),
+        'fetched_at': time.time()
+    })
+
+def touch_cached_description(url: str, entry: Dict) -> str:
+    """Mark a cached entry as just revalidated (the page answered 304) and return its description."""
+    logger.info(f"Job posting unchanged since last fetch: {normalize_job_url(url)}")
+    entry['fetched_at'] = time.time()
+    scrape_cache.set(scrape_cache_key(url), entry)
+    return entry['description']
+
+def _fetch(url: str, validators: Optional[Dict] = None) -> requests.Response:
+    """GET `url`, conditionally when `validators` holds a cached etag/last_modified."""
+    headers = conditional_headers(validators)
     try:
-        response = requests.get(url, headers=headers, timeout=15)
+        response = get_scraping_session().get(
+            url, headers=headers, timeout=(Config.SCRAPE_CONNECT_TIMEOUT, Config.SCRAPE_READ_TIMEOUT)
+        )
         response.raise_for_status()
+        return response
     except requests.Timeout:
         raise ScrapingError("Request timed out. Please check your internet connection.")
     except requests.RequestException as e:
-        if hasattr(e, 'response'):
-            if e.response.status_code == 403:
-                raise ScrapingError("Access denied. This job posting might require authentication.")
-            elif e.response.status_code == 404:
-                raise ScrapingError("Job posting not found. The link might be expired or invalid.")
+        if getattr(e, 'response', None) is not None:
+            raise status_error(e.response.status_code, str(e))
         raise ScrapingError(f"Failed to fetch job posting: {str(e)}")
 
-    soup = BeautifulSoup(response.text, 'html.parser')
-    domain = parsed_url.netloc.lower()
-
-    # Use specialized strategies for known domains
-    if 'github.careers' in domain or 'github.com' in domain:
-        description = _scrape_github(soup, url)
-    elif 'linkedin.com' in domain:
-        description = _scrape_linkedin(soup)
-    elif 'indeed.com' in domain:
-        description = _scrape_indeed(soup)
-    elif 'glassdoor.com' in domain:
-        description = _scrape_glassdoor(soup)
-    else:
-        description = _scrape_generic(soup)
-
-    # If extraction is still insufficient, fall back to candidate section extraction.
+def extract_job_description(url: str, use_cache: bool = True, timings: Optional[Dict] = None) -> str:
+    """
+    Extracts the job description text from a job posting URL.
+    Uses specialized strategies for known domains and falls back to candidate-based extraction.
+
+    Descriptions are cached by normalized URL together with the page's
+    ETag/Last-Modified. A fresh entry is returned without a request; an
+    expired one is revalidated with a conditional request and only
+    re-downloaded and re-extracted when the page has changed. When given,
+    `timings` is filled with the extraction timing report (see
+    extract_from_html).
+    """
+    parsed_url = validate_job_url(url)
+    entry = scrape_cache.get(scrape_cache_key(url)) if use_cache else None
+    if entry and time.time() - entry.get('fetched_at', 0) <= Config.SCRAPE_CACHE_FRESH_TTL:
+        return entry['description']
+
+    response = _fetch(url, entry)
+    if entry and response.status_code == 304:
+        return touch_cached_description(url, entry)
+
+    description = extract_from_html(response.text, parsed_url.netloc.lower(), timings)
+    cache_description(url, description, response.headers)
+    return description
+
+def _parse(html: str, parse_only: Optional[ElementFilter] = None) -> BeautifulSoup:
+    """Parse with HTML_PARSER, falling back to html.parser if it rejects the markup."""
+    try:
+        return BeautifulSoup(html, HTML_PARSER, parse_only=parse_only)
+    except Exception as e:
+        if HTML_PARSER == 'html.parser':
+            raise
+        logger.warning(f"{HTML_PARSER} could not parse the page, using html.parser: {str(e)}")
+        return BeautifulSoup(html, 'html.parser', parse_only=parse_only)
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+def _log_timings(domain: str, name: str, timings: Dict):
+    logger.info(f"Scraped {domain} ({timings['page_bytes']} bytes) via {name}/{timings['path']}: " + ", ".join(
+        f"{key}={value}" for key, value in timings.items() if key.endswith('_ms')
+    ))
+
+def extract_from_html(html: str, domain: str, timings: Optional[Dict] = None) -> str:
+    """
+    Extract the job description from a posting page, raising ScrapingError if there is too little.
+
+    A schema.org JobPosting embedded as JSON-LD or microdata is used when
+    present (see job_posting_data). Otherwise the domain's strategy runs on
+    a partial parse holding only the elements its selectors can match (see
+    STRATEGIES); scripts, navigation and everything else are never turned
+    into tree nodes. If that finds too little, the whole page is parsed and
+    the strategy and then the candidate-section extraction run on the full
+    tree, as before. The timing of each step is recorded in `timings` and
+    logged.
+    """
+    timings = timings if timings is not None else {}
+    name, strategy, strainer = _strategy_for(domain)
+    timings.update({'parser': HTML_PARSER, 'strategy': name, 'page_bytes': len(html)})
+
+    # Structured data needs no DOM traversal and is cleaner than page text
+    start = time.perf_counter()
+    posting = extract_job_posting(html, HTML_PARSER)
+    timings['structured_data_ms'] = _elapsed_ms(start)
+    if posting:
+        description = _clean_description(format_job_posting(posting))
+        if len(description) >= 100:
+            timings['path'] = posting['source']
+            _log_timings(domain, name, timings)
+            return description
+
+    start = time.perf_counter()
+    soup = _parse(html, strainer)
+    timings['partial_parse_ms'] = _elapsed_ms(start)
+    start = time.perf_counter()
+    description = strategy(soup)
+    timings['strategy_ms'] = _elapsed_ms(start)
+    timings['path'] = 'partial'
+
     if not description or len(description) < 100:
-        candidate_text = _scrape_by_candidate_sections(soup)
-        if candidate_text and len(candidate_text) > 100:
-            description = candidate_text
+        start = time.perf_counter()
+        soup = _parse(html)
+        timings['full_parse_ms'] = _elapsed_ms(start)
+        start = time.perf_counter()
+        description = strategy(soup)
+        timings['full_strategy_ms'] = _elapsed_ms(start)
+        timings['path'] = 'full'
+
+        # If extraction is still insufficient, fall back to candidate section extraction.
+        if not description or len(description) < 100:
+            start = time.perf_counter()
+            candidate_text = _scrape_by_candidate_sections(soup)
+            timings['candidate_sections_ms'] = _elapsed_ms(start)
+            if candidate_text and len(candidate_text) > 100:
+                description = candidate_text
+                timings['path'] = 'candidate_sections'
+
+    _log_timings(domain, name, timings)
 
     if not description or len(description) < 100:
         raise ScrapingError("Failed to extract a sufficient job description from the page."+description)
@@ -218,6 +547,44 @@ def _scrape_generic(soup: BeautifulSoup) -> str:
                 return _clean_description(text)
     return ""
 
+class _AnyOf(ElementFilter):
+    """Partial-parse filter keeping every element that any of `strainers` would keep."""
+
+    def __init__(self, *strainers: SoupStrainer):
+        super().__init__(lambda element: any(strainer.match(element) for strainer in strainers))
+        self.strainers = strainers
+
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        return any(strainer.allow_tag_creation(nsprefix, name, attrs) for strainer in self.strainers)
+
+    def allow_string_creation(self, string: str) -> bool:
+        return False
+
+# Extraction strategy per domain: (name, domain markers, strategy, elements its selectors can match)
+_DESCRIPTION_CLASS = re.compile('description')
+STRATEGIES = (
+    ('github', ('github.careers', 'github.com'), _scrape_github, _AnyOf(
+        SoupStrainer('div', attrs={'data-testid': 'jobDetails'}),
+        SoupStrainer(['div', 'section'], attrs={'class': re.compile('job-details|description')}),
+        SoupStrainer('article', id='description-body')
+    )),
+    ('linkedin', ('linkedin.com',), _scrape_linkedin,
+     SoupStrainer('div', class_=['description__text', 'show-more-less-html'])),
+    ('indeed', ('indeed.com',), _scrape_indeed, SoupStrainer('div', id='jobDescriptionText')),
+    ('glassdoor', ('glassdoor.com',), _scrape_glassdoor, SoupStrainer('div', class_='jobDescriptionContent')),
+)
+GENERIC_STRATEGY = ('generic', _scrape_generic, _AnyOf(
+    SoupStrainer('div', attrs={'class': _DESCRIPTION_CLASS}),
+    SoupStrainer(['main', 'article'])
+))
+
+def _strategy_for(domain: str):
+    """Return (name, strategy, strainer) for a domain; the generic strategy if none is specific to it."""
+    for name, markers, strategy, strainer in STRATEGIES:
+        if any(marker in domain for marker in markers):
+            return name, strategy, strainer
+    return GENERIC_STRATEGY
+
 # Example usage:
 # try:
 #     job_text = extract_job_description("https://www.example.com/job-posting")
@@ -0,0 +1,142 @@
+import logging
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from typing import IO, Callable, Optional, Union
+
+import pdfplumber
+
+from app.services.pdf_extraction import PDFExtraction, extract_page
+from config.settings import Config
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; limits are skipped there
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+class ParseTimeout(Exception):
+    """Raised inside a parser that has used up its CPU-time budget."""
+    pass
+
+def _raise_parse_timeout(signum, frame):
+    raise ParseTimeout("CPU time limit exceeded while parsing")
+
+def _raise_wall_timeout(signum, frame):
+    raise ParseTimeout("Time limit exceeded while parsing")
+
+@contextmanager
+def cpu_time_limit(seconds: Optional[float]):
+    """
+    Raise ParseTimeout once this process has used `seconds` more CPU time.
+
+    Uses a soft RLIMIT_CPU relative to the CPU time already consumed, so it
+    works in long-lived worker processes, and turns the kernel's SIGXCPU into
+    an exception. The previous limit and handler are restored on exit. Only
+    the main thread can receive the signal, so elsewhere this is a no-op.
+    """
+    if not seconds or resource is None or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    limit = int(usage.ru_utime + usage.ru_stime + seconds) + 1
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    previous_handler = signal.signal(signal.SIGXCPU, _raise_parse_timeout)
+    resource.setrlimit(resource.RLIMIT_CPU, (limit, hard))
+    try:
+        yield
+    finally:
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+        signal.signal(signal.SIGXCPU, previous_handler)
+
+@contextmanager
+def wall_time_limit(seconds: Optional[float]):
+    """
+    Raise ParseTimeout once `seconds` of wall-clock time have passed.
+
+    Uses a real-time interval timer (SIGALRM), so like cpu_time_limit it only
+    applies in the main thread; any timer that was already running is
+    re-armed with its remaining time on exit.
+    """
+    if not seconds or not hasattr(signal, 'setitimer') or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    started = time.monotonic()
+    previous_handler = signal.signal(signal.SIGALRM, _raise_wall_timeout)
+    previous_delay, previous_interval = signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+        if previous_delay:
+            remaining = max(previous_delay - (time.monotonic() - started), 0.001)
+            signal.setitimer(signal.ITIMER_REAL, remaining, previous_interval)
+
+def _address_space() -> int:
+    """Current virtual memory size of this process in bytes, or 0 where it cannot be read."""
+    try:
+        fd = os.open('/proc/self/statm', os.O_RDONLY)
+        try:
+            return int(os.read(fd, 64).split()[0]) * resource.getpagesize()
+        finally:
+            os.close(fd)
+    except (OSError, ValueError, IndexError):
+        return 0
+
+@contextmanager
+def memory_limit(max_memory_mb: Optional[int]):
+    """
+    Let this process's address space grow by at most `max_memory_mb` MB;
+    allocations past it raise MemoryError. The limit is relative because the
+    process already holds the interpreter and the worker's own memory. The
+    previous limit is restored on exit.
+    """
+    current = _address_space() if resource is not None and max_memory_mb else 0
+    if not current:
+        yield
+        return
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = current + max_memory_mb * 1024 * 1024
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    try:
+        yield
+    finally:
+        resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+def extract_pdf_limited(source: Union[str, IO[bytes]],
+                        on_progress: Optional[Callable[[int, int], None]] = None) -> PDFExtraction:
+    """
+    Extract a PDF in this process under per-document limits.
+
+    Parsing gets a PARSE_CPU_SECONDS CPU budget, PARSE_TIMEOUT seconds of
+    wall-clock time and at most PARSE_MAX_MEMORY_MB of further memory growth.
+    When a limit is hit, the pages extracted so far are returned with
+    `truncated` set. Uploads are parsed in Celery prefork children, which are
+    daemonic and cannot start processes of their own, so the limits apply to
+    the worker process itself and are lifted again afterwards.
+    """
+    pages = []
+    try:
+        with wall_time_limit(Config.PARSE_TIMEOUT), memory_limit(Config.PARSE_MAX_MEMORY_MB), \
+                cpu_time_limit(Config.PARSE_CPU_SECONDS):
+            with pdfplumber.open(source) as pdf:
+                total = len(pdf.pages)
+                for number, page in enumerate(pdf.pages):
+                    pages.append(extract_page(page, number))
+                    if on_progress:
+                        on_progress(len(pages), total)
+    except (ParseTimeout, MemoryError) as e:
+        logger.warning(f"Stopped parsing after {len(pages)} pages: {type(e).__name__}")
+        return PDFExtraction(pages, truncated=True)
+    return PDFExtraction(pages)
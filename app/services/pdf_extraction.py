@@ -0,0 +1,97 @@
+from collections import Counter
+from typing import IO, Callable, Dict, List, Optional, Union
+
+import pdfplumber
+
+from app.services.reading_order import lines_to_text, order_lines
+
+# Word attributes kept from pdfplumber; the rest (matrix, upright, ...) is dropped
+WORD_FIELDS = ('text', 'x0', 'x1', 'top', 'bottom', 'size')
+
+class PageLayout:
+    """
+    Text and word boxes of a single PDF page; `columns` is 2 for two-column
+    pages. `lines` are the words grouped into lines in reading order (see
+    reading_order.order_lines), computed from the words when not given.
+    """
+
+    __slots__ = ('number', 'width', 'height', 'text', 'words', 'base_font_size', 'columns', 'lines')
+
+    def __init__(self, number: int, width: float, height: float, text: str, words: List[Dict],
+                 columns: int = 1, lines: Optional[List[Dict]] = None):
+        self.number = number
+        self.width = width
+        self.height = height
+        self.text = text
+        self.words = words
+        self.columns = columns
+        self.lines = lines if lines is not None else order_lines(words, width, number)
+        sizes = Counter(word['size'] for word in words)
+        self.base_font_size = sizes.most_common(1)[0][0] if sizes else None
+
+class PDFExtraction:
+    """
+    Everything the upload path needs from a PDF, gathered in one pass.
+
+    `text` is the page texts joined by newlines, `pages` holds each page's
+    text and non-blank word boxes, and `font_sizes` counts words per font size
+    across the whole document. `truncated` is set when extraction stopped
+    early (time or memory limit) and only some pages are present.
+    """
+
+    __slots__ = ('pages', 'font_sizes', 'truncated')
+
+    def __init__(self, pages: List[PageLayout], truncated: bool = False):
+        self.pages = sorted(pages, key=lambda page: page.number)
+        self.truncated = truncated
+        self.font_sizes = Counter()
+        for page in self.pages:
+            self.font_sizes.update(word['size'] for word in page.words)
+
+    @property
+    def text(self) -> str:
+        return "\n".join(page.text for page in self.pages)
+
+    @property
+    def body_font_size(self) -> Optional[float]:
+        """Most common font size in the document."""
+        return self.font_sizes.most_common(1)[0][0] if self.font_sizes else None
+
+def extract_page(page, number: int) -> PageLayout:
+    """
+    Extract text and word boxes from one pdfplumber page, then release its caches.
+
+    Multi-column pages get their text rebuilt in reading order from the word
+    boxes (see reading_order.order_lines), since pdfplumber's line-by-line
+    text interleaves the columns.
+    """
+    words = [
+        {field: word[field] for field in WORD_FIELDS}
+        for word in page.extract_words(keep_blank_chars=True, extra_attrs=['size'])
+        if word['text'].strip()
+    ]
+    lines = order_lines(words, page.width, number)
+    if any(line['column'] != 'full' for line in lines):
+        layout = PageLayout(number, page.width, page.height, lines_to_text(lines), words, columns=2, lines=lines)
+    else:
+        layout = PageLayout(number, page.width, page.height, page.extract_text() or "", words, lines=lines)
+    page.close()
+    return layout
+
+def extract_pdf(source: Union[str, IO[bytes]],
+                on_progress: Optional[Callable[[int, int], None]] = None) -> PDFExtraction:
+    """
+    Open a PDF once and extract text, word boxes and font statistics per page.
+
+    `source` is a path or a binary file object. Each page's characters are
+    parsed a single time; text and words are both derived from them.
+    `on_progress(pages_done, total_pages)` is called after each page.
+    """
+    pages = []
+    with pdfplumber.open(source) as pdf:
+        total = len(pdf.pages)
+        for number, page in enumerate(pdf.pages):
+            pages.append(extract_page(page, number))
+            if on_progress:
+                on_progress(number + 1, total)
+    return PDFExtraction(pages)
@@ -0,0 +1,133 @@
+import statistics
+from itertools import accumulate
+from typing import Dict, List, Optional
+
+from app.services.section_detector import group_lines
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; the pure-Python histogram is used without it
+    np = None
+
+# A gutter is a vertical band at least MIN_GUTTER_WIDTH points wide, inside the
+# middle of the page, crossed by at most MAX_GUTTER_CROSSINGS of the words.
+MIN_GUTTER_WIDTH = 8
+GUTTER_SEARCH = (0.2, 0.8)
+MAX_GUTTER_CROSSINGS = 0.03
+MIN_COLUMN_SHARE = 0.15
+# pdfplumber words keep blanks, so a "word" is often a whole phrase or line
+MIN_COLUMN_WORDS = 4
+# Lines further apart than this multiple of the typical line gap start a new block
+BLOCK_GAP_FACTOR = 1.8
+
+def _coverage(words: List[Dict], width: int) -> List[int]:
+    """Number of words covering each 1pt-wide vertical slice of the page."""
+    if np is not None:
+        x0 = np.clip(np.fromiter((w['x0'] for w in words), dtype=np.float64, count=len(words)), 0, width).astype(int)
+        x1 = np.clip(np.fromiter((w['x1'] for w in words), dtype=np.float64, count=len(words)), 0, width).astype(int)
+        diff = np.zeros(width + 2, dtype=np.int32)
+        np.add.at(diff, x0, 1)
+        np.add.at(diff, x1 + 1, -1)
+        return np.cumsum(diff)[:width + 1].tolist()
+
+    diff = [0] * (width + 2)
+    for w in words:
+        diff[min(max(int(w['x0']), 0), width)] += 1
+        diff[min(max(int(w['x1']), 0), width) + 1] -= 1
+    return list(accumulate(diff))[:width + 1]
+
+def find_gutter(words: List[Dict], width: float) -> Optional[float]:
+    """
+    Return the x position of the gap between two text columns, or None.
+
+    Word extents are accumulated into a coverage histogram across the page;
+    the gutter is the widest near-empty band in the middle of the page, and
+    it only counts when both sides hold a real share of the words.
+    """
+    if len(words) < MIN_COLUMN_WORDS * 2 or not width:
+        return None
+    width = int(width)
+    coverage = _coverage(words, width)
+    allowed = max(1, int(len(words) * MAX_GUTTER_CROSSINGS))
+    lo, hi = int(width * GUTTER_SEARCH[0]), int(width * GUTTER_SEARCH[1])
+
+    best_start, best_len, run_start = None, 0, None
+    for x in range(lo, hi + 1):
+        if x < hi and coverage[x] <= allowed:
+            if run_start is None:
+                run_start = x
+        elif run_start is not None:
+            if x - run_start > best_len:
+                best_start, best_len = run_start, x - run_start
+            run_start = None
+
+    if best_len < MIN_GUTTER_WIDTH:
+        return None
+    gutter = best_start + best_len / 2
+    left = sum(1 for w in words if w['x1'] <= gutter)
+    right = sum(1 for w in words if w['x0'] >= gutter)
+    if min(left, right) < len(words) * MIN_COLUMN_SHARE:
+        return None
+    return gutter
+
+def _split_blocks(lines: List[Dict], column: str, start_block: int) -> int:
+    """Tag lines with their column and block number; returns the next block number."""
+    gaps = [b['top'] - a['bottom'] for a, b in zip(lines, lines[1:]) if b['top'] > a['bottom']]
+    typical = statistics.median(gaps) if gaps else 0.0
+    block = start_block
+    for prev, line in zip([None] + lines, lines):
+        if prev is not None and typical and line['top'] - prev['bottom'] > typical * BLOCK_GAP_FACTOR:
+            block += 1
+        line['column'] = column
+        line['block'] = block
+    return block + 1 if lines else start_block
+
+def order_lines(words: List[Dict], width: float, page: int = 0) -> List[Dict]:
+    """
+    Group words into lines and return them in reading order.
+
+    On a two-column page, each run of lines between full-width lines (those
+    with a word crossing the gutter) is emitted as the whole left column and
+    then the whole right column. Every line is tagged with its `column`
+    ('full', 'left' or 'right') and `block` number; blocks break at unusually
+    large vertical gaps.
+    """
+    gutter = find_gutter(words, width)
+    if gutter is None:
+        lines = group_lines(words, page)
+        _split_blocks(lines, 'full', 0)
+        return lines
+
+    ordered = []
+    left, right = [], []
+    block = 0
+
+    def flush():
+        nonlocal block, left, right
+        for column, column_words in (('left', left), ('right', right)):
+            column_lines = group_lines(column_words, page)
+            block = _split_blocks(column_lines, column, block)
+            ordered.extend(column_lines)
+        left, right = [], []
+
+    for line in group_lines(words, page):
+        if any(w['x0'] < gutter < w['x1'] for w in line['words']):
+            flush()
+            block = _split_blocks([line], 'full', block)
+            ordered.append(line)
+        else:
+            for w in line['words']:
+                (left if w['x1'] <= gutter else right).append(w)
+    flush()
+    return ordered
+
+def lines_to_text(lines: List[Dict]) -> str:
+    """Join ordered lines into text, with a blank line at each block boundary."""
+    parts = []
+    prev_block = None
+    for line in lines:
+        if prev_block is not None and line['block'] != prev_block:
+            parts.append('')
+        parts.append(line['text'])
+        prev_block = line['block']
+    return '\n'.join(parts)
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import logging
+import time
+from typing import Dict, Optional
+
+import redis
+
+from app.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different copies of a text share a cache key."""
+    return ' '.join((text or '').split())
+
+class ResultCache:
+    """
+    Content-addressed JSON result cache stored in Redis.
+
+    Entries expire after `ttl` seconds without being read (each hit refreshes
+    the expiry) and the namespace is capped at `max_entries`; when the cap is
+    exceeded the least recently used entries are evicted. Hit, miss and
+    eviction counters are kept in a Redis hash so they are shared by every
+    web and worker process. Redis failures are logged and treated as misses.
+    """
+
+    def __init__(self, namespace: str, ttl: int, max_entries: int, enabled: bool = True):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._index_key = f"cache:{namespace}:lru"
+        self._stats_key = f"cache:{namespace}:stats"
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """Build a content-addressed key from the given parts."""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode('utf-8'))
+            digest.update(b'\x1f')
+        return digest.hexdigest()
+
+    def _entry_key(self, key: str) -> str:
+        return f"cache:{self.namespace}:{key}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached value for `key`, or None on a miss."""
+        if not self.enabled:
+            return None
+        try:
+            client = get_redis()
+            raw = client.get(self._entry_key(key))
+            if raw is None:
+                client.hincrby(self._stats_key, 'misses', 1)
+                return None
+
+            pipe = client.pipeline()
+            pipe.expire(self._entry_key(key), self.ttl)
+            pipe.zadd(self._index_key, {key: time.time()})
+            pipe.hincrby(self._stats_key, 'hits', 1)
+            pipe.execute()
+            return json.loads(raw)
+        except (redis.RedisError, ValueError) as e:
+            logger.warning(f"Cache lookup failed for {self.namespace}: {str(e)}")
+            return None
+
+    def set(self, key: str, value: Dict) -> bool:
+        """Store `value` under `key`, evicting old entries if the cache is full."""
+        if not self.enabled:
+            return False
+        try:
+            client = get_redis()
+            pipe = client.pipeline()
+            pipe.set(self._entry_key(key), json.dumps(value), ex=self.ttl)
+            pipe.zadd(self._index_key, {key: time.time()})
+            pipe.execute()
+            self._evict(client)
+            return True
+        except (redis.RedisError, TypeError, ValueError) as e:
+            logger.warning(f"Cache store failed for {self.namespace}: {str(e)}")
+            return False
+
+    def _evict(self, client: redis.Redis):
+        """Drop expired index entries and trim the namespace to `max_entries`."""
+        client.zremrangebyscore(self._index_key, 0, time.time() - self.ttl)
+        overflow = client.zcard(self._index_key) - self.max_entries
+        if overflow <= 0:
+            return
+        victims = [member for member, _ in client.zpopmin(self._index_key, overflow)]
+        if victims:
+            client.delete(*(self._entry_key(v.decode() if isinstance(v, bytes) else v) for v in victims))
+            client.hincrby(self._stats_key, 'evictions', len(victims))
+
+    def stats(self) -> Dict:
+        """Return hit/miss/eviction counters and the current entry count."""
+        try:
+            client = get_redis()
+            raw = client.hgetall(self._stats_key)
+            counters = {k.decode() if isinstance(k, bytes) else k: int(v) for k, v in raw.items()}
+            hits = counters.get('hits', 0)
+            misses = counters.get('misses', 0)
+            return {
+                'namespace': self.namespace,
+                'enabled': self.enabled,
+                'entries': client.zcard(self._index_key),
+                'hits': hits,
+                'misses': misses,
+                'evictions': counters.get('evictions', 0),
+                'hit_rate': round(hits / (hits + misses), 3) if hits + misses else 0.0
+            }
+        except redis.RedisError as e:
+            logger.warning(f"Cache stats unavailable for {self.namespace}: {str(e)}")
+            return {'namespace': self.namespace, 'enabled': self.enabled, 'error': str(e)}
@@ -1,93 +1,76 @@
-import pdfplumber
-import PyPDF2
 from docx import Document
-from typing import Dict, List, Tuple
-from app.services.ai_analysis import analyze_document_structure, analyze_resume_sections
+from typing import IO, Callable, Dict, List, Optional, Tuple, Union
+from app.services.ai_analysis import analyze_resume_structure
+from app.services.pdf_extraction import PDFExtraction, extract_pdf
+from app.services.parse_limits import extract_pdf_limited
+from app.services.section_detector import detect_sections
+from app.services.word_layout import WordLayout, load_word_layout
+from config.settings import Config
 
-def process_word(word: dict, base_size: float = None) -> dict:
-    """Process a single word and return its formatting."""
-    if not word['text'].strip():
-        return {}
-    
-    size = word['size']
-    normalized_size = round((size / base_size) * 10, 1) if base_size else 10
-    
-    return {
-        'text': word['text'].strip(),
-        'font_size': normalized_size,
-        'top': word['top'],
-        'bottom': word['bottom']
-    }
+def calculate_line_spacing(sections) -> dict:
+    """Calculate line spacing between sections (columnar or per-word form)."""
+    return load_word_layout(sections).line_spacing()
 
-def calculate_line_spacing(sections: list) -> dict:
-    """Calculate line spacing between sections."""
-    spacing = {}
-    sorted_sections = sorted(sections, key=lambda x: x['top'])
-    
-    for i in range(len(sorted_sections)-1):
-        curr, next_sect = sorted_sections[i], sorted_sections[i+1]
-        space = next_sect['top'] - curr['bottom']
-        if space > 0:
-            spacing[curr['text']] = min(space / 2, 10)
-    
-    return spacing
+def build_pdf_formatting(extraction: PDFExtraction) -> dict:
+    """Build formatting information from an already extracted PDF.
 
-def extract_pdf_formatting(file_path: str) -> dict:
-    """Extract formatting information from a PDF file."""
+    Per-word formatting is stored in `formatting['sections']` in the compact
+    columnar form of WordLayout.to_dict().
+    """
     formatting = {
         'sections': [],
         'default_font_size': 10,
         'line_spacing': {},
         'ai_analysis': None,
-        'section_analysis': None
+        'section_analysis': None,
+        'truncated': extraction.truncated
     }
     
     try:
-        with pdfplumber.open(file_path) as pdf:
-            text = ""
-            for page in pdf.pages:
-                words = page.extract_words(keep_blank_chars=True)
-                text += page.extract_text() + "\n"
-                
-                sizes = [word['size'] for word in words if word['text'].strip()]
-                base_size = sorted(set(sizes), key=sizes.count)[-1] if sizes else None
-                
-                for word in words:
-                    section = process_word(word, base_size)
-                    if section:
-                        formatting['sections'].append(section)
-            
-            # Get AI analysis of document structure and sections
-            formatting['ai_analysis'] = analyze_document_structure(text)
-            formatting['section_analysis'] = analyze_resume_sections(text)
-            formatting['line_spacing'] = calculate_line_spacing(formatting['sections'])
-            
-            # Apply AI section analysis to improve formatting
-            if formatting['section_analysis'] and 'sections' in formatting['section_analysis']:
-                for section in formatting['section_analysis']['sections']:
-                    # Find matching text in formatting sections
-                    for fmt_section in formatting['sections']:
-                        if section['name'].lower() in fmt_section['text'].lower():
-                            fmt_section['is_header'] = section['formatting']['is_header']
-                            fmt_section['font_size'] = max(fmt_section['font_size'], 
-                                                         section['formatting']['suggested_font_size'])
-                            
+        # Lines were already put in reading order when each page was extracted
+        lines = [line for page in extraction.pages for line in page.lines]
+        layout = WordLayout.from_pages(extraction.pages)
+        
+        # Sections are detected locally from font statistics; the AI pass
+        # (cached per document) is only an opt-in fallback when unsure
+        structure = detect_sections(lines)
+        if Config.SECTION_LLM_FALLBACK and structure['confidence'] < Config.SECTION_CONFIDENCE_THRESHOLD:
+            structure = analyze_resume_structure(extraction.text)
+        formatting['ai_analysis'] = structure
+        formatting['section_analysis'] = structure
+        formatting['line_spacing'] = layout.line_spacing()
+        
+        # Apply section analysis to the words of each section heading
+        for section in structure.get('sections', []):
+            layout.mark_headers(section['name'], section['formatting']['is_header'],
+                                section['formatting']['suggested_font_size'])
+        formatting['sections'] = layout.to_dict()
+                        
     except Exception as e:
         print(f"Error extracting formatting: {str(e)}")
     
     return formatting
 
-def parse_pdf(file_path: str) -> Tuple[str, dict]:
-    """Parse PDF and extract both text and formatting"""
-    text = ""
-    formatting = extract_pdf_formatting(file_path)
-    
-    with open(file_path, 'rb') as file:
-        pdf_reader = PyPDF2.PdfReader(file)
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-    
-    return text, formatting
+def extract_pdf_formatting(file_path: str, on_progress: Optional[Callable[[int, int], None]] = None) -> dict:
+    """Extract formatting information from a PDF file.
+
+    `on_progress(pages_done, total_pages)` is called after each page.
+    """
+    try:
+        extraction = extract_pdf(file_path, on_progress=on_progress)
+    except Exception as e:
+        print(f"Error extracting formatting: {str(e)}")
+        return build_pdf_formatting(PDFExtraction([]))
+    return build_pdf_formatting(extraction)
+
+def parse_pdf(file_path: Union[str, IO[bytes]], on_progress: Optional[Callable[[int, int], None]] = None) -> Tuple[str, dict]:
+    """Parse PDF and extract both text and formatting from a single pass over the file.
+
+    Parsing runs under CPU, memory and time limits; if a limit is hit, the
+    pages extracted so far are used.
+    """
+    extraction = extract_pdf_limited(file_path, on_progress=on_progress)
+    return extraction.text, build_pdf_formatting(extraction)
 
 def parse_docx(file_path: str) -> str:
     """Parse DOCX file and extract text"""
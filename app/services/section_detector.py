@@ -0,0 +1,169 @@
+import re
+import statistics
+from collections import Counter
+from typing import Dict, List, Optional
+
+# Known resume headings, grouped by the kind of section they introduce
+RESUME_HEADINGS = {
+    "contact": ["contact", "contact information", "personal information", "personal details"],
+    "summary": [
+        "summary",
+        "professional summary",
+        "profile",
+        "professional profile",
+        "about me",
+        "objective",
+        "career objective"
+    ],
+    "experience": [
+        "experience",
+        "work experience",
+        "professional experience",
+        "employment history",
+        "career history",
+        "work history",
+        "relevant experience"
+    ],
+    "education": ["education", "academic background", "education and training"],
+    "skills": [
+        "skills",
+        "technical skills",
+        "core competencies",
+        "key skills",
+        "proficiencies",
+        "capabilities",
+        "technologies"
+    ],
+    "projects": ["projects", "personal projects", "key projects"],
+    "certifications": ["certifications", "certificates", "licenses and certifications", "courses"],
+    "awards": ["awards", "honors", "honors and awards", "achievements"],
+    "other": [
+        "publications",
+        "languages",
+        "interests",
+        "hobbies",
+        "volunteer experience",
+        "volunteering",
+        "leadership",
+        "references",
+        "activities"
+    ]
+}
+
+_HEADING_LOOKUP = {heading: kind for kind, headings in RESUME_HEADINGS.items() for heading in headings}
+_NON_ALPHA = re.compile(r'[^a-z& ]+')
+
+# A line is a header when its score reaches HEADER_SCORE
+HEADER_SCORE = 0.5
+MAX_HEADER_WORDS = 5
+LINE_TOLERANCE = 2.0  # points; words whose tops differ by less share a line
+HEADER_FONT_SIZE = 14
+BODY_FONT_SIZE = 10
+
+def _normalize_heading(text: str) -> str:
+    return ' '.join(_NON_ALPHA.sub(' ', text.lower()).split()).replace('&', 'and')
+
+def group_lines(words: List[dict], page: int = 0) -> List[Dict]:
+    """Group pdfplumber words into text lines ordered top to bottom."""
+    lines = []
+    for word in sorted((w for w in words if w['text'].strip()), key=lambda w: (w['top'], w['x0'])):
+        if lines and abs(word['top'] - lines[-1]['top']) < LINE_TOLERANCE:
+            line = lines[-1]
+            line['words'].append(word)
+            line['bottom'] = max(line['bottom'], word['bottom'])
+        else:
+            lines.append({'page': page, 'top': word['top'], 'bottom': word['bottom'], 'words': [word]})
+
+    for line in lines:
+        line['words'].sort(key=lambda w: w['x0'])
+        line['text'] = ' '.join(w['text'].strip() for w in line['words'])
+        line['size'] = max(w['size'] for w in line['words'])
+    return lines
+
+def body_font_size(lines: List[Dict]) -> Optional[float]:
+    """Most common font size, weighted by the number of words set in it."""
+    sizes = Counter()
+    for line in lines:
+        sizes.update(round(w['size'], 1) for w in line['words'])
+    return sizes.most_common(1)[0][0] if sizes else None
+
+def _header_score(line: Dict, body_size: float, gap_above: float, typical_gap: float) -> float:
+    text = line['text'].strip()
+    words = text.split()
+    if not words or len(words) > MAX_HEADER_WORDS:
+        return 0.0
+
+    score = 0.0
+    if _normalize_heading(text) in _HEADING_LOOKUP:
+        score += 0.5
+    if body_size and line['size'] >= body_size * 1.1:
+        score += 0.3
+    letters = [c for c in text if c.isalpha()]
+    if len(letters) >= 3 and all(c.isupper() for c in letters):
+        score += 0.2
+    if text.endswith(':'):
+        score += 0.1
+    if typical_gap and gap_above > typical_gap * 1.5:
+        score += 0.1
+    return score
+
+def detect_sections(lines: List[Dict]) -> Dict:
+    """
+    Split resume lines into sections using font statistics.
+
+    A line is treated as a section header from its size relative to the body
+    font, capitalization, trailing colon, the vertical gap above it and
+    whether it matches a known resume heading. Returns the same structure as
+    the AI structure analysis ({"sections": [...], "structure_analysis": ...})
+    plus a `confidence` in [0, 1] reflecting how many headers were recognized.
+    """
+    body_size = body_font_size(lines)
+    gaps = [
+        curr['top'] - prev['bottom']
+        for prev, curr in zip(lines, lines[1:])
+        if curr['page'] == prev['page'] and curr['top'] > prev['bottom']
+    ]
+    typical_gap = statistics.median(gaps) if gaps else 0.0
+
+    sections = []
+    current = None
+    headers = 0
+    known_headers = 0
+    prev = None
+    for line in lines:
+        gap_above = line['top'] - prev['bottom'] if prev and prev['page'] == line['page'] else 0.0
+        prev = line
+        if _header_score(line, body_size, gap_above, typical_gap) >= HEADER_SCORE:
+            headers += 1
+            name = line['text'].strip().rstrip(':').strip()
+            if _normalize_heading(name) in _HEADING_LOOKUP:
+                known_headers += 1
+            size = round(line['size'] / body_size * BODY_FONT_SIZE, 1) if body_size else HEADER_FONT_SIZE
+            current = {
+                'name': name.title() if name.isupper() else name,
+                'content': [],
+                'formatting': {'is_header': True, 'suggested_font_size': max(size, HEADER_FONT_SIZE)}
+            }
+            sections.append(current)
+        else:
+            if current is None:
+                # Name and contact details usually precede the first heading
+                current = {
+                    'name': 'Contact Information',
+                    'content': [],
+                    'formatting': {'is_header': False, 'suggested_font_size': BODY_FONT_SIZE}
+                }
+                sections.append(current)
+            current['content'].append(line['text'])
+
+    if headers:
+        confidence = 0.5 * known_headers / headers + 0.5 * min(known_headers, 3) / 3
+    else:
+        confidence = 0.0
+
+    return {
+        'sections': sections,
+        'structure_analysis': {'section_order': [section['name'] for section in sections]},
+        'confidence': round(confidence, 2),
+        'source': 'font_statistics'
+    }
@@ -0,0 +1,135 @@
+import json
+from typing import Any, Callable, Optional
+
+class StreamParseError(ValueError):
+    """Raised when a streamed JSON document is malformed."""
+    pass
+
+_CLOSERS = {'}': '{', ']': '['}
+
+class IncrementalJSONParser:
+    """
+    Incremental parser for a streamed JSON object whose values are arrays.
+
+    Text is fed in arbitrary chunks as it arrives from the model. Any preamble
+    before the first '{' is ignored. Whenever an element of a top-level array
+    is complete it is decoded and passed to `on_item(key, item)`, so callers
+    can act on each entry long before the whole document has been generated.
+    Once the top-level object closes, `complete` becomes True and further
+    input is ignored. Mismatched brackets or undecodable elements raise
+    StreamParseError immediately.
+    """
+
+    def __init__(self, on_item: Optional[Callable[[str, Any], None]] = None):
+        self.on_item = on_item
+        self.text = []
+        self.complete = False
+        self._started = False
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._key_chars = []
+        self._last_string = None
+        self._current_key = None
+        self._array_key = None
+        self._item_start = None
+        self._item_chars = []
+
+    @property
+    def depth(self) -> int:
+        return len(self._stack)
+
+    @property
+    def _in_top_level_array(self) -> bool:
+        return len(self._stack) == 2 and self._stack[1] == '['
+
+    def feed(self, chunk: str):
+        """Consume the next piece of streamed text."""
+        for char in chunk:
+            if self.complete:
+                return
+            self._consume(char)
+            self._pos += 1
+
+    def result(self) -> Any:
+        """Decode the complete top-level object."""
+        if not self.complete:
+            raise StreamParseError("JSON object is incomplete")
+        return json.loads(''.join(self.text))
+
+    def _consume(self, char: str):
+        if not self._started:
+            if char != '{':
+                return
+            self._started = True
+
+        self.text.append(char)
+        if self._item_start is not None:
+            self._item_chars.append(char)
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == '\\':
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                self._end_string()
+            elif self.depth == 1:
+                self._key_chars.append(char)
+            return
+
+        if char == '"':
+            self._in_string = True
+            self._key_chars = []
+            if self._in_top_level_array and self._item_start is None:
+                self._start_item(char)
+        elif char in '{[':
+            if self._in_top_level_array and self._item_start is None:
+                self._start_item(char)
+            if char == '[' and self.depth == 1:
+                self._array_key = self._current_key
+            self._stack.append(char)
+        elif char in '}]':
+            if not self._stack or self._stack[-1] != _CLOSERS[char]:
+                raise StreamParseError(f"Unexpected '{char}' at position {self._pos}")
+            if self._in_top_level_array and self._item_start is not None:
+                # A bare scalar element is terminated by the closing bracket
+                self._item_chars.pop()
+                self._finish_item()
+            self._stack.pop()
+            if self._in_top_level_array and self._item_start is not None:
+                self._finish_item()
+            elif self.depth == 1:
+                self._array_key = None
+            elif self.depth == 0:
+                self.complete = True
+        elif char == ':' and self.depth == 1:
+            self._current_key = self._last_string
+        elif char == ',' and self._in_top_level_array and self._item_start is not None:
+            self._item_chars.pop()
+            self._finish_item()
+        elif not char.isspace() and char != ',' and self._in_top_level_array and self._item_start is None:
+            self._start_item(char)
+
+    def _end_string(self):
+        if self.depth == 1:
+            self._last_string = ''.join(self._key_chars)
+        elif self._in_top_level_array and self._item_start is not None:
+            self._finish_item()
+
+    def _start_item(self, char: str):
+        self._item_start = self._pos
+        self._item_chars = [char]
+
+    def _finish_item(self):
+        raw = ''.join(self._item_chars).strip()
+        self._item_start = None
+        self._item_chars = []
+        try:
+            item = json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise StreamParseError(f"Malformed entry in '{self._array_key}': {str(e)}")
+        if self.on_item and self._array_key is not None:
+            self.on_item(self._array_key, item)
@@ -0,0 +1,134 @@
+import json
+import logging
+import time
+from typing import Dict, Iterator, Optional
+
+import redis
+
+from app.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Events are published on a per-task channel and also appended to a short-lived
+# log so that a browser which connects late can replay what it missed.
+EVENT_LOG_TTL = 60 * 60  # 1 hour
+TERMINAL_EVENTS = ('result', 'error')
+
+def _channel(task_id: str) -> str:
+    return f"task-events:{task_id}"
+
+def _log_key(task_id: str) -> str:
+    return f"task-events:{task_id}:log"
+
+def _seq_key(task_id: str) -> str:
+    return f"task-events:{task_id}:seq"
+
+class TaskEventPublisher:
+    """
+    Publishes progress, token and result events for a Celery task over Redis pub/sub.
+
+    Tokens are buffered and flushed at most every `flush_interval` seconds so a
+    fast model does not turn into thousands of tiny Redis messages. Event ids
+    come from a per-task Redis counter, so they keep increasing when a task
+    is retried under the same id. Publishing failures are logged and never
+    interrupt the task.
+    """
+
+    def __init__(self, task_id: str, flush_interval: float = 0.1):
+        self.task_id = task_id
+        self.flush_interval = flush_interval
+        self._tokens = []
+        self._last_flush = time.monotonic()
+
+    def publish(self, event: str, data: Dict):
+        """Publish a single event to subscribers and the replay log."""
+        if not self.task_id:
+            return
+        try:
+            client = get_redis()
+            event_id = client.incr(_seq_key(self.task_id))
+            message = json.dumps({'id': event_id, 'event': event, 'data': data})
+            pipe = client.pipeline()
+            pipe.expire(_seq_key(self.task_id), EVENT_LOG_TTL)
+            pipe.rpush(_log_key(self.task_id), message)
+            pipe.expire(_log_key(self.task_id), EVENT_LOG_TTL)
+            pipe.publish(_channel(self.task_id), message)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Failed to publish {event} event for task {self.task_id}: {str(e)}")
+
+    def token(self, text: str):
+        """Buffer streamed model output, flushing it periodically."""
+        self._tokens.append(text)
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush_tokens()
+
+    def flush_tokens(self):
+        if self._tokens:
+            self.publish('token', {'text': ''.join(self._tokens)})
+            self._tokens = []
+        self._last_flush = time.monotonic()
+
+    def progress(self, status: str, current: int, total: int = 100, **extra):
+        self.flush_tokens()
+        self.publish('progress', {'status': status, 'current': current, 'total': total, **extra})
+
+    def item(self, field: str, item):
+        """Publish one completed analysis entry."""
+        self.flush_tokens()
+        self.publish('partial', {'field': field, 'item': item})
+
+    def result(self, payload: Dict):
+        self.flush_tokens()
+        self.publish('result', payload)
+
+    def error(self, error_info: Dict):
+        self.flush_tokens()
+        self.publish('error', error_info)
+
+def iter_task_events(task_id: str, last_event_id: int = 0, heartbeat: float = 15.0,
+                     max_duration: float = 25.0) -> Iterator[Optional[Dict]]:
+    """
+    Yield events for `task_id` after `last_event_id`, replaying any already
+    published, until a terminal ('result' or 'error') event arrives or
+    `max_duration` elapses. Streams are kept short on purpose: the client
+    reconnects with the id of the last event it received, so nothing is
+    missed or delivered to it twice.
+
+    Yields None every `heartbeat` seconds without traffic so callers can keep
+    idle connections alive.
+    """
+    client = get_redis()
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    # Subscribe before reading the log so no event can fall between the two
+    pubsub.subscribe(_channel(task_id))
+    last_id = last_event_id
+    deadline = time.monotonic() + max_duration
+    try:
+        for raw in client.lrange(_log_key(task_id), 0, -1):
+            event = json.loads(raw)
+            if event['id'] <= last_id:
+                continue
+            last_id = event['id']
+            yield event
+            if event['event'] in TERMINAL_EVENTS:
+                return
+
+        while time.monotonic() < deadline:
+            message = pubsub.get_message(timeout=min(heartbeat, max(deadline - time.monotonic(), 0)))
+            if message is None:
+                yield None
+                continue
+            event = json.loads(message['data'])
+            if event['id'] <= last_id:
+                continue
+            last_id = event['id']
+            yield event
+            if event['event'] in TERMINAL_EVENTS:
+                return
+    finally:
+        pubsub.close()
+
+def format_sse(event: Dict) -> str:
+    """Serialize an event in text/event-stream format."""
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
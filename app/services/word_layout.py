@@ -0,0 +1,148 @@
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; the array module fallback is used without it
+    np = None
+
+BASE_FONT_SIZE = 10
+MAX_LINE_SPACING = 10
+
+class WordLayout:
+    """
+    Column-oriented formatting data for every word of a document.
+
+    Instead of one dict per word, word texts are concatenated into a single
+    string addressed by an offsets column, and font size, top and bottom are
+    kept in parallel `array('d')` columns. Font sizes are normalized to the
+    page's most common size (scaled to BASE_FONT_SIZE), as in process_word.
+    `to_dict()` produces a compact JSON-friendly form for the session and
+    caches, and `from_dict()` reads it back.
+    """
+
+    def __init__(self):
+        self._text = []
+        self._length = 0
+        self.offsets = array('I', [0])
+        self.font_size = array('d')
+        self.top = array('d')
+        self.bottom = array('d')
+        self.is_header = array('b')
+
+    def __len__(self) -> int:
+        return len(self.font_size)
+
+    @property
+    def text(self) -> str:
+        if len(self._text) != 1:
+            self._text = [''.join(self._text)]
+        return self._text[0]
+
+    def word(self, index: int) -> str:
+        return self.text[self.offsets[index]:self.offsets[index + 1]]
+
+    def words(self) -> List[str]:
+        text, offsets = self.text, self.offsets
+        return [text[offsets[i]:offsets[i + 1]] for i in range(len(self))]
+
+    def append(self, text: str, font_size: float, top: float, bottom: float, is_header: bool = False):
+        self._text.append(text)
+        self._length += len(text)
+        self.offsets.append(self._length)
+        self.font_size.append(font_size)
+        self.top.append(top)
+        self.bottom.append(bottom)
+        self.is_header.append(1 if is_header else 0)
+
+    @classmethod
+    def from_pages(cls, pages: Iterable) -> 'WordLayout':
+        """Build the layout from PageLayout objects, normalizing sizes per page."""
+        layout = cls()
+        for page in pages:
+            base_size = page.base_font_size
+            for word in page.words:
+                size = round((word['size'] / base_size) * BASE_FONT_SIZE, 1) if base_size else BASE_FONT_SIZE
+                layout.append(word['text'].strip(), size, word['top'], word['bottom'])
+        return layout
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Yield per-word dicts in the legacy `formatting['sections']` shape."""
+        for i, text in enumerate(self.words()):
+            entry = {'text': text, 'font_size': self.font_size[i], 'top': self.top[i], 'bottom': self.bottom[i]}
+            if self.is_header[i]:
+                entry['is_header'] = True
+            yield entry
+
+    def size_counts(self) -> Counter:
+        return Counter(self.font_size)
+
+    def mark_headers(self, name: str, is_header: bool, suggested_size: float):
+        """Flag every word containing `name` and raise its size to at least `suggested_size`."""
+        needle = name.lower()
+        for i, text in enumerate(self.words()):
+            if needle in text.lower():
+                self.is_header[i] = 1 if is_header else 0
+                self.font_size[i] = max(self.font_size[i], suggested_size)
+
+    def line_spacing(self) -> Dict[str, float]:
+        """
+        Spacing after each word, keyed by word text: half the gap to the next
+        word down the page, capped at MAX_LINE_SPACING. Same result as
+        calculate_line_spacing, computed over the columns.
+        """
+        n = len(self)
+        if n < 2:
+            return {}
+        words = self.words()
+        if np is not None:
+            top = np.frombuffer(self.top, dtype=np.float64)
+            bottom = np.frombuffer(self.bottom, dtype=np.float64)
+            order = np.argsort(top, kind='stable')
+            gaps = top[order[1:]] - bottom[order[:-1]]
+            positive = np.nonzero(gaps > 0)[0]
+            values = np.minimum(gaps[positive] / 2, MAX_LINE_SPACING)
+            return {words[order[i]]: float(v) for i, v in zip(positive.tolist(), values.tolist())}
+
+        order = sorted(range(n), key=self.top.__getitem__)
+        spacing = {}
+        for curr, nxt in zip(order, order[1:]):
+            gap = self.top[nxt] - self.bottom[curr]
+            if gap > 0:
+                spacing[words[curr]] = min(gap / 2, MAX_LINE_SPACING)
+        return spacing
+
+    def to_dict(self) -> Dict:
+        return {
+            'format': 'columnar',
+            'text': self.text,
+            'offsets': self.offsets.tolist(),
+            'font_size': self.font_size.tolist(),
+            'top': [round(v, 2) for v in self.top],
+            'bottom': [round(v, 2) for v in self.bottom],
+            'headers': [i for i, flag in enumerate(self.is_header) if flag]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'WordLayout':
+        layout = cls()
+        layout._text = [data['text']]
+        layout._length = len(data['text'])
+        layout.offsets = array('I', data['offsets'])
+        layout.font_size = array('d', data['font_size'])
+        layout.top = array('d', data['top'])
+        layout.bottom = array('d', data['bottom'])
+        layout.is_header = array('b', bytes(len(layout.font_size)))
+        for i in data.get('headers', ()):
+            layout.is_header[i] = 1
+        return layout
+
+def load_word_layout(sections: Optional[Union[Dict, List[Dict]]]) -> WordLayout:
+    """Read `formatting['sections']` in either the columnar or the legacy per-word form."""
+    if isinstance(sections, dict) and sections.get('format') == 'columnar':
+        return WordLayout.from_dict(sections)
+    layout = WordLayout()
+    for word in sections or ():
+        layout.append(word['text'], word['font_size'], word['top'], word['bottom'], word.get('is_header', False))
+    return layout
@@ -40,12 +40,16 @@ document.addEventListener('DOMContentLoaded', function() {
                         body: JSON.stringify({ url })
                     });
 
-                    const data = await response.json();
+                    let data = await response.json();
                     
                     if (data.error) {
                         throw new Error(data.error);
                     }
 
+                    // Uncached pages are fetched by a worker; poll until it is done
+                    if (data.status_url) {
+                        data = await waitForJobDescription(data.status_url, response);
+                    }
                     jobDescription.value = data.description;
                     showNotification('Job description fetched successfully!', 'success');
                 } catch (error) {
@@ -93,6 +97,23 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
+    async function waitForJobDescription(statusUrl, response) {
+        while (true) {
+            const retryAfter = parseInt(response.headers.get('Retry-After'), 10);
+            const delay = Number.isFinite(retryAfter) && retryAfter > 0 ? retryAfter * 1000 : 1000;
+            await new Promise(resolve => setTimeout(resolve, delay));
+
+            response = await fetch(statusUrl, { headers: { 'Accept': 'application/json' } });
+            const data = await response.json();
+            if (data.error) {
+                throw new Error(data.error);
+            }
+            if (response.status !== 202) {
+                return data;
+            }
+        }
+    }
+
     // Notifications
     function showNotification(message, type = 'info') {
         const notification = document.createElement('div');
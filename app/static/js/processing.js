@@ -104,7 +104,11 @@ function handleStreamChunk(chunkData) {
             }
             
             window.fullAnalysis = chunkData.result;
-            showFinalResults();
+            if (typeof window.onAnalysisComplete === 'function') {
+                window.onAnalysisComplete(chunkData);
+            } else {
+                showFinalResults();
+            }
             return false;
         }
         
@@ -271,9 +275,34 @@ function formatErrorMessage(error) {
     return error.message || error.toString();
 }
 
+function pollDelay(response, fallback = 1000) {
+    // Honor the server's Retry-After (in seconds) when it suggests one
+    const retryAfter = parseInt(response.headers.get('Retry-After'), 10);
+    return Number.isFinite(retryAfter) && retryAfter > 0 ? retryAfter * 1000 : fallback;
+}
+
+function fetchTaskResult(resultUrl) {
+    fetch(resultUrl)
+        .then(response => {
+            if (!response.ok) {
+                return response.json().then(errorData => {
+                    throw new Error(errorData.error || 'Result not available');
+                });
+            }
+            return response.json();
+        })
+        .then(chunkData => handleStreamChunk(chunkData))
+        .catch(error => {
+            console.error('Error:', error);
+            showError('Connection Error', 'Failed to load analysis result', error.message);
+        });
+}
+
 function checkTaskStatus(taskId) {
+    let delay = 1000;
     fetch(`/analysis/status/${taskId}`)
         .then(response => {
+            delay = pollDelay(response, delay);
             if (!response.ok) {
                 return response.json().then(errorData => {
                     throw new Error(formatErrorMessage(errorData.error || errorData));
@@ -284,17 +313,9 @@ function checkTaskStatus(taskId) {
         .then(data => {
             console.debug('Status update:', data);
             
-            if (data.state === 'SUCCESS' && data.chunk) {
-                try {
-                    const chunkData = JSON.parse(data.chunk);
-                    if (!handleStreamChunk(chunkData)) {
-                        return; // Stop polling if handleStreamChunk returns false
-                    }
-                } catch (e) {
-                    console.error('JSON parse error:', e);
-                    showError('Error', 'Invalid response format received', e.toString());
-                    return; // Stop polling on error
-                }
+            if (data.state === 'SUCCESS' && data.result_url) {
+                // The status only points at the result; it is downloaded once
+                fetchTaskResult(data.result_url);
             }
             else if (data.state === 'FAILURE') {
                 const errorTitle = data.error?.exc_type || 'Analysis Error';
@@ -321,7 +342,7 @@ function checkTaskStatus(taskId) {
                         // Continue polling despite progress parse error
                     }
                 }
-                setTimeout(() => checkTaskStatus(taskId), 1000);
+                setTimeout(() => checkTaskStatus(taskId), delay);
             } else {
                 showError('Unexpected State', 'The analysis task entered an unexpected state', data.state);
             }
@@ -332,14 +353,107 @@ function checkTaskStatus(taskId) {
         });
 }
 
+function appendLiveOutput(text) {
+    const liveOutput = document.getElementById('live-output');
+    if (!liveOutput) return;
+    liveOutput.textContent += text;
+    liveOutput.scrollTop = liveOutput.scrollHeight;
+}
+
+function streamTaskStatus(taskId) {
+    // Fall back to polling in browsers without Server-Sent Events
+    if (!window.EventSource) {
+        checkTaskStatus(taskId);
+        return;
+    }
+
+    const source = new EventSource(`/analysis/stream/${taskId}`);
+    let finished = false;
+    let opened = false;
+    let lastEventId = 0;
+    const seenItems = new Set();
+
+    function isNewEvent(event) {
+        // Ignore anything already handled before a reconnect
+        const id = parseInt(event.lastEventId, 10);
+        if (!Number.isFinite(id)) return true;
+        if (id <= lastEventId) return false;
+        lastEventId = id;
+        return true;
+    }
+
+    source.addEventListener('open', () => {
+        opened = true;
+    });
+
+    source.addEventListener('progress', event => {
+        if (!isNewEvent(event)) return;
+        const data = JSON.parse(event.data);
+        document.getElementById('status').textContent = data.status;
+        const progressFill = document.querySelector('.progress-fill');
+        if (progressFill && data.total) {
+            progressFill.style.width = `${(data.current / data.total) * 100}%`;
+        }
+    });
+
+    source.addEventListener('token', event => {
+        if (!isNewEvent(event)) return;
+        appendLiveOutput(JSON.parse(event.data).text);
+    });
+
+    source.addEventListener('partial', event => {
+        if (!isNewEvent(event)) return;
+        const data = JSON.parse(event.data);
+        // A retried task publishes its entries again under new ids
+        const itemKey = `${data.field}:${JSON.stringify(data.item)}`;
+        if (seenItems.has(itemKey)) return;
+        seenItems.add(itemKey);
+        if (Array.isArray(window.fullAnalysis[data.field])) {
+            window.fullAnalysis[data.field].push(data.item);
+            updateProgressCounters();
+            const found = Object.values(window.fullAnalysis)
+                .reduce((total, items) => total + items.length, 0);
+            document.getElementById('status').textContent = `Analyzing... ${found} suggestions found`;
+        }
+    });
+
+    source.addEventListener('result', event => {
+        finished = true;
+        source.close();
+        handleStreamChunk(JSON.parse(event.data));
+    });
+
+    source.addEventListener('error', event => {
+        // Server-sent error events carry data; connection errors do not
+        if (event.data) {
+            finished = true;
+            source.close();
+            const error = JSON.parse(event.data);
+            showError(
+                error.exc_type || 'Analysis Error',
+                error.exc_message || 'Analysis failed',
+                error.exc_module ? `${error.exc_module}.${error.exc_cls}` : ''
+            );
+            return;
+        }
+        if (!finished && !opened) {
+            // The stream could not be opened at all; use status polling instead
+            source.close();
+            checkTaskStatus(taskId);
+        }
+        // Otherwise the server closed this stream's window: EventSource
+        // reconnects and the server replays the events missed meanwhile
+    });
+}
+
 // Initialize when the document is ready
 document.addEventListener('DOMContentLoaded', function() {
     // Get task ID from URL parameters first, fallback to template variable
     const urlParams = new URLSearchParams(window.location.search);
-    const taskId = urlParams.get('task_id');
+    const taskId = urlParams.get('task_id') || document.body.dataset.taskId;
     
     if (taskId) {
-        checkTaskStatus(taskId);
+        streamTaskStatus(taskId);
     } else {
         showError('Configuration Error', 'No task ID provided');
     }
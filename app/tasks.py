@@ -7,6 +7,18 @@ from dotenv import load_dotenv
 from celery.exceptions import SoftTimeLimitExceeded, TimeLimitExceeded
 import time
 from config.celery import CustomRedisBackend
+from app.services.task_events import TaskEventPublisher
+from config.settings import Config
+from app.utils.file_handling import parse_uploaded_file, open_stashed_upload, discard_stashed_upload, parse_cache
+from app.services.job_scraper import extract_job_description, normalize_job_url
+from app.services.batch_scraper import scrape_job_batch
+from app.utils.redis_client import get_redis
+import hashlib
+import logging
+import uuid
+import redis
+
+logger = logging.getLogger(__name__)
 
 load_dotenv()
 
@@ -24,16 +36,34 @@ celery.conf.update(
     result_serializer='json',
     accept_content=['json'],
     task_acks_late=True,      # Tasks are acknowledged after execution
-    task_reject_on_worker_lost=True  # Tasks are rejected if worker disconnects
+    task_reject_on_worker_lost=True,  # Tasks are rejected if worker disconnects
+    # Replace a worker child after a task that left it above the parsing memory cap
+    worker_max_memory_per_child=Config.PARSE_MAX_MEMORY_MB * 1024
 )
 
 class AnalysisError(Exception):
     """Custom exception for analysis errors"""
     pass
 
+def task_snapshot(task):
+    """
+    Read a task's state and info (progress meta, return value or exception)
+    from a single result-backend fetch. AsyncResult.state, .result and .info
+    each fetch the task meta again while the task is unfinished.
+    """
+    meta = task.backend.get_task_meta(task.id)
+    return meta['status'], meta['result']
+
 @celery.task(bind=True, max_retries=2)
-def analyze_resume_task(self, resume_text: str, job_description: str):
-    """Analyze and optimize resume against job description."""
+def analyze_resume_task(self, resume_text: str, job_description: str, use_cache: bool = True):
+    """Analyze and optimize resume against job description.
+
+    Repeat analyses of the same resume and job description are served from the
+    analysis cache without calling Ollama unless use_cache is False. Progress,
+    streamed model tokens, each completed analysis entry and the final result
+    are also published as task events for the /analysis/stream endpoint.
+    """
+    events = TaskEventPublisher(self.request.id)
     try:
         # Validate and normalize inputs
         if not resume_text or not isinstance(resume_text, str):
@@ -76,9 +106,28 @@ def analyze_resume_task(self, resume_text: str, job_description: str):
                 'start_time': time.time()
             }
         )
+        events.progress('Starting analysis...', 0)
+
+        # Publish each analysis entry as soon as the model has finished it
+        partial = {}
+
+        def publish_item(field, item):
+            partial.setdefault(field, []).append(item)
+            found = sum(len(items) for items in partial.values())
+            self.update_state(
+                state='PROGRESS',
+                meta={
+                    'status': f'Analyzing... {found} suggestions found',
+                    'current': min(10 + 2 * found, 45),
+                    'total': 100,
+                    'partial': partial
+                }
+            )
+            events.item(field, item)
         
         # Get analysis result
-        result = analyze_resume_for_job(resume_text, job_description)
+        result = analyze_resume_for_job(resume_text, job_description, use_cache=use_cache,
+                                        on_token=events.token, on_item=publish_item)
         
         # Validate result structure before proceeding
         if not result or not isinstance(result, dict):
@@ -111,6 +160,7 @@ def analyze_resume_task(self, resume_text: str, job_description: str):
                 'total': 100
             }
         )
+        events.progress('Applying optimizations...', 50)
 
         # Normalize resume text before optimization
         try:
@@ -139,6 +189,13 @@ def analyze_resume_task(self, resume_text: str, job_description: str):
             self.update_state(state='FAILURE', meta=error_info)
             raise
 
+        events.result({
+            'status': 'completed',
+            'result': result,
+            'optimized_text': optimized_text,
+            'original_text': resume_text
+        })
+
         # Return complete analysis results
         return {
             'status': 'completed',
@@ -155,6 +212,7 @@ def analyze_resume_task(self, resume_text: str, job_description: str):
             'exc_cls': 'SoftTimeLimitExceeded'
         }
         self.update_state(state='FAILURE', meta=error_info)
+        events.error(error_info)
         raise SoftTimeLimitExceeded(error_info['exc_message'])
         
     except Exception as e:
@@ -166,6 +224,174 @@ def analyze_resume_task(self, resume_text: str, job_description: str):
             'exc_cls': e.__class__.__name__
         }
         self.update_state(state='FAILURE', meta=error_info)
+        events.error(error_info)
         # Return the error info as a dict instead of raising
         # This should prevent the serialization issue
-        return error_info
\ No newline at end of file
+        return error_info
+
+# The parser stops itself at PARSE_TIMEOUT; the task limits only catch a parse stuck outside it
+@celery.task(bind=True, soft_time_limit=Config.PARSE_TIMEOUT + 30, time_limit=Config.PARSE_TIMEOUT + 60)
+def parse_document_task(self, upload_key: str, filename: str, cache_key: str = None):
+    """Parse an uploaded resume in the worker instead of the upload request.
+
+    The upload is read from its Redis stash (see stash_upload) and parsed in
+    memory. Reports page-by-page progress through the task state and task
+    events, and returns the session fields for the upload once the text has
+    been checked. Complete parses are stored in the parse cache under
+    `cache_key`; truncated ones are not. The stash is discarded whether or not parsing succeeds.
+    """
+    events = TaskEventPublisher(self.request.id)
+
+    def report(status: str, current: int):
+        self.update_state(state='PROGRESS', meta={'status': status, 'current': current, 'total': 100})
+        events.progress(status, current)
+
+    def report_pages(done: int, total: int):
+        report(f'Reading page {done} of {total}...', 10 + int(80 * done / total))
+
+    try:
+        report('Reading document...', 5)
+        with open_stashed_upload(upload_key) as upload:
+            text, formatting = parse_uploaded_file(upload, filename, on_progress=report_pages)
+
+        if not text or len(text.strip()) < 100:
+            error_info = {
+                'exc_type': 'ValueError',
+                'exc_message': 'The uploaded file contains insufficient text content. '
+                               'Please ensure your resume is complete.',
+                'exc_module': 'builtins',
+                'exc_cls': 'ValueError'
+            }
+            self.update_state(state='FAILURE', meta=error_info)
+            raise ValueError(error_info['exc_message'])
+
+        result = {
+            'status': 'completed',
+            'modified_text': text,
+            'original_file_type': os.path.splitext(filename)[1][1:],
+            'original_filename': filename,
+            'formatting': formatting if formatting else None,
+            'upload_timestamp': time.time()
+        }
+        # A parse cut short by the time or memory limit must not be served for later uploads
+        if cache_key and not (formatting or {}).get('truncated'):
+            parse_cache.set(cache_key, result)
+        events.result(result)
+        return result
+
+    except Exception as e:
+        error_info = {
+            'exc_type': type(e).__name__,
+            'exc_message': str(e),
+            'exc_module': e.__class__.__module__ or 'builtins',
+            'exc_cls': e.__class__.__name__
+        }
+        self.update_state(state='FAILURE', meta=error_info)
+        events.error(error_info)
+        raise
+
+    finally:
+        discard_stashed_upload(upload_key)
+
+def _scrape_inflight_key(url: str) -> str:
+    normalized = normalize_job_url(url)
+    return f"scrape:inflight:{hashlib.sha256(normalized.encode('utf-8')).hexdigest()}"
+
+@celery.task(bind=True, soft_time_limit=60, time_limit=90)
+def scrape_job_task(self, url: str):
+    """Fetch and extract a job description in the worker instead of the web request.
+
+    Scraping errors are stored as the task failure, with the ScrapingError
+    message as `exc_message`. The URL's in-flight marker (see
+    queue_job_scrape) is released when the task ends.
+    """
+    try:
+        self.update_state(state='PROGRESS', meta={'status': 'Fetching job posting...', 'current': 10, 'total': 100})
+        timings = {}
+        description = extract_job_description(url, timings=timings)
+        return {'status': 'completed', 'url': url, 'description': description, 'timings': timings}
+
+    except Exception as e:
+        error_info = {
+            'exc_type': type(e).__name__,
+            'exc_message': str(e),
+            'exc_module': e.__class__.__module__ or 'builtins',
+            'exc_cls': e.__class__.__name__
+        }
+        self.update_state(state='FAILURE', meta=error_info)
+        raise
+
+    finally:
+        try:
+            key = _scrape_inflight_key(url)
+            owner = get_redis().get(key)
+            if owner is not None and owner.decode() == self.request.id:
+                get_redis().delete(key)
+        except redis.RedisError as e:
+            logger.warning(f"Could not release in-flight scrape of {url}: {str(e)}")
+
+@celery.task(bind=True)
+def scrape_job_batch_task(self, urls: list):
+    """Fetch and extract many job descriptions concurrently (see batch_scraper).
+
+    Each URL's result is published as a 'partial' task event (field
+    'descriptions') as soon as it finishes, so /analysis/stream can show
+    postings while slower sites are still loading. Failed URLs are reported
+    in their result and do not fail the batch.
+    """
+    events = TaskEventPublisher(self.request.id)
+    done = []
+
+    def publish_result(result):
+        done.append(result)
+        self.update_state(state='PROGRESS', meta={
+            'status': f'Fetched {len(done)} of {len(urls)} job postings...',
+            'current': len(done),
+            'total': len(urls)
+        })
+        events.item('descriptions', result)
+
+    try:
+        events.progress('Fetching job postings...', 0, len(urls))
+        results = scrape_job_batch(urls, on_result=publish_result)
+        payload = {
+            'status': 'completed',
+            'results': results,
+            'completed': sum(1 for result in results if result['status'] == 'completed'),
+            'failed': sum(1 for result in results if result['status'] == 'failed')
+        }
+        events.result(payload)
+        return payload
+
+    except Exception as e:
+        error_info = {
+            'exc_type': type(e).__name__,
+            'exc_message': str(e),
+            'exc_module': e.__class__.__module__ or 'builtins',
+            'exc_cls': e.__class__.__name__
+        }
+        self.update_state(state='FAILURE', meta=error_info)
+        events.error(error_info)
+        raise
+
+def queue_job_scrape(url: str) -> str:
+    """Start scraping `url` and return the task id.
+
+    While a scrape of the same URL is still running, its task id is returned
+    instead of starting another fetch, so concurrent requests share one. The
+    in-flight marker expires after SCRAPE_INFLIGHT_TTL seconds in case a
+    worker dies without releasing it. Without Redis every call gets its own task.
+    """
+    key = _scrape_inflight_key(url)
+    task_id = str(uuid.uuid4())
+    try:
+        client = get_redis()
+        if not client.set(key, task_id, nx=True, ex=Config.SCRAPE_INFLIGHT_TTL):
+            existing = client.get(key)
+            if existing is not None:
+                return existing.decode()
+            client.set(key, task_id, ex=Config.SCRAPE_INFLIGHT_TTL)
+    except redis.RedisError as e:
+        logger.warning(f"In-flight scrape dedupe unavailable: {str(e)}")
+    scrape_job_task.apply_async(args=[url], task_id=task_id)
+    return task_id
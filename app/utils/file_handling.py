@@ -1,34 +1,104 @@
+import hashlib
 import os
-import pdfplumber
+import uuid
+from tempfile import SpooledTemporaryFile
+from typing import IO, Union
+
 from docx import Document
 from flask import current_app as app
 from werkzeug.utils import secure_filename
 
-from app.services.resume_parser import extract_pdf_formatting
+from app.services.result_cache import ResultCache
+from app.services.resume_parser import parse_pdf
+from app.utils.redis_client import get_redis
+from config.settings import Config
+
+# Bump whenever parsing output changes so stale cached parses are not reused
+PARSE_VERSION = "4"
+
+parse_cache = ResultCache(
+    'parse',
+    ttl=Config.PARSE_CACHE_TTL,
+    max_entries=Config.PARSE_CACHE_MAX_ENTRIES,
+    enabled=Config.PARSE_CACHE_ENABLED
+)
+
+def upload_cache_key(file) -> str:
+    """Hash the upload's bytes (and extension) into a parse cache key, leaving the stream rewound."""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file.stream.read(64 * 1024), b''):
+        digest.update(chunk)
+    file.stream.seek(0)
+    ext = os.path.splitext(file.filename)[1][1:].lower()
+    return parse_cache.make_key(digest.hexdigest(), ext, PARSE_VERSION)
 
 def save_uploaded_file(file) -> tuple:
-    """Save uploaded file to instance folder"""
+    """Save uploaded file to instance folder under a unique name"""
     filename = secure_filename(file.filename)
     upload_folder = os.path.join(app.instance_path, 'uploads')
     os.makedirs(upload_folder, exist_ok=True)
-    file_path = os.path.join(upload_folder, filename)
+    file_path = os.path.join(upload_folder, f"{uuid.uuid4().hex}-{filename}")
     file.save(file_path)
     return filename, file_path
 
-def parse_uploaded_file(file_path: str, filename: str) -> tuple:
-    """Parse file based on its extension"""
+class UploadTooLarge(ValueError):
+    """The upload is larger than UPLOAD_STASH_MAX_SIZE and is not handed to the worker."""
+    pass
+
+def stash_upload(file) -> str:
+    """
+    Hand the upload's bytes to the worker through Redis; returns the stash key.
+
+    The bytes live in Redis memory, alongside sessions and caches, until the
+    worker discards them, so uploads over UPLOAD_STASH_MAX_SIZE raise
+    UploadTooLarge instead.
+    """
+    data = file.stream.read(Config.UPLOAD_STASH_MAX_SIZE + 1)
+    file.stream.seek(0)
+    if len(data) > Config.UPLOAD_STASH_MAX_SIZE:
+        raise UploadTooLarge(f"Upload exceeds {Config.UPLOAD_STASH_MAX_SIZE} bytes")
+    key = f"upload:{uuid.uuid4().hex}"
+    get_redis().set(key, data, ex=Config.UPLOAD_STASH_TTL)
+    return key
+
+def open_stashed_upload(key: str) -> SpooledTemporaryFile:
+    """
+    Load a stashed upload into a spooled file.
+
+    The bytes stay in memory unless they exceed UPLOAD_SPOOL_MAX_SIZE, in
+    which case they spill to an anonymous temporary file.
+    """
+    data = get_redis().get(key)
+    if data is None:
+        raise ValueError("The uploaded file has expired. Please upload it again.")
+    spool = SpooledTemporaryFile(max_size=Config.UPLOAD_SPOOL_MAX_SIZE)
+    spool.write(data)
+    spool.seek(0)
+    return spool
+
+def discard_stashed_upload(key: str):
+    """Remove a stashed upload; it also expires on its own after UPLOAD_STASH_TTL."""
+    get_redis().delete(key)
+
+def parse_uploaded_file(source: Union[str, IO[bytes]], filename: str, on_progress=None) -> tuple:
+    """Parse file based on its extension.
+
+    `source` is a path or a binary file object such as the upload stream or a
+    SpooledTemporaryFile. `on_progress(pages_done, total_pages)` is passed
+    through to PDF parsing.
+    """
     ext = os.path.splitext(filename)[1][1:].lower()
     
     if ext == 'pdf':
-        with pdfplumber.open(file_path) as pdf:
-            text = "\n".join(page.extract_text() for page in pdf.pages)
-        return text, extract_pdf_formatting(file_path)
+        return parse_pdf(source, on_progress=on_progress)
     elif ext == 'docx':
-        doc = Document(file_path)
+        doc = Document(source)
         return "\n".join(para.text for para in doc.paragraphs), None
     elif ext == 'txt':
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read(), None
+        if isinstance(source, str):
+            with open(source, 'r', encoding='utf-8') as f:
+                return f.read(), None
+        return source.read().decode('utf-8'), None
     else:
         raise ValueError("Unsupported file type")
 
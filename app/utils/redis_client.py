@@ -0,0 +1,18 @@
+import redis
+
+from config.settings import Config
+
+_clients = {}
+
+def get_redis(url: str = None) -> redis.Redis:
+    """Return a shared Redis client for the given URL (defaults to Config.REDIS_URL).
+
+    Clients are created lazily and reused; redis-py resets its connection pool
+    automatically after a fork, so this is safe to use from Celery workers.
+    """
+    url = url or Config.REDIS_URL
+    client = _clients.get(url)
+    if client is None:
+        client = redis.Redis.from_url(url, socket_connect_timeout=2)
+        _clients[url] = client
+    return client
@@ -1,4 +1,3 @@
-# config/settings.py
 import os
 
 class Config:
@@ -7,4 +6,94 @@ class Config:
     UPLOAD_FOLDER = os.path.join('instance', 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
     CELERY_BROKER_URL = 'redis://localhost:6379/0'
-    CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
\ No newline at end of file
+    CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
+    REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+
+    # Session storage: 'filesystem' (single node) or 'redis' (shared by every web node).
+    # In redis mode bulky values live in the artifact store and the session holds their ids
+    SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'filesystem').lower()
+    SESSION_REDIS_URL = os.environ.get('SESSION_REDIS_URL', REDIS_URL)
+    ARTIFACT_TTL = int(os.environ.get('ARTIFACT_TTL', 24 * 60 * 60))  # seconds since last use
+
+    # Ollama model settings
+    OLLAMA_MODEL = os.environ.get('OLLAMA_MODEL', 'mistral')
+    OLLAMA_HOST = os.environ.get('OLLAMA_HOST', 'http://localhost:11434')
+    OLLAMA_CONNECT_TIMEOUT = float(os.environ.get('OLLAMA_CONNECT_TIMEOUT', 5))
+    OLLAMA_READ_TIMEOUT = float(os.environ.get('OLLAMA_READ_TIMEOUT', 120))  # max wait between streamed chunks
+    OLLAMA_MAX_CONNECTIONS = int(os.environ.get('OLLAMA_MAX_CONNECTIONS', 10))
+    OLLAMA_KEEPALIVE_EXPIRY = float(os.environ.get('OLLAMA_KEEPALIVE_EXPIRY', 300))  # idle HTTP connection lifetime
+    OLLAMA_KEEP_ALIVE = os.environ.get('OLLAMA_KEEP_ALIVE', '30m')  # how long Ollama keeps the model loaded
+    OLLAMA_NUM_PREDICT_BASE = int(os.environ.get('OLLAMA_NUM_PREDICT_BASE', 768))
+    OLLAMA_NUM_PREDICT_MAX = int(os.environ.get('OLLAMA_NUM_PREDICT_MAX', 2048))
+    # Structure analysis echoes the resume text back, so it needs a larger budget
+    OLLAMA_STRUCTURE_NUM_PREDICT = int(os.environ.get('OLLAMA_STRUCTURE_NUM_PREDICT', 4096))
+    OLLAMA_REPAIR_NUM_PREDICT = int(os.environ.get('OLLAMA_REPAIR_NUM_PREDICT', 512))
+    # Structured output for analysis requests: 'schema' (JSON schema), 'json' or 'off'
+    OLLAMA_STRUCTURED_OUTPUT = os.environ.get('OLLAMA_STRUCTURED_OUTPUT', 'schema').lower()
+
+    # Task status polling: suggested Retry-After (seconds) and browser cache lifetime of final results
+    STATUS_POLL_INTERVAL = int(os.environ.get('STATUS_POLL_INTERVAL', 1))
+    TASK_RESULT_MAX_AGE = int(os.environ.get('TASK_RESULT_MAX_AGE', 60 * 60))
+    # Seconds an event stream stays open before the browser has to reconnect,
+    # so a sync web worker is never held for a task's whole run
+    EVENT_STREAM_WINDOW = int(os.environ.get('EVENT_STREAM_WINDOW', 25))
+
+    # Generations per analysis; invalid entries abort all but the last, which repairs them
+    ANALYSIS_ATTEMPTS = int(os.environ.get('ANALYSIS_ATTEMPTS', 2))
+
+    # Per-list entry limits for resume analysis
+    ANALYSIS_MAX_MISSING_SKILLS = int(os.environ.get('ANALYSIS_MAX_MISSING_SKILLS', 8))
+    ANALYSIS_MAX_IMPROVEMENTS = int(os.environ.get('ANALYSIS_MAX_IMPROVEMENTS', 6))
+    ANALYSIS_MAX_EMPHASIS = int(os.environ.get('ANALYSIS_MAX_EMPHASIS', 5))
+    ANALYSIS_MAX_GENERAL = int(os.environ.get('ANALYSIS_MAX_GENERAL', 5))
+
+    # Analysis result cache
+    ANALYSIS_CACHE_ENABLED = os.environ.get('ANALYSIS_CACHE_ENABLED', 'true').lower() == 'true'
+    ANALYSIS_CACHE_TTL = int(os.environ.get('ANALYSIS_CACHE_TTL', 7 * 24 * 60 * 60))  # 7 days
+    ANALYSIS_CACHE_MAX_ENTRIES = int(os.environ.get('ANALYSIS_CACHE_MAX_ENTRIES', 5000))
+
+    # Uploads are handed to the parsing worker through Redis rather than the filesystem
+    UPLOAD_STASH_TTL = int(os.environ.get('UPLOAD_STASH_TTL', 15 * 60))  # seconds
+    # Each queued upload holds its bytes in Redis memory; larger files are refused with 413
+    UPLOAD_STASH_MAX_SIZE = int(os.environ.get('UPLOAD_STASH_MAX_SIZE', 5 * 1024 * 1024))
+    UPLOAD_SPOOL_MAX_SIZE = int(os.environ.get('UPLOAD_SPOOL_MAX_SIZE', 4 * 1024 * 1024))  # spill to disk above 4MB
+
+    # Per-document PDF parsing limits, applied inside the Celery worker
+    PARSE_CPU_SECONDS = float(os.environ.get('PARSE_CPU_SECONDS', 30))  # CPU budget per document
+    PARSE_MAX_MEMORY_MB = int(os.environ.get('PARSE_MAX_MEMORY_MB', 1024))  # memory growth allowed while parsing
+    PARSE_TIMEOUT = float(os.environ.get('PARSE_TIMEOUT', 60))  # wall-clock budget per document
+
+    # Parse result cache, keyed by the SHA-256 of the uploaded file
+    PARSE_CACHE_ENABLED = os.environ.get('PARSE_CACHE_ENABLED', 'true').lower() == 'true'
+    PARSE_CACHE_TTL = int(os.environ.get('PARSE_CACHE_TTL', 30 * 24 * 60 * 60))  # 30 days
+    PARSE_CACHE_MAX_ENTRIES = int(os.environ.get('PARSE_CACHE_MAX_ENTRIES', 2000))
+
+    # Job scraping runs in Celery; concurrent requests for a URL share the running task
+    SCRAPE_INFLIGHT_TTL = int(os.environ.get('SCRAPE_INFLIGHT_TTL', 90))  # seconds
+
+    # Job scraper HTTP client: pooled keep-alive connections per host and retries on 429/5xx
+    SCRAPE_CONNECT_TIMEOUT = float(os.environ.get('SCRAPE_CONNECT_TIMEOUT', 5))
+    SCRAPE_READ_TIMEOUT = float(os.environ.get('SCRAPE_READ_TIMEOUT', 15))
+    SCRAPE_MAX_RETRIES = int(os.environ.get('SCRAPE_MAX_RETRIES', 3))
+    SCRAPE_BACKOFF_FACTOR = float(os.environ.get('SCRAPE_BACKOFF_FACTOR', 0.5))
+    SCRAPE_MAX_RETRY_AFTER = float(os.environ.get('SCRAPE_MAX_RETRY_AFTER', 10))  # seconds
+    SCRAPE_POOL_HOSTS = int(os.environ.get('SCRAPE_POOL_HOSTS', 20))  # hosts with pooled connections
+    SCRAPE_POOL_SIZE = int(os.environ.get('SCRAPE_POOL_SIZE', 10))  # kept-alive connections per host
+
+    # Batch scraping: concurrent async fetches, limited overall and per job board
+    SCRAPE_BATCH_MAX_URLS = int(os.environ.get('SCRAPE_BATCH_MAX_URLS', 50))
+    SCRAPE_BATCH_CONCURRENCY = int(os.environ.get('SCRAPE_BATCH_CONCURRENCY', 10))  # fetches in flight
+    SCRAPE_BATCH_PER_HOST = int(os.environ.get('SCRAPE_BATCH_PER_HOST', 2))  # fetches in flight per host
+    SCRAPE_BATCH_HOST_DELAY = float(os.environ.get('SCRAPE_BATCH_HOST_DELAY', 0.25))  # seconds between requests to a host
+    SCRAPE_BATCH_PARSE_WORKERS = int(os.environ.get('SCRAPE_BATCH_PARSE_WORKERS', 4))  # extraction threads
+
+    # Scraped job descriptions, keyed by normalized URL and revalidated with conditional requests
+    SCRAPE_CACHE_ENABLED = os.environ.get('SCRAPE_CACHE_ENABLED', 'true').lower() == 'true'
+    SCRAPE_CACHE_FRESH_TTL = int(os.environ.get('SCRAPE_CACHE_FRESH_TTL', 60 * 60))  # served without a request
+    SCRAPE_CACHE_MAX_STALE = int(os.environ.get('SCRAPE_CACHE_MAX_STALE', 24 * 60 * 60))  # served while revalidating
+    SCRAPE_CACHE_TTL = int(os.environ.get('SCRAPE_CACHE_TTL', 7 * 24 * 60 * 60))  # kept for revalidation
+    SCRAPE_CACHE_MAX_ENTRIES = int(os.environ.get('SCRAPE_CACHE_MAX_ENTRIES', 5000))
+
+    # Section detection at upload: the LLM is only consulted for low-confidence documents when enabled
+    SECTION_LLM_FALLBACK = os.environ.get('SECTION_LLM_FALLBACK', 'false').lower() == 'true'
+    SECTION_CONFIDENCE_THRESHOLD = float(os.environ.get('SECTION_CONFIDENCE_THRESHOLD', 0.6))
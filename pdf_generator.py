@@ -8,6 +8,7 @@ from reportlab.platypus import Paragraph, SimpleDocTemplate
 from reportlab.lib.utils import simpleSplit
 import io
 from typing import Dict, Tuple, BinaryIO
+from app.services.word_layout import load_word_layout
 
 def apply_text_formatting(text: str, format_info: dict) -> tuple:
     """Apply formatting to text and return font settings."""
@@ -75,7 +76,7 @@ def create_formatted_pdf(text: str, formatting: dict = None) -> Tuple[BinaryIO,
         
         # Create formatting map with AI insights
         text_format_map = {}
-        for section in formatting['sections']:
+        for section in load_word_layout(formatting['sections']):
             ai_section = next(
                 (s for s in section_analysis.get('sections', []) 
                  if s['name'].lower() in section['text'].lower()),
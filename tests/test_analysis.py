@@ -1,15 +1,25 @@
+import gzip
+import io
 import unittest
 from flask import Flask, session, jsonify
 from app.routes.analysis import analysis_bp
 from app.routes.main import main_bp
-from app.tasks import analyze_resume_task, celery  # Import celery
+from app.tasks import analyze_resume_task, queue_job_scrape, celery  # Import celery
 from unittest.mock import patch, MagicMock
 import os
 import json
 from app import create_app
 from datetime import datetime
 from config.testing import TestConfig
+from config.settings import Config
 from celery.exceptions import TimeoutError
+from tests.test_result_cache import FakeRedis
+
+def task_result(state, info=None):
+    """AsyncResult stand-in whose backend reports `state` and `info` in one meta read."""
+    task = MagicMock()
+    task.backend.get_task_meta.return_value = {'status': state, 'result': info}
+    return task
 
 class AnalysisTestCase(unittest.TestCase):
     @classmethod
@@ -106,29 +116,62 @@ class AnalysisTestCase(unittest.TestCase):
     @patch('app.routes.analysis.celery.AsyncResult')
     def test_get_task_status_success(self, mock_async_result):
         """Test getting the status of a successful task."""
-        mock_task = MagicMock()
-        mock_task.state = 'SUCCESS'
-        mock_task.info = None
-        mock_task.result = {'result': {'key': 'value'}}
-        mock_task.backend = None
-        mock_async_result.return_value = mock_task
+        mock_async_result.return_value = task_result(
+            'SUCCESS', {'status': 'completed', 'analysis': {'key': 'value'}, 'optimized_text': 'optimized'}
+        )
 
         response = self.client.get('/analysis/status/test_task_id')
         json_data = response.get_json()
 
         self.assertEqual(response.status_code, 200)
         self.assertEqual(json_data['state'], 'SUCCESS')
-        chunk_data = json.loads(json_data['chunk'])
+        self.assertNotIn('chunk', json_data)
+
+        result = self.client.get(json_data['result_url'])
+        chunk_data = result.get_json()
+        self.assertEqual(result.status_code, 200)
         self.assertEqual(chunk_data['status'], 'completed')
         self.assertIn('key', chunk_data['result'])
 
+    @patch('app.routes.analysis.celery.AsyncResult')
+    def test_unchanged_status_is_not_modified(self, mock_async_result):
+        """Test that polling an unchanged task returns 304 with a Retry-After hint"""
+        mock_async_result.return_value = task_result('PROGRESS', {'status': 'Analyzing...', 'current': 20, 'total': 100})
+
+        first = self.client.get('/analysis/status/test_task_id')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.headers['Retry-After'], '1')
+        mock_async_result.return_value.backend.get_task_meta.assert_called_once()
+
+        second = self.client.get('/analysis/status/test_task_id', headers={'If-None-Match': first.headers['ETag']})
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.get_data(), b'')
+        self.assertEqual(second.headers['Retry-After'], '1')
+
+        mock_async_result.return_value = task_result('PROGRESS', {'status': 'Analyzing...', 'current': 40, 'total': 100})
+        third = self.client.get('/analysis/status/test_task_id', headers={'If-None-Match': first.headers['ETag']})
+        self.assertEqual(third.status_code, 200)
+
+    @patch('app.routes.analysis.celery.AsyncResult')
+    def test_task_result_is_gzipped_and_cacheable(self, mock_async_result):
+        """Test that the final result is compressed and revalidated by task id"""
+        analysis = {'general_suggestions': ['Quantify achievements'] * 50}
+        mock_async_result.return_value = task_result('SUCCESS', {'status': 'completed', 'analysis': analysis})
+
+        response = self.client.get('/analysis/result/test_task_id', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.get_data()))['result'], analysis)
+
+        cached = self.client.get('/analysis/result/test_task_id', headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(cached.status_code, 304)
+
+        mock_async_result.return_value = task_result('PROGRESS', {})
+        self.assertEqual(self.client.get('/analysis/result/other_task').status_code, 404)
+
     @patch('app.routes.analysis.analyze_resume_task.AsyncResult')
     def test_get_task_status_pending(self, mock_async_result):
         """Test getting the status of a pending task."""
-        mock_task = MagicMock()
-        mock_task.state = 'PENDING'
-        mock_task.info = {'status': 'Task is pending...'}
-        mock_async_result.return_value = mock_task
+        mock_async_result.return_value = task_result('PENDING', {'status': 'Task is pending...'})
 
         response = self.client.get('/analysis/status/test_task_id')
 
@@ -140,11 +183,7 @@ class AnalysisTestCase(unittest.TestCase):
     def test_get_task_status_failure(self, mock_async_result):
         """Test getting the status of a failed task."""
         error_message = 'Task failed'
-        mock_task = MagicMock()
-        mock_task.state = 'FAILURE'
-        mock_task.info = error_message
-        mock_task.backend = None
-        mock_async_result.return_value = mock_task
+        mock_async_result.return_value = task_result('FAILURE', error_message)
 
         response = self.client.get('/analysis/status/test_task_id')
         json_data = response.get_json()
@@ -153,23 +192,118 @@ class AnalysisTestCase(unittest.TestCase):
         self.assertEqual(json_data['state'], 'FAILURE')
         self.assertEqual(json_data['status'], error_message)
 
-    def test_fetch_job_description_valid(self):
+    @patch('app.routes.analysis.queue_job_scrape', return_value='scrape_task_id')
+    def test_fetch_job_description_valid(self, mock_queue):
         """Test fetch_job_description with valid URL."""
-        with patch('app.routes.analysis.extract_job_description') as mock_extract:
-            mock_extract.return_value = 'Sample job description'
-            response = self.client.post('/analysis/fetch_job_description', json={'url': 'http://example.com'}, headers={'Accept': 'application/json'})
+        response = self.client.post('/analysis/fetch_job_description', json={'url': 'http://example.com'}, headers={'Accept': 'application/json'})
 
-            self.assertEqual(response.status_code, 200)
-            self.assertEqual(response.get_json()['description'], 'Sample job description')
+        self.assertEqual(response.status_code, 202)
+        mock_queue.assert_called_once_with('http://example.com')
+        status_url = response.get_json()['status_url']
+
+        with patch('app.routes.analysis.celery.AsyncResult') as mock_async_result:
+            mock_async_result.return_value = task_result('PROGRESS', {})
+            pending = self.client.get(status_url)
+            self.assertEqual(pending.status_code, 202)
+            self.assertIn('Retry-After', pending.headers)
+
+            mock_async_result.return_value = task_result('SUCCESS', {'description': 'Sample job description'})
+            done = self.client.get(status_url)
+
+        self.assertEqual(done.status_code, 200)
+        self.assertEqual(done.get_json()['description'], 'Sample job description')
 
     def test_fetch_job_description_invalid_url(self):
         """Test fetch_job_description with invalid URL."""
-        with patch('app.routes.analysis.extract_job_description') as mock_extract:
-            mock_extract.side_effect = Exception('Failed to fetch')
+        with patch('app.routes.analysis.queue_job_scrape') as mock_queue:
             response = self.client.post('/analysis/fetch_job_description', json={'url': 'invalid_url'}, headers={'Accept': 'application/json'})
 
-            self.assertEqual(response.status_code, 500)
-            self.assertEqual(response.get_json()['error'], 'Failed to fetch job description')
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.get_json()['error'], 'Invalid URL format')
+            mock_queue.assert_not_called()
+
+    @patch('app.routes.analysis.queue_job_scrape')
+    def test_cached_job_description_is_served_immediately(self, mock_queue):
+        """Test that cached postings skip the worker, and stale ones are revalidated behind the response"""
+        with patch('app.routes.analysis.cached_job_description', return_value=('Cached description', False)):
+            response = self.client.post('/analysis/fetch_job_description', json={'url': 'http://example.com/job'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['description'], 'Cached description')
+        mock_queue.assert_not_called()
+
+        with patch('app.routes.analysis.cached_job_description', return_value=('Cached description', True)):
+            response = self.client.post('/analysis/fetch_job_description', json={'url': 'http://example.com/job'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get_json()['stale'])
+        mock_queue.assert_called_once_with('http://example.com/job')
+
+    @patch('app.routes.analysis.celery.AsyncResult')
+    def test_fetch_job_description_failure(self, mock_async_result):
+        """Test that scraping errors reach the user and other failures stay generic"""
+        mock_async_result.return_value = task_result('FAILURE', {
+            'exc_type': 'ScrapingError',
+            'exc_message': 'Job posting not found. The link might be expired or invalid.'
+        })
+        response = self.client.get('/analysis/fetch_job_description/scrape_task_id')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Job posting not found', response.get_json()['error'])
+
+        mock_async_result.return_value = task_result('FAILURE', Exception('Failed to fetch'))
+        response = self.client.get('/analysis/fetch_job_description/scrape_task_id')
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.get_json()['error'], 'Failed to fetch job description')
+
+    @patch('app.tasks.scrape_job_task.apply_async')
+    def test_concurrent_fetches_share_one_task(self, mock_apply_async):
+        """Test that a URL already being scraped is not fetched again"""
+        fake_redis = FakeRedis()
+        with patch('app.tasks.get_redis', return_value=fake_redis):
+            first = queue_job_scrape('https://example.com/job')
+            second = queue_job_scrape('https://example.com/job')
+            other = queue_job_scrape('https://example.com/other-job')
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(mock_apply_async.call_count, 2)
+
+    @patch('app.routes.analysis.scrape_job_batch_task.delay')
+    def test_fetch_job_descriptions_batch(self, mock_delay):
+        """Test that a pasted list of postings is deduplicated and fetched as one batch"""
+        mock_delay.return_value = MagicMock(id='batch_task_id')
+        response = self.client.post('/analysis/fetch_job_descriptions', json={
+            'urls': 'https://example.com/job/1\nhttps://example.com/job/1?utm_source=email\n\nhttps://example.com/job/2'
+        })
+        self.assertEqual(response.status_code, 202)
+        data = response.get_json()
+        mock_delay.assert_called_once_with(['https://example.com/job/1', 'https://example.com/job/2'])
+        self.assertEqual(data['stream_url'], '/analysis/stream/batch_task_id')
+
+        results = [{'url': 'https://example.com/job/1', 'status': 'completed', 'description': 'Job one'}]
+        with patch('app.routes.analysis.celery.AsyncResult') as mock_async_result:
+            mock_async_result.return_value = task_result('PROGRESS', {'current': 1, 'total': 2})
+            pending = self.client.get(data['status_url'])
+            self.assertEqual(pending.status_code, 202)
+            self.assertEqual(pending.get_json()['current'], 1)
+
+            mock_async_result.return_value = task_result('SUCCESS', {'status': 'completed', 'results': results})
+            done = self.client.get(data['status_url'])
+        self.assertEqual(done.status_code, 200)
+        self.assertEqual(done.get_json()['results'], results)
+
+    @patch('app.routes.analysis.scrape_job_batch_task.delay')
+    def test_fetch_job_descriptions_limits(self, mock_delay):
+        """Test that empty, malformed and oversized batches are rejected"""
+        response = self.client.post('/analysis/fetch_job_descriptions', json={'urls': []})
+        self.assertEqual(response.status_code, 400)
+
+        for urls in (['https://example.com/job/1', None], ['https://example.com/job/1', 42], ['  ']):
+            response = self.client.post('/analysis/fetch_job_descriptions', json={'urls': urls})
+            self.assertEqual(response.status_code, 400)
+
+        urls = [f'https://example.com/job/{n}' for n in range(Config.SCRAPE_BATCH_MAX_URLS + 1)]
+        response = self.client.post('/analysis/fetch_job_descriptions', json={'urls': urls})
+        self.assertEqual(response.status_code, 400)
+        mock_delay.assert_not_called()
 
     def test_fetch_job_description_no_url(self):
         """Test fetch_job_description with no URL provided."""
@@ -239,11 +373,14 @@ class AnalysisTestCase(unittest.TestCase):
         test_url = "https://example.com/job"
         test_description = "Test job description"
         
-        with patch('app.routes.analysis.extract_job_description', return_value=test_description):
-            response = self.client.post(
+        with patch('app.routes.analysis.queue_job_scrape', return_value='scrape_task_id'), \
+                patch('app.routes.analysis.celery.AsyncResult') as mock_async_result:
+            mock_async_result.return_value = task_result('SUCCESS', {'description': test_description})
+            queued = self.client.post(
                 '/analysis/fetch_job_description',
                 json={'url': test_url}
             )
+            response = self.client.get(queued.get_json()['status_url'])
             
             data = json.loads(response.data)
             self.assertEqual(response.status_code, 200)
@@ -269,14 +406,13 @@ class AnalysisTestCase(unittest.TestCase):
         
         with patch('app.routes.analysis.celery.AsyncResult') as mock_result:
             # Test pending state
-            mock_result.return_value.state = 'PENDING'
+            mock_result.return_value = task_result('PENDING')
             response = self.client.get(f'/analysis/status/{test_task_id}')
             data = json.loads(response.data)
             self.assertEqual(data['state'], 'PENDING')
             
             # Test success state
-            mock_result.return_value.state = 'SUCCESS'
-            mock_result.return_value.result = test_result
+            mock_result.return_value = task_result('SUCCESS', test_result)
             response = self.client.get(f'/analysis/status/{test_task_id}')
             data = json.loads(response.data)
             self.assertEqual(data['state'], 'SUCCESS')
@@ -324,8 +460,8 @@ class AnalysisTestCase(unittest.TestCase):
         
         with patch('app.routes.analysis.celery.AsyncResult') as mock_result:
             # Simulate a timeout
+            mock_result.return_value = task_result('PENDING')
             mock_result.return_value.get.side_effect = TimeoutError()
-            mock_result.return_value.state = 'PENDING'
             
             response = self.client.get(f'/analysis/status/{test_task_id}')
             data = json.loads(response.data)
@@ -345,12 +481,11 @@ class AnalysisTestCase(unittest.TestCase):
         
         with patch('app.routes.analysis.celery.AsyncResult') as mock_result:
             # Simulate task in progress
-            mock_result.return_value.state = 'PROGRESS'
-            mock_result.return_value.info = {
+            mock_result.return_value = task_result('PROGRESS', {
                 'current': 50,
                 'total': 100,
                 'status': 'Analyzing resume...'
-            }
+            })
             
             response = self.client.get(f'/analysis/status/{test_task_id}')
             data = json.loads(response.data)
@@ -390,7 +525,7 @@ class AnalysisTestCase(unittest.TestCase):
         
         with patch('app.routes.analysis.celery.AsyncResult') as mock_result:
             # Simulate task revocation
-            mock_result.return_value.state = 'REVOKED'
+            mock_result.return_value = task_result('REVOKED')
             
             response = self.client.get(f'/analysis/status/{test_task_id}')
             data = json.loads(response.data)
@@ -410,13 +545,12 @@ class AnalysisTestCase(unittest.TestCase):
         
         with patch('app.routes.analysis.celery.AsyncResult') as mock_result:
             # Simulate a long-running task
-            mock_result.return_value.state = 'PROGRESS'
-            mock_result.return_value.info = {
+            mock_result.return_value = task_result('PROGRESS', {
                 'current': 75,
                 'total': 100,
                 'status': 'Processing large resume...',
                 'execution_time': 3600  # 1 hour
-            }
+            })
             
             response = self.client.get(f'/analysis/status/{test_task_id}')
             data = json.loads(response.data)
@@ -431,5 +565,149 @@ class AnalysisTestCase(unittest.TestCase):
                 'Testing long-running task monitoring'
             )
 
+    def test_stream_task_events(self):
+        """Test that task events are relayed as Server-Sent Events"""
+        events = [
+            {'id': 1, 'event': 'progress', 'data': {'status': 'Starting analysis...', 'current': 0, 'total': 100}},
+            None,
+            {'id': 2, 'event': 'token', 'data': {'text': '{"missing_skills": ['}},
+            {'id': 3, 'event': 'result', 'data': {'status': 'completed', 'result': {}}}
+        ]
+
+        with patch('app.routes.analysis.iter_task_events', return_value=iter(events)):
+            response = self.client.get('/analysis/stream/stream_task_id')
+            body = response.get_data(as_text=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        self.assertIn('event: progress', body)
+        self.assertIn(': keep-alive', body)
+        self.assertIn('data: {"text": "{\\"missing_skills\\": ["}', body)
+        self.assertTrue(body.rstrip().endswith('data: {"status": "completed", "result": {}}'))
+
+    def test_stream_resumes_after_last_event_id(self):
+        """Test that a reconnecting EventSource only gets the events it missed, one short window at a time"""
+        with patch('app.routes.analysis.iter_task_events', return_value=iter([])) as mock_events:
+            body = self.client.get('/analysis/stream/stream_task_id', headers={'Last-Event-ID': '7'}).get_data()
+        mock_events.assert_called_once_with('stream_task_id', 7, max_duration=Config.EVENT_STREAM_WINDOW)
+        self.assertTrue(body.startswith(b'retry: '))
+
+    @patch('app.routes.main.parse_cache.get', return_value=None)
+    @patch('app.routes.main.parse_document_task.delay')
+    @patch('app.routes.main.stash_upload', return_value='upload:stash')
+    def test_upload_returns_before_parsing(self, mock_save, mock_delay, mock_cache_get):
+        """Test that uploads are parsed in the worker and the session is filled in when done"""
+        mock_delay.return_value = MagicMock(id='parse_task_id')
+        response = self.client.post(
+            '/upload',
+            data={'resume': (io.BytesIO(b'%PDF-1.4'), 'resume.pdf')},
+            headers={'Accept': 'application/json'}
+        )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.get_json()['task_id'], 'parse_task_id')
+        cache_key = mock_cache_get.call_args.args[0]
+        mock_delay.assert_called_once_with('upload:stash', 'resume.pdf', cache_key)
+
+        with patch('app.routes.main.celery.AsyncResult') as mock_async_result:
+            mock_async_result.return_value = task_result(
+                'PROGRESS', {'status': 'Reading page 1 of 2...', 'current': 50, 'total': 100}
+            )
+            progress = self.client.get('/upload/status/parse_task_id')
+            self.assertEqual(progress.get_json()['status'], 'Reading page 1 of 2...')
+            self.assertEqual(progress.headers['Retry-After'], str(Config.STATUS_POLL_INTERVAL))
+
+            mock_async_result.return_value = task_result('SUCCESS', {
+                'status': 'completed',
+                'modified_text': self.sample_resume,
+                'original_file_type': 'pdf',
+                'original_filename': 'resume.pdf',
+                'formatting': None,
+                'upload_timestamp': 0
+            })
+            done = self.client.get('/upload/status/parse_task_id').get_json()
+
+        self.assertEqual(done['state'], 'SUCCESS')
+        with self.client.session_transaction() as sess:
+            self.assertEqual(sess['modified_text'], self.sample_resume)
+            self.assertEqual(sess['original_filename'], 'resume.pdf')
+
+    @patch('app.routes.main.parse_document_task.delay')
+    @patch('app.routes.main.stash_upload', return_value='upload:stash')
+    def test_reupload_is_served_from_parse_cache(self, mock_save, mock_delay):
+        """Test that uploading identical bytes again skips saving and parsing"""
+        cached = {
+            'modified_text': self.sample_resume,
+            'original_file_type': 'pdf',
+            'original_filename': 'resume.pdf',
+            'formatting': None,
+            'upload_timestamp': 0
+        }
+        keys = []
+
+        def cache_get(key):
+            keys.append(key)
+            return cached if len(keys) > 1 else None
+
+        mock_delay.return_value = MagicMock(id='parse_task_id')
+        with patch('app.routes.main.parse_cache.get', side_effect=cache_get):
+            for _ in range(2):
+                self.client.post('/upload', data={'resume': (io.BytesIO(b'%PDF-1.4 same'), 'resume.pdf')})
+
+        self.assertEqual(keys[0], keys[1])
+        mock_save.assert_called_once()
+        mock_delay.assert_called_once()
+        with self.client.session_transaction() as sess:
+            self.assertEqual(sess['modified_text'], self.sample_resume)
+
+    @patch('app.routes.main.parse_document_task.delay')
+    @patch('app.routes.main.stash_upload', return_value='upload:stash')
+    def test_parse_cache_hit_keeps_the_uploaded_filename(self, mock_save, mock_delay):
+        """Test that identical bytes uploaded under another name keep that name"""
+        cached = {
+            'modified_text': self.sample_resume,
+            'original_file_type': 'pdf',
+            'original_filename': 'first_upload.pdf',
+            'formatting': None,
+            'upload_timestamp': 0
+        }
+        keys = []
+
+        def cache_get(key):
+            keys.append(key)
+            return cached if len(keys) > 1 else None
+
+        mock_delay.return_value = MagicMock(id='parse_task_id')
+        with patch('app.routes.main.parse_cache.get', side_effect=cache_get):
+            for filename in ('first_upload.pdf', 'my resume.pdf'):
+                self.client.post('/upload', data={'resume': (io.BytesIO(b'%PDF-1.4 same'), filename)})
+
+        self.assertEqual(keys[0], keys[1])
+        mock_delay.assert_called_once()
+        self.assertEqual(cached['original_filename'], 'first_upload.pdf')
+        with self.client.session_transaction() as sess:
+            self.assertEqual(sess['original_filename'], 'my_resume.pdf')
+
+    @patch('app.routes.main.parse_document_task.delay')
+    @patch('app.routes.main.parse_cache.get', return_value=None)
+    def test_oversized_upload_is_not_stashed(self, mock_cache_get, mock_delay):
+        """Test that uploads over the stash limit are refused before reaching Redis"""
+        with patch('app.utils.file_handling.get_redis') as mock_redis, \
+                patch.object(Config, 'UPLOAD_STASH_MAX_SIZE', 8):
+            response = self.client.post(
+                '/upload',
+                data={'resume': (io.BytesIO(b'%PDF-1.4 too large'), 'resume.pdf')},
+                headers={'Accept': 'application/json'}
+            )
+
+        self.assertEqual(response.status_code, 413)
+        mock_redis.return_value.set.assert_not_called()
+        mock_delay.assert_not_called()
+
+    def test_upload_status_requires_owning_session(self):
+        """Test that a session cannot claim another session's upload"""
+        response = self.client.get('/upload/status/someone_elses_task')
+        self.assertEqual(response.status_code, 404)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
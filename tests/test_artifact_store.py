@@ -0,0 +1,86 @@
+import unittest
+from unittest.mock import patch
+
+import redis
+from flask import Flask, session
+
+from app.services.artifact_store import (
+    ArtifactStore, get_session_value, has_session_value, set_session_value
+)
+from tests.test_result_cache import FakeRedis
+
+
+class ArtifactStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = patch('app.services.artifact_store.get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.store = ArtifactStore('test', ttl=60)
+
+    def test_identical_values_share_an_id(self):
+        first = self.store.put({'text': 'resume', 'sizes': [10, 12]})
+        second = self.store.put({'sizes': [10, 12], 'text': 'resume'})
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.redis.values), 1)
+        self.assertEqual(self.store.get(first), {'text': 'resume', 'sizes': [10, 12]})
+
+    def test_missing_artifact_is_none(self):
+        self.assertIsNone(self.store.get('0' * 64))
+
+    def test_redis_errors_are_logged(self):
+        with patch('app.services.artifact_store.get_redis', side_effect=redis.ConnectionError('down')):
+            self.assertIsNone(self.store.put('text'))
+            self.assertIsNone(self.store.get('0' * 64))
+
+
+class SessionArtifactTestCase(unittest.TestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = patch('app.services.artifact_store.get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.app = Flask(__name__)
+        self.app.secret_key = 'test'
+
+    def test_redis_sessions_hold_only_references(self):
+        self.app.config['SESSION_TYPE'] = 'redis'
+        with self.app.test_request_context('/'):
+            set_session_value('modified_text', 'x' * 5000)
+            set_session_value('original_filename', 'resume.pdf')
+
+            self.assertNotIn('modified_text', session)
+            self.assertEqual(len(session['modified_text_ref']), 64)
+            self.assertEqual(session['original_filename'], 'resume.pdf')
+            self.assertTrue(has_session_value('modified_text'))
+            self.assertEqual(get_session_value('modified_text'), 'x' * 5000)
+
+    def test_filesystem_sessions_store_values_inline(self):
+        self.app.config['SESSION_TYPE'] = 'filesystem'
+        with self.app.test_request_context('/'):
+            set_session_value('modified_text', 'resume text')
+            self.assertEqual(session['modified_text'], 'resume text')
+            self.assertEqual(self.redis.values, {})
+
+    def test_expired_artifact_reads_as_default(self):
+        self.app.config['SESSION_TYPE'] = 'redis'
+        with self.app.test_request_context('/'):
+            set_session_value('formatting', {'sections': []})
+            self.redis.values.clear()
+            self.assertEqual(get_session_value('formatting', {}), {})
+
+    def test_redis_sessions_expire_after_inactivity_not_last_write(self):
+        from app import create_app
+        from config.testing import TestConfig
+
+        class RedisSessionConfig(TestConfig):
+            SESSION_BACKEND = 'redis'
+            SESSION_REDIS_URL = 'redis://localhost:6379/0'
+
+        app = create_app(RedisSessionConfig)
+        self.assertEqual(app.config['SESSION_TYPE'], 'redis')
+        self.assertTrue(app.config['SESSION_REFRESH_EACH_REQUEST'])
+
+
+if __name__ == '__main__':
+    unittest.main()
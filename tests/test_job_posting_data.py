@@ -0,0 +1,66 @@
+import json
+import unittest
+
+from app.services.job_posting_data import extract_job_posting, format_job_posting
+
+def json_ld_page(data, body=''):
+    return (
+        '<html><head><script type="application/ld+json">' + json.dumps(data) + '</script></head>'
+        f'<body>{body}</body></html>'
+    )
+
+class JobPostingDataTestCase(unittest.TestCase):
+    def test_json_ld_job_posting(self):
+        page = json_ld_page({
+            '@context': 'https://schema.org',
+            '@type': 'JobPosting',
+            'title': 'Backend Engineer',
+            'description': '<p>We build <b>APIs</b> for hiring teams.</p>',
+            'responsibilities': ['Own services', 'Review code'],
+            'qualifications': '<ul><li>5 years of Python</li></ul>',
+            'educationRequirements': {'@type': 'EducationalOccupationalCredential', 'credentialCategory': 'bachelor degree'}
+        })
+        posting = extract_job_posting(page)
+
+        self.assertEqual(posting['source'], 'json_ld')
+        self.assertEqual(posting['title'], 'Backend Engineer')
+        self.assertEqual(posting['description'], 'We build APIs for hiring teams.')
+        self.assertEqual(posting['responsibilities'], 'Own services\nReview code')
+        self.assertEqual(posting['qualifications'], '5 years of Python')
+        self.assertEqual(posting['education'], 'bachelor degree')
+        self.assertEqual(
+            format_job_posting(posting),
+            'We build APIs for hiring teams.\n\nResponsibilities: Own services\nReview code\n\n'
+            'Qualifications: 5 years of Python\n\nEducation: bachelor degree'
+        )
+
+    def test_job_posting_inside_graph(self):
+        page = json_ld_page({'@graph': [
+            {'@type': 'Organization', 'name': 'Acme'},
+            {'@type': ['JobPosting'], 'description': 'Build data pipelines.'}
+        ]})
+        self.assertEqual(extract_job_posting(page)['description'], 'Build data pipelines.')
+
+    def test_other_and_malformed_blocks_are_skipped(self):
+        page = (
+            '<script type="application/ld+json">{"@type": "JobPosting", broken</script>'
+            '<script type="application/ld+json">{"@type": "BreadcrumbList"}</script>'
+        )
+        self.assertIsNone(extract_job_posting(page))
+        self.assertIsNone(extract_job_posting('<html><body><h1>Careers</h1></body></html>'))
+
+    def test_microdata_job_posting(self):
+        page = (
+            '<html><body><nav>Jobs</nav><div itemscope itemtype="http://schema.org/JobPosting">'
+            '<h1 itemprop="title">Data Engineer</h1>'
+            '<div itemprop="description"><p>Build pipelines.</p></div>'
+            '<ul itemprop="qualifications"><li>SQL</li></ul></div></body></html>'
+        )
+        posting = extract_job_posting(page)
+        self.assertEqual(posting['source'], 'microdata')
+        self.assertEqual(posting['title'], 'Data Engineer')
+        self.assertEqual(posting['description'], 'Build pipelines.')
+        self.assertEqual(posting['qualifications'], 'SQL')
+
+if __name__ == '__main__':
+    unittest.main()
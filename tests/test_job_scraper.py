@@ -1,12 +1,417 @@
+import json
 import sys
 import os
+import threading
 import time
+import unittest
 from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from typing import List, Dict
+from unittest.mock import patch
 
 # Add parent directory to path to import job_scraper
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bs4 import BeautifulSoup, SoupStrainer
+
+from app.services import batch_scraper, job_scraper
 from app.services.job_scraper import extract_job_description, ScrapingError
+from tests.test_result_cache import FakeRedis
+
+JOB_PAGE = (
+    "<html><body><main><h2>Key Responsibilities</h2>"
+    + "<p>Design, build and operate Python services on AWS for our hiring platform.</p>" * 3
+    + "</main></body></html>"
+)
+
+class _JobBoardHandler(BaseHTTPRequestHandler):
+    """Serves JOB_PAGE, `delay` seconds late, after answering the first `failures` requests with 503."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        server.ports.add(self.client_address[1])
+        try:
+            time.sleep(server.delay)
+            self.respond()
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def respond(self):
+        server = self.server
+        if server.requests <= server.failures:
+            self.send_response(503)
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if self.headers.get('If-None-Match') == '"v1"':
+            server.not_modified += 1
+            self.send_response(304)
+            self.send_header('ETag', '"v1"')
+            self.end_headers()
+            return
+        body = JOB_PAGE.encode('utf-8')
+        self.send_response(200)
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class JobBoardTestCase(unittest.TestCase):
+    """Runs a local job board for each test and resets the scraping session and cache."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _JobBoardHandler)
+        self.server.requests = 0
+        self.server.failures = 0
+        self.server.ports = set()
+        self.server.not_modified = 0
+        self.server.delay = 0
+        self.server.active = self.server.max_active = 0
+        self.server.lock = threading.Lock()
+        thread = threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/jobs/1"
+        for patcher in (patch.object(job_scraper, '_session', None),
+                        patch.object(job_scraper.Config, 'SCRAPE_BACKOFF_FACTOR', 0),
+                        patch.object(job_scraper.scrape_cache, 'enabled', False)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+class ScrapingClientTestCase(JobBoardTestCase):
+    def test_session_is_shared_within_a_process(self):
+        self.assertIs(job_scraper.get_scraping_session(), job_scraper.get_scraping_session())
+
+    def test_only_decodable_encodings_are_advertised(self):
+        encoding = job_scraper.get_scraping_session().headers['Accept-Encoding']
+        try:
+            import brotli  # noqa: F401
+        except ImportError:
+            self.assertNotIn('br', encoding)
+        self.assertIn('gzip', encoding)
+
+    def test_repeat_fetches_reuse_the_connection(self):
+        for _ in range(3):
+            self.assertIn('Python services', extract_job_description(self.url))
+        self.assertEqual(self.server.requests, 3)
+        self.assertEqual(len(self.server.ports), 1)
+
+    def test_unavailable_responses_are_retried(self):
+        self.server.failures = 2
+        self.assertIn('Python services', extract_job_description(self.url))
+        self.assertEqual(self.server.requests, 3)
+
+    def test_retries_are_bounded(self):
+        self.server.failures = 100
+        with patch.object(job_scraper.Config, 'SCRAPE_MAX_RETRIES', 2):
+            with self.assertRaises(ScrapingError):
+                extract_job_description(self.url)
+        self.assertEqual(self.server.requests, 3)
+
+    def test_retry_after_is_capped(self):
+        retry = job_scraper.ScraperRetry(total=1)
+        response = type('Response', (), {'headers': {'Retry-After': '3600'}})()
+        with patch.object(job_scraper.Config, 'SCRAPE_MAX_RETRY_AFTER', 5):
+            self.assertEqual(retry.get_retry_after(response), 5)
+
+class ScrapeCacheTestCase(JobBoardTestCase):
+    def setUp(self):
+        super().setUp()
+        self.redis = FakeRedis()
+        for patcher in (patch('app.services.result_cache.get_redis', return_value=self.redis),
+                        patch.object(job_scraper.scrape_cache, 'enabled', True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_tracking_params_are_ignored(self):
+        self.assertEqual(
+            job_scraper.normalize_job_url('HTTPS://Jobs.Example.com:443/job/7?utm_source=x&b=2&a=1&gclid=y#apply'),
+            'https://jobs.example.com/job/7?a=1&b=2'
+        )
+        self.assertEqual(
+            job_scraper.scrape_cache_key('https://jobs.example.com/job/7?utm_medium=email'),
+            job_scraper.scrape_cache_key('https://jobs.example.com/job/7')
+        )
+
+    def test_fresh_entries_are_served_without_a_request(self):
+        first = extract_job_description(self.url)
+        second = extract_job_description(self.url + '?utm_campaign=newsletter')
+        self.assertEqual(first, second)
+        self.assertEqual(self.server.requests, 1)
+        self.assertEqual(job_scraper.cached_job_description(self.url), (first, False))
+
+    def test_expired_entries_are_revalidated(self):
+        description = extract_job_description(self.url)
+        with patch('app.services.job_scraper.time.time', return_value=time.time() + 2 * 60 * 60):
+            self.assertEqual(job_scraper.cached_job_description(self.url), (description, True))
+            self.assertEqual(extract_job_description(self.url), description)
+            self.assertEqual(job_scraper.cached_job_description(self.url), (description, False))
+        self.assertEqual(self.server.requests, 2)
+        self.assertEqual(self.server.not_modified, 1)
+
+    def test_entries_past_the_stale_window_are_not_served(self):
+        extract_job_description(self.url)
+        with patch('app.services.job_scraper.time.time', return_value=time.time() + 3 * 24 * 60 * 60):
+            self.assertIsNone(job_scraper.cached_job_description(self.url))
+
+class BatchScrapingTestCase(JobBoardTestCase):
+    def setUp(self):
+        super().setUp()
+        self.redis = FakeRedis()
+        patcher = patch('app.services.result_cache.get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def urls(self, count):
+        return [f"{self.url[:-1]}{n}" for n in range(count)]
+
+    def test_duplicates_are_fetched_once(self):
+        results = batch_scraper.scrape_job_batch(
+            [self.url, self.url + '?utm_source=email', '', self.url + '#apply'],
+            scraper=batch_scraper.BatchScraper(host_delay=0)
+        )
+        self.assertEqual([result['url'] for result in results], [self.url])
+        self.assertEqual(results[0]['status'], 'completed')
+        self.assertEqual(self.server.requests, 1)
+
+    def test_fetches_run_concurrently(self):
+        self.server.delay = 0.2
+        start = time.perf_counter()
+        results = batch_scraper.scrape_job_batch(
+            self.urls(8), scraper=batch_scraper.BatchScraper(concurrency=8, per_host=8, host_delay=0)
+        )
+        self.assertLess(time.perf_counter() - start, 8 * 0.2 / 2)
+        self.assertTrue(all(result['status'] == 'completed' for result in results))
+        self.assertGreater(self.server.max_active, 1)
+
+    def test_per_host_limit_is_respected(self):
+        self.server.delay = 0.05
+        results = batch_scraper.scrape_job_batch(
+            self.urls(6), scraper=batch_scraper.BatchScraper(concurrency=6, per_host=2, host_delay=0)
+        )
+        self.assertEqual(len(results), 6)
+        self.assertEqual(self.server.max_active, 2)
+
+    def test_host_requests_are_spaced(self):
+        start = time.perf_counter()
+        batch_scraper.scrape_job_batch(
+            self.urls(4), scraper=batch_scraper.BatchScraper(per_host=4, host_delay=0.1)
+        )
+        self.assertGreaterEqual(time.perf_counter() - start, 0.3)
+
+    def test_results_stream_as_they_finish(self):
+        finished = []
+        results = batch_scraper.scrape_job_batch(
+            ['not a url'] + self.urls(2), on_result=finished.append,
+            scraper=batch_scraper.BatchScraper(host_delay=0)
+        )
+        self.assertEqual(len(finished), 3)
+        # The invalid URL fails on its own, before either fetch completes
+        self.assertEqual(finished[0]['url'], 'not a url')
+        self.assertEqual(results[0]['status'], 'failed')
+        self.assertEqual(results[0]['error']['exc_type'], 'ScrapingError')
+        self.assertEqual([result['status'] for result in results[1:]], ['completed', 'completed'])
+
+    def test_unavailable_responses_are_retried(self):
+        self.server.failures = 2
+        results = batch_scraper.scrape_job_batch([self.url], scraper=batch_scraper.BatchScraper(host_delay=0))
+        self.assertEqual(results[0]['status'], 'completed')
+        self.assertEqual(self.server.requests, 3)
+
+    def test_batch_retries_follow_the_scraper_policy(self):
+        self.server.failures = 100
+        with patch.object(job_scraper.Config, 'SCRAPE_MAX_RETRIES', 2):
+            results = batch_scraper.scrape_job_batch([self.url], scraper=batch_scraper.BatchScraper(host_delay=0))
+        self.assertEqual(results[0]['status'], 'failed')
+        self.assertEqual(self.server.requests, 3)
+
+    def test_scrape_cache_is_shared(self):
+        with patch.object(job_scraper.scrape_cache, 'enabled', True):
+            extract_job_description(self.url)
+            results = batch_scraper.scrape_job_batch(self.urls(2), scraper=batch_scraper.BatchScraper(host_delay=0))
+            self.assertEqual([result['cached'] for result in results], [False, True])
+            self.assertEqual(self.server.requests, 2)
+            with patch('app.services.job_scraper.time.time', return_value=time.time() + 2 * 60 * 60), \
+                    patch('app.services.batch_scraper.time.time', return_value=time.time() + 2 * 60 * 60):
+                results = batch_scraper.scrape_job_batch([self.url], scraper=batch_scraper.BatchScraper(host_delay=0))
+            self.assertTrue(results[0]['cached'])
+            self.assertEqual(self.server.not_modified, 1)
+
+class ExtractionTestCase(unittest.TestCase):
+    BODY = "<p>Build and operate Python services on AWS, mentor engineers and own reliability.</p>" * 3
+    NOISE = "<nav>" + "<a href='/x'>Link</a>" * 500 + "</nav><script>var tracking = 1;</script>"
+
+    def test_domain_strategy_runs_on_a_partial_parse(self):
+        html = f"<html><body>{self.NOISE}<div class='description__text'>{self.BODY}</div></body></html>"
+        timings = {}
+        description = job_scraper.extract_from_html(html, 'www.linkedin.com', timings)
+
+        self.assertIn('Python services', description)
+        self.assertNotIn('tracking', description)
+        self.assertEqual(timings['strategy'], 'linkedin')
+        self.assertEqual(timings['path'], 'partial')
+        self.assertNotIn('full_parse_ms', timings)
+
+    def test_structured_data_skips_the_dom(self):
+        posting = {'@type': 'JobPosting', 'description': self.BODY, 'qualifications': ['Python', 'AWS']}
+        html = (f"<html><head><script type='application/ld+json'>{json.dumps(posting)}</script></head>"
+                f"<body>{self.NOISE}<div class='description__text'>Apply now</div></body></html>")
+        timings = {}
+        description = job_scraper.extract_from_html(html, 'www.linkedin.com', timings)
+
+        self.assertTrue(description.startswith('Build and operate Python services'))
+        self.assertIn('Qualifications: Python AWS', description)
+        self.assertEqual(timings['path'], 'json_ld')
+        self.assertNotIn('partial_parse_ms', timings)
+
+    def test_every_selector_runs_on_the_partial_parse(self):
+        pages = (
+            ('jobs.github.com', f"<div data-testid='jobDetails'>{self.BODY}</div>"),
+            ('jobs.github.com', f"<article id='description-body'>{self.BODY}</article>"),
+            ('jobs.example.com', f"<main>{self.BODY}</main>"),
+            ('jobs.example.com', f"<article>{self.BODY}</article>")
+        )
+        for domain, content in pages:
+            with self.subTest(domain=domain, content=content[:40]):
+                timings = {}
+                html = f"<html><body>{self.NOISE}{content}</body></html>"
+                self.assertIn('Python services', job_scraper.extract_from_html(html, domain, timings))
+                self.assertEqual(timings['path'], 'partial')
+
+    def test_full_parse_is_the_fallback(self):
+        html = f"<html><body>{self.NOISE}<main>{self.BODY}</main></body></html>"
+        timings = {}
+        missing = ('generic', job_scraper._scrape_generic, SoupStrainer('div', id='nothing'))
+        with patch.object(job_scraper, 'GENERIC_STRATEGY', missing):
+            self.assertIn('Python services', job_scraper.extract_from_html(html, 'jobs.example.com', timings))
+        self.assertEqual(timings['strategy'], 'generic')
+        self.assertEqual(timings['path'], 'full')
+        self.assertIn('full_parse_ms', timings)
+
+    def test_candidate_sections_are_the_last_resort(self):
+        html = f"<html><body><h2>Key Responsibilities</h2>{self.BODY}</body></html>"
+        timings = {}
+        self.assertIn('Python services', job_scraper.extract_from_html(html, 'jobs.example.com', timings))
+        self.assertEqual(timings['path'], 'candidate_sections')
+
+    def test_parsers_agree(self):
+        html = f"<html><body>{self.NOISE}<div id='jobDescriptionText'>{self.BODY}</div></body></html>"
+        expected = job_scraper.extract_from_html(html, 'www.indeed.com')
+        with patch.object(job_scraper, 'HTML_PARSER', 'html.parser'):
+            self.assertEqual(job_scraper.extract_from_html(html, 'www.indeed.com'), expected)
+
+    def test_insufficient_pages_are_rejected(self):
+        with self.assertRaises(ScrapingError):
+            job_scraper.extract_from_html("<html><body><p>Apply now</p></body></html>", 'jobs.example.com')
+
+class CandidateSectionsTestCase(unittest.TestCase):
+    def sections(self, html):
+        return job_scraper._scrape_by_candidate_sections(BeautifulSoup(html, 'html.parser'))
+
+    def test_text_belongs_to_one_section(self):
+        html = (
+            "<div><h2>Key Responsibilities</h2><p>Design and ship backend services for payments.</p>"
+            "<div><h3>Required Skills</h3><p>Python, PostgreSQL and a taste for clean interfaces.</p></div></div>"
+        )
+        text = self.sections(html)
+        self.assertEqual(text.count('Design and ship'), 1)
+        self.assertEqual(text.count('Python, PostgreSQL'), 1)
+        self.assertTrue(text.startswith('Key Responsibilities Design and ship'))
+
+    def test_section_ends_with_its_container(self):
+        html = (
+            "<section><h2>Qualifications</h2><p>Five years building distributed systems in production.</p></section>"
+            "<footer><script>track()</script><p>Privacy policy and cookie settings</p></footer>"
+        )
+        text = self.sections(html)
+        self.assertIn('distributed systems', text)
+        self.assertNotIn('Privacy', text)
+        self.assertNotIn('track', text)
+
+    def test_unrelated_headings_end_a_section(self):
+        html = (
+            "<h2>Requirements</h2><p>Strong SQL skills and experience with data warehousing tools.</p>"
+            "<h2>Similar jobs</h2><p>Data Analyst at Example Corp, posted two days ago.</p>"
+        )
+        text = self.sections(html)
+        self.assertIn('data warehousing', text)
+        self.assertNotIn('Similar jobs', text)
+
+    def test_many_headings_scale_linearly(self):
+        def page(n):
+            block = "<div><h3>Requirements {i}</h3><p>Experience with Python services and cloud tooling.</p></div>"
+            return BeautifulSoup("<main>" + "".join(block.format(i=i) for i in range(n)) + "</main>", 'html.parser')
+
+        def best_time(soup):
+            timings = []
+            for _ in range(3):
+                start = time.perf_counter()
+                job_scraper._scrape_by_candidate_sections(soup)
+                timings.append(time.perf_counter() - start)
+            return min(timings)
+
+        small, large = page(500), page(4000)
+        # 8x the headings should cost roughly 8x the time, far from the 64x of a quadratic walk
+        self.assertLess(best_time(large), best_time(small) * 20)
+
+class DescriptionCleaningTestCase(unittest.TestCase):
+    def test_noise_is_removed(self):
+        text = (
+            "Toggle navigation Home Jobs Teams ProductActions Senior Engineer\n\n"
+            "Build   services.\tSubscribe to our newsletter for updates in your inbox. Apply today. "
+            "Join Our Talent Community and more"
+        )
+        self.assertEqual(
+            job_scraper._clean_description(text),
+            'ProductActions Senior Engineer Build services. Apply today.'
+        )
+        self.assertEqual(job_scraper._clean_description("Great team © 2024 Acme Inc. All rights reserved"), 'Great team')
+
+    def test_rules_are_configurable(self):
+        rules = (job_scraper.NoiseRule('Similar jobs'),)
+        self.assertEqual(job_scraper._clean_description("Own the API. Similar jobs: Analyst", rules), 'Own the API.')
+
+class DescriptionCleaningBenchmark(unittest.TestCase):
+    """Cleaning must stay linear on large and adversarial page texts."""
+
+    SIZES = (25_000, 200_000)  # 8x more input
+
+    def best_time(self, text):
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            job_scraper._clean_description(text)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    def assert_linear(self, make_text):
+        small, large = (self.best_time(make_text(size)) for size in self.SIZES)
+        # Linear work grows ~8x here; a quadratic rule would grow ~64x
+        self.assertLess(large, max(small, 1e-4) * 20, f"{small:.4f}s -> {large:.4f}s")
+
+    def test_large_page(self):
+        self.assert_linear(lambda n: "Design and operate Python services on AWS.\n\n " * (n // 45))
+
+    def test_repeated_start_without_end(self):
+        self.assert_linear(lambda n: "Toggle navigation " * (n // 18))
+        self.assert_linear(lambda n: "Subscribe to our " * (n // 17))
+
+    def test_repeated_start_with_distant_end(self):
+        self.assert_linear(lambda n: "Toggle navigation x " * (n // 20) + "ProductActions")
+
+    def test_whitespace_runs(self):
+        self.assert_linear(lambda n: " \t\n" * (n // 3) + "end")
 
 class JobScraperTester:
     def __init__(self):
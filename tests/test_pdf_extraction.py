@@ -0,0 +1,201 @@
+import io
+import signal
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import pdfplumber
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+from werkzeug.datastructures import FileStorage
+
+from app.services import parse_limits, pdf_extraction
+from app.services.pdf_extraction import extract_pdf
+from app.utils import file_handling
+from app.utils.file_handling import parse_uploaded_file
+
+
+def build_pdf(pages):
+    """Render pages of (text, font size, y[, x]) rows into PDF bytes."""
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    for rows in pages:
+        for text, size, y, *x in rows:
+            c.setFont("Helvetica", size)
+            c.drawString(x[0] if x else 72, y, text)
+        c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+class PDFExtractionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pdf_bytes = build_pdf([
+            [('Jane Doe', 18, 720), ('EXPERIENCE', 13, 680), ('Software Engineer at Acme', 10, 660)],
+            [('EDUCATION', 13, 720), ('BSc Computer Science', 10, 700), ('University of Somewhere', 10, 686)]
+        ])
+
+    def test_text_words_and_font_statistics_in_one_pass(self):
+        progress = []
+        extraction = extract_pdf(io.BytesIO(self.pdf_bytes), on_progress=lambda done, total: progress.append((done, total)))
+
+        self.assertEqual(progress, [(1, 2), (2, 2)])
+        self.assertEqual(len(extraction.pages), 2)
+        self.assertIn('Software Engineer at Acme', extraction.text)
+        self.assertIn('University of Somewhere', extraction.text)
+        self.assertEqual(extraction.body_font_size, 10)
+        self.assertEqual(extraction.pages[1].base_font_size, 10)
+        first_word = extraction.pages[0].words[0]
+        self.assertEqual(set(first_word), set(pdf_extraction.WORD_FIELDS))
+
+    def test_upload_parsing_opens_pdf_once(self):
+        path = self.id() + '.pdf'
+        with open(path, 'wb') as f:
+            f.write(self.pdf_bytes)
+        self.addCleanup(lambda: __import__('os').remove(path))
+
+        with patch.object(pdf_extraction.pdfplumber, 'open', wraps=pdfplumber.open) as mock_open:
+            text, formatting = parse_uploaded_file(path, 'resume.pdf')
+
+        mock_open.assert_called_once()
+        self.assertIn('Jane Doe', text)
+        self.assertEqual(
+            formatting['section_analysis']['structure_analysis']['section_order'],
+            ['Contact Information', 'Experience', 'Education']
+        )
+
+
+class ParseLimitsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pdf_bytes = build_pdf([[(f'Page {n} line {i}', 10, 700 - i * 14) for i in range(5)] for n in range(5)])
+
+    def test_every_page_is_extracted_within_the_limits(self):
+        progress = []
+        extraction = parse_limits.extract_pdf_limited(
+            io.BytesIO(self.pdf_bytes), on_progress=lambda done, total: progress.append((done, total))
+        )
+
+        self.assertFalse(extraction.truncated)
+        self.assertEqual([page.number for page in extraction.pages], [0, 1, 2, 3, 4])
+        self.assertIn('Page 4 line 0', extraction.text)
+        self.assertEqual(progress, [(n, 5) for n in range(1, 6)])
+
+    def test_partial_result_when_cpu_budget_runs_out(self):
+        calls = []
+
+        def slow_page(page, number):
+            calls.append(number)
+            if number == 2:
+                raise parse_limits.ParseTimeout("CPU time limit exceeded while parsing")
+            return pdf_extraction.extract_page(page, number)
+
+        with patch.object(parse_limits, 'extract_page', side_effect=slow_page):
+            extraction = parse_limits.extract_pdf_limited(io.BytesIO(self.pdf_bytes))
+
+        self.assertTrue(extraction.truncated)
+        self.assertEqual([page.number for page in extraction.pages], [0, 1])
+        self.assertEqual(calls, [0, 1, 2])
+
+    @unittest.skipIf(parse_limits.resource is None, "resource limits are not available on this platform")
+    def test_cpu_time_limit_interrupts_runaway_work(self):
+        before = parse_limits.resource.getrlimit(parse_limits.resource.RLIMIT_CPU)
+        with self.assertRaises(parse_limits.ParseTimeout):
+            with parse_limits.cpu_time_limit(1):
+                while True:
+                    pass
+        # The previous limit is restored afterwards
+        self.assertEqual(parse_limits.resource.getrlimit(parse_limits.resource.RLIMIT_CPU), before)
+
+    def test_parsing_stops_at_the_wall_clock_limit(self):
+        def slow_page(page, number):
+            time.sleep(0.2)
+            return pdf_extraction.extract_page(page, number)
+
+        with patch.object(parse_limits.Config, 'PARSE_TIMEOUT', 0.5), \
+                patch.object(parse_limits, 'extract_page', side_effect=slow_page):
+            start = time.monotonic()
+            extraction = parse_limits.extract_pdf_limited(io.BytesIO(self.pdf_bytes))
+
+        self.assertLess(time.monotonic() - start, 0.9)
+        self.assertTrue(extraction.truncated)
+        self.assertEqual([page.number for page in extraction.pages], [0, 1])
+        self.assertEqual(signal.getitimer(signal.ITIMER_REAL), (0.0, 0.0))
+
+    @unittest.skipIf(parse_limits.resource is None, "resource limits are not available on this platform")
+    def test_parsing_is_capped_in_memory(self):
+        def greedy_page(page, number):
+            if number == 1:
+                bytearray(256 * 1024 * 1024)
+            return pdf_extraction.extract_page(page, number)
+
+        before = parse_limits.resource.getrlimit(parse_limits.resource.RLIMIT_AS)
+        with patch.object(parse_limits.Config, 'PARSE_MAX_MEMORY_MB', 64), \
+                patch.object(parse_limits, 'extract_page', side_effect=greedy_page):
+            extraction = parse_limits.extract_pdf_limited(io.BytesIO(self.pdf_bytes))
+
+        self.assertTrue(extraction.truncated)
+        self.assertEqual([page.number for page in extraction.pages], [0])
+        # The worker gets its memory back once parsing is done
+        self.assertEqual(parse_limits.resource.getrlimit(parse_limits.resource.RLIMIT_AS), before)
+        bytearray(256 * 1024 * 1024)
+
+    def test_truncated_parses_are_not_cached(self):
+        from app import tasks
+
+        text = 'EXPERIENCE Software Engineer at Acme. ' * 5
+        for truncated, cached in ((True, False), (False, True)):
+            with patch.object(tasks, 'open_stashed_upload', return_value=MagicMock()), \
+                    patch.object(tasks, 'discard_stashed_upload'), \
+                    patch.object(tasks, 'parse_uploaded_file', return_value=(text, {'truncated': truncated})), \
+                    patch.object(tasks.parse_document_task, 'update_state'), \
+                    patch.object(tasks.parse_cache, 'set') as cache_set:
+                result = tasks.parse_document_task.run('upload:stash', 'resume.pdf', 'parse:key')
+            self.assertEqual(result['modified_text'], text)
+            self.assertEqual(cache_set.called, cached)
+
+
+class InMemoryUploadTestCase(unittest.TestCase):
+    def setUp(self):
+        self.store = {}
+        redis = MagicMock()
+        redis.set.side_effect = lambda key, value, ex=None: self.store.__setitem__(key, value)
+        redis.get.side_effect = self.store.get
+        redis.delete.side_effect = lambda key: self.store.pop(key, None)
+        patcher = patch.object(file_handling, 'get_redis', return_value=redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _upload(self, data, filename):
+        return FileStorage(stream=io.BytesIO(data), filename=filename)
+
+    def test_pdf_is_parsed_from_stash_without_touching_disk(self):
+        pdf_bytes = build_pdf([[('EXPERIENCE', 13, 700), ('Software Engineer at Acme', 10, 680)]])
+        key = file_handling.stash_upload(self._upload(pdf_bytes, 'resume.pdf'))
+
+        with patch.object(file_handling.Config, 'UPLOAD_SPOOL_MAX_SIZE', len(pdf_bytes) + 1), \
+                patch('builtins.open', side_effect=AssertionError('unexpected file access')):
+            with file_handling.open_stashed_upload(key) as upload:
+                self.assertFalse(upload._rolled)
+                text, formatting = parse_uploaded_file(upload, 'resume.pdf')
+
+        self.assertIn('Software Engineer at Acme', text)
+        self.assertEqual(formatting['section_analysis']['sections'][0]['name'], 'Experience')
+        file_handling.discard_stashed_upload(key)
+        self.assertEqual(self.store, {})
+
+    def test_large_uploads_spill_to_disk(self):
+        key = file_handling.stash_upload(self._upload(b'x' * 2048, 'resume.txt'))
+        with patch.object(file_handling.Config, 'UPLOAD_SPOOL_MAX_SIZE', 1024):
+            with file_handling.open_stashed_upload(key) as upload:
+                self.assertTrue(upload._rolled)
+                text, formatting = parse_uploaded_file(upload, 'resume.txt')
+        self.assertEqual(len(text), 2048)
+        self.assertIsNone(formatting)
+
+    def test_expired_stash_raises(self):
+        with self.assertRaises(ValueError):
+            file_handling.open_stashed_upload('upload:missing')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import io
+import unittest
+from unittest.mock import patch
+
+from app.services import reading_order
+from app.services.pdf_extraction import extract_pdf
+from app.services.reading_order import find_gutter, lines_to_text, order_lines
+from app.services.resume_parser import build_pdf_formatting
+from tests.test_pdf_extraction import build_pdf
+
+
+def two_column_page():
+    rows = [('Jane Doe - Senior Software Engineer - jane@example.com - 555 0100', 11, 740, 60)]
+    left = ['SKILLS', 'Python and Go', 'PostgreSQL', 'Kubernetes', 'AWS', 'EDUCATION', 'BSc Computing', 'State University']
+    right = ['EXPERIENCE', 'Staff Engineer at Acme', 'Led the platform team', 'Cut deploy time by half',
+             'Engineer at Initech', 'Built billing services', 'Owned on-call rotation', 'Mentored new hires']
+    for i, (l, r) in enumerate(zip(left, right)):
+        y = 700 - i * 16
+        rows.append((l, 10, y, 60))
+        rows.append((r, 10, y, 330))
+    return rows, left, right
+
+
+class ReadingOrderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.rows, self.left, self.right = two_column_page()
+        self.pdf_bytes = build_pdf([self.rows])
+
+    def _words(self):
+        extraction = extract_pdf(io.BytesIO(self.pdf_bytes))
+        return extraction.pages[0]
+
+    def test_columns_are_read_one_after_the_other(self):
+        page = self._words()
+        self.assertEqual(page.columns, 2)
+        lines = page.text.split('\n')
+        self.assertTrue(lines[0].startswith('Jane Doe'))
+        content = [line for line in lines[1:] if line]
+        self.assertEqual(content, self.left + self.right)
+
+    def test_gutter_detected_without_numpy(self):
+        page = self._words()
+        gutter = find_gutter(page.words, page.width)
+        self.assertIsNotNone(gutter)
+        with patch.object(reading_order, 'np', None):
+            self.assertEqual(find_gutter(page.words, page.width), gutter)
+        self.assertTrue(60 < gutter < 330)
+
+    def test_blocks_and_columns_are_tagged(self):
+        page = self._words()
+        lines = order_lines(page.words, page.width)
+        self.assertEqual(lines[0]['column'], 'full')
+        self.assertEqual({line['column'] for line in lines[1:]}, {'left', 'right'})
+        self.assertEqual(len({line['block'] for line in lines}), 3)
+        self.assertEqual(lines_to_text(lines).count('\n\n'), 2)
+
+    def test_single_column_text_is_unchanged(self):
+        rows = [(f'Line {i} of a single column resume with ordinary text', 10, 740 - i * 14, 60) for i in range(30)]
+        extraction = extract_pdf(io.BytesIO(build_pdf([rows])))
+        self.assertEqual(extraction.pages[0].columns, 1)
+        self.assertIsNone(find_gutter(extraction.pages[0].words, extraction.pages[0].width))
+
+    def test_formatting_reuses_the_extracted_lines(self):
+        extraction = extract_pdf(io.BytesIO(self.pdf_bytes))
+        self.assertEqual([line['text'] for line in extraction.pages[0].lines][1:3], self.left[:2])
+        with patch.object(reading_order, 'group_lines', wraps=reading_order.group_lines) as group_lines:
+            formatting = build_pdf_formatting(extraction)
+        group_lines.assert_not_called()
+        self.assertIn('Experience', formatting['section_analysis']['structure_analysis']['section_order'])
+
+
+if __name__ == '__main__':
+    unittest.main()
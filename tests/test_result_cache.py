@@ -0,0 +1,164 @@
+import unittest
+from unittest.mock import patch
+
+import redis
+
+from app.services.result_cache import ResultCache, normalize_text
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the Redis commands ResultCache uses."""
+
+    def __init__(self):
+        self.values = {}
+        self.zsets = {}
+        self.hashes = {}
+        self.lists = {}
+        self.subscribers = {}
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def get(self, key):
+        value = self.values.get(key)
+        return value.encode() if value is not None else None
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    def expire(self, key, ttl):
+        return key in self.values
+
+    def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+
+    def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    def zcard(self, key):
+        return len(self.zsets.get(key, {}))
+
+    def zremrangebyscore(self, key, low, high):
+        zset = self.zsets.get(key, {})
+        for member in [m for m, score in zset.items() if low <= score <= high]:
+            del zset[member]
+
+    def zpopmin(self, key, count):
+        zset = self.zsets.get(key, {})
+        popped = sorted(zset.items(), key=lambda item: item[1])[:count]
+        for member, _ in popped:
+            del zset[member]
+        return [(member.encode(), score) for member, score in popped]
+
+    def hincrby(self, key, field, amount):
+        bucket = self.hashes.setdefault(key, {})
+        bucket[field] = bucket.get(field, 0) + amount
+
+    def hgetall(self, key):
+        return {k.encode(): str(v).encode() for k, v in self.hashes.get(key, {}).items()}
+
+    def incr(self, key):
+        value = int(self.values.get(key, 0)) + 1
+        self.values[key] = str(value)
+        return value
+
+    def rpush(self, key, value):
+        self.lists.setdefault(key, []).append(value.encode())
+
+    def lrange(self, key, start, end):
+        items = self.lists.get(key, [])
+        return items[start:] if end == -1 else items[start:end + 1]
+
+    def publish(self, channel, message):
+        for pubsub in self.subscribers.get(channel, []):
+            pubsub.messages.append({'type': 'message', 'data': message.encode()})
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return FakePubSub(self)
+
+
+class FakePubSub:
+    def __init__(self, client):
+        self.client = client
+        self.messages = []
+
+    def subscribe(self, channel):
+        self.client.subscribers.setdefault(channel, []).append(self)
+
+    def get_message(self, timeout=0):
+        return self.messages.pop(0) if self.messages else None
+
+    def close(self):
+        for subscribers in self.client.subscribers.values():
+            if self in subscribers:
+                subscribers.remove(self)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+        return queue
+
+    def execute(self):
+        return [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+class ResultCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = patch('app.services.result_cache.get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = ResultCache('test', ttl=60, max_entries=2)
+
+    def test_key_ignores_whitespace_differences(self):
+        key_a = self.cache.make_key(normalize_text("Python  developer\n\nAWS"), 'mistral', '1')
+        key_b = self.cache.make_key(normalize_text(" Python developer AWS "), 'mistral', '1')
+        key_c = self.cache.make_key(normalize_text("Python developer AWS"), 'llama3', '1')
+        self.assertEqual(key_a, key_b)
+        self.assertNotEqual(key_a, key_c)
+
+    def test_hit_and_miss_counters(self):
+        self.assertIsNone(self.cache.get('missing'))
+        self.cache.set('present', {'general_suggestions': ['ok']})
+        self.assertEqual(self.cache.get('present'), {'general_suggestions': ['ok']})
+
+        stats = self.cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['entries'], 1)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        with patch('app.services.result_cache.time.time', side_effect=[100, 101, 102, 103, 104, 105, 106]):
+            self.cache.set('a', {'v': 1})
+            self.cache.set('b', {'v': 2})
+            self.cache.get('a')
+            self.cache.set('c', {'v': 3})
+
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('a'), {'v': 1})
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+    def test_disabled_cache_is_bypassed(self):
+        cache = ResultCache('test', ttl=60, max_entries=2, enabled=False)
+        self.assertFalse(cache.set('a', {'v': 1}))
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(self.redis.values, {})
+
+    def test_redis_errors_are_treated_as_misses(self):
+        with patch('app.services.result_cache.get_redis', side_effect=redis.ConnectionError('down')):
+            self.assertIsNone(self.cache.get('a'))
+            self.assertFalse(self.cache.set('a', {'v': 1}))
+
+
+if __name__ == '__main__':
+    unittest.main()
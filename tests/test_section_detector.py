@@ -0,0 +1,67 @@
+import time
+import unittest
+
+from app.services.section_detector import detect_sections, group_lines
+
+
+def make_words(rows):
+    """Build pdfplumber-style words from (text, size, top) rows, one line per row."""
+    words = []
+    for text, size, top in rows:
+        x0 = 50
+        for token in text.split():
+            words.append({'text': token, 'size': size, 'x0': x0, 'top': top, 'bottom': top + size})
+            x0 += len(token) * size * 0.5 + 3
+    return words
+
+
+class SectionDetectorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.rows = [
+            ('Jane Doe', 18, 40),
+            ('jane@example.com | 555-0100', 10, 62),
+            ('EXPERIENCE', 12, 95),
+            ('Software Engineer, Acme Corp', 10, 115),
+            ('• Built REST APIs in Python', 10, 128),
+            ('Education', 12, 160),
+            ('BSc Computer Science', 10, 180),
+            ('Technical Skills:', 10, 210),
+            ('Python, SQL, AWS', 10, 225)
+        ]
+
+    def test_lines_are_grouped_in_reading_order(self):
+        words = make_words(self.rows)
+        lines = group_lines(list(reversed(words)))
+        self.assertEqual([line['text'] for line in lines], [row[0] for row in self.rows])
+
+    def test_sections_from_font_statistics(self):
+        result = detect_sections(group_lines(make_words(self.rows)))
+
+        self.assertEqual(
+            result['structure_analysis']['section_order'],
+            ['Contact Information', 'Experience', 'Education', 'Technical Skills']
+        )
+        experience = result['sections'][1]
+        self.assertEqual(experience['content'], ['Software Engineer, Acme Corp', '• Built REST APIs in Python'])
+        self.assertTrue(experience['formatting']['is_header'])
+        self.assertGreaterEqual(experience['formatting']['suggested_font_size'], 12)
+        self.assertFalse(result['sections'][0]['formatting']['is_header'])
+        self.assertEqual(result['confidence'], 1.0)
+
+    def test_unrecognized_layout_has_low_confidence(self):
+        rows = [(f'Paragraph line number {i} of plain text', 10, 20 + i * 12) for i in range(20)]
+        result = detect_sections(group_lines(make_words(rows)))
+        self.assertEqual(result['confidence'], 0.0)
+        self.assertEqual(len(result['sections']), 1)
+
+    def test_detection_is_fast(self):
+        rows = self.rows * 50
+        rows = [(text, size, i * 15) for i, (text, size, _) in enumerate(rows)]
+        words = make_words(rows)
+        start = time.perf_counter()
+        detect_sections(group_lines(words))
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
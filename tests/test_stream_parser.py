@@ -0,0 +1,280 @@
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+from app.services import ai_analysis
+from app.services.stream_parser import IncrementalJSONParser, StreamParseError
+
+
+def stream_chunks(text: str, size: int = 7):
+    """Mimic Ollama's streamed chat responses."""
+    for i in range(0, len(text), size):
+        yield {'message': {'content': text[i:i + size]}}
+
+
+class IncrementalJSONParserTestCase(unittest.TestCase):
+    def setUp(self):
+        self.document = (
+            'Here is the analysis:\n'
+            '{"missing_skills": [{"skill": "AWS \\"cloud\\" [infra]", "suggestion": "Add {certs}"}],'
+            ' "general_suggestions": ["Tailor, then trim", "Quantify results"],'
+            ' "meta": {"note": "not an array"}}\n'
+            'Let me know if you need anything else }'
+        )
+
+    def test_items_are_emitted_as_they_complete(self):
+        for chunk_size in (1, 5, 64):
+            items = []
+            parser = IncrementalJSONParser(on_item=lambda field, item: items.append((field, item)))
+            for i in range(0, len(self.document), chunk_size):
+                parser.feed(self.document[i:i + chunk_size])
+
+            self.assertTrue(parser.complete)
+            self.assertEqual(items, [
+                ('missing_skills', {'skill': 'AWS "cloud" [infra]', 'suggestion': 'Add {certs}'}),
+                ('general_suggestions', 'Tailor, then trim'),
+                ('general_suggestions', 'Quantify results')
+            ])
+            self.assertEqual(parser.result()['meta'], {'note': 'not an array'})
+
+    def test_first_item_is_available_before_document_ends(self):
+        items = []
+        parser = IncrementalJSONParser(on_item=lambda field, item: items.append(item))
+        parser.feed('{"missing_skills": [{"skill": "AWS", "suggestion": "x"}, {"skill": "Do')
+        self.assertEqual(items, [{'skill': 'AWS', 'suggestion': 'x'}])
+        self.assertFalse(parser.complete)
+
+    def test_mismatched_brackets_raise_immediately(self):
+        parser = IncrementalJSONParser()
+        with self.assertRaises(StreamParseError):
+            parser.feed('{"missing_skills": [{"skill": "AWS"]')
+
+
+class StreamedAnalysisTestCase(unittest.TestCase):
+    def _client_for(self, text: str) -> MagicMock:
+        client = MagicMock()
+        client.chat.return_value = stream_chunks(text)
+        return client
+
+    def test_validated_items_are_published(self):
+        analysis = {
+            'missing_skills': [{'skill': 'AWS', 'suggestion': 'Get certified'}],
+            'improvement_suggestions': [],
+            'emphasis_suggestions': [],
+            'general_suggestions': ['Quantify results']
+        }
+        published = []
+        with patch.object(ai_analysis, 'get_ollama_client', return_value=self._client_for(json.dumps(analysis))):
+            result = ai_analysis._send_ollama_request('prompt', on_item=lambda f, i: published.append((f, i)))
+
+        self.assertEqual(result, analysis)
+        self.assertEqual(published, [
+            ('missing_skills', {'skill': 'AWS', 'suggestion': 'Get certified'}),
+            ('general_suggestions', 'Quantify results')
+        ])
+
+    def test_invalid_entry_aborts_generation(self):
+        text = '{"missing_skills": [{"skill": "AWS"}, ' + '{"skill": "padding", "suggestion": "x"}, ' * 50
+        consumed = []
+
+        def tracked_chunks():
+            for chunk in stream_chunks(text):
+                consumed.append(chunk)
+                yield chunk
+
+        client = MagicMock()
+        client.chat.return_value = tracked_chunks()
+        with patch.object(ai_analysis, 'get_ollama_client', return_value=client):
+            result = ai_analysis._send_ollama_request('prompt', on_item=lambda f, i: None)
+
+        self.assertEqual(result, ai_analysis.INVALID_RESPONSE_RESULT)
+        # The stream was closed right after the invalid entry
+        self.assertLess(len(consumed), 10)
+        self.assertGreater(len(list(stream_chunks(text))), 100)
+
+    def test_stream_closes_once_object_is_balanced(self):
+        analysis = {
+            'missing_skills': [],
+            'improvement_suggestions': [],
+            'emphasis_suggestions': [],
+            'general_suggestions': ['Quantify results']
+        }
+        text = json.dumps(analysis) + '\n\nExplanation: ' + 'rambling ' * 200
+        consumed = []
+
+        def tracked_chunks():
+            for chunk in stream_chunks(text):
+                consumed.append(chunk)
+                yield chunk
+
+        client = MagicMock()
+        client.chat.return_value = tracked_chunks()
+        with patch.object(ai_analysis, 'get_ollama_client', return_value=client):
+            result = ai_analysis._send_ollama_request('prompt', num_predict=256)
+
+        self.assertEqual(result, analysis)
+        # Nothing after the closing brace was read
+        self.assertLessEqual(len(consumed), len(json.dumps(analysis)) // 7 + 1)
+        self.assertEqual(client.chat.call_args.kwargs['options'], {'num_predict': 256})
+
+    def test_lists_are_trimmed_to_item_limits(self):
+        limit = ai_analysis.ANALYSIS_ITEM_LIMITS['general_suggestions']
+        analysis = {
+            'missing_skills': [],
+            'improvement_suggestions': [],
+            'emphasis_suggestions': [],
+            'general_suggestions': [f'Suggestion {i}' for i in range(limit + 3)]
+        }
+        published = []
+        with patch.object(ai_analysis, 'get_ollama_client', return_value=self._client_for(json.dumps(analysis))):
+            result = ai_analysis._send_ollama_request('prompt', on_item=lambda f, i: published.append(i))
+
+        self.assertEqual(len(result['general_suggestions']), limit)
+        self.assertEqual(len(published), limit)
+
+    def test_truncated_generation_is_partial_and_not_cached(self):
+        text = '{"missing_skills": [{"skill": "AWS", "suggestion": "Get certified"}], "general_suggestions": ["Quan'
+
+        def truncated_chunks():
+            yield from stream_chunks(text)
+            yield {'message': {'content': ''}, 'done': True, 'done_reason': 'length'}
+
+        client = MagicMock()
+        client.chat.return_value = truncated_chunks()
+        with patch.object(ai_analysis, 'get_ollama_client', return_value=client), \
+                patch.object(ai_analysis.analysis_cache, 'get', return_value=None), \
+                patch.object(ai_analysis.analysis_cache, 'set') as cache_set:
+            result = ai_analysis.analyze_resume_for_job('resume text', 'job description')
+
+        self.assertTrue(result['partial'])
+        self.assertEqual(result['missing_skills'], [{'skill': 'AWS', 'suggestion': 'Get certified'}])
+        cache_set.assert_not_called()
+
+    def test_only_the_last_attempt_repairs(self):
+        analysis = {
+            'missing_skills': [{'skill': 'AWS', 'suggestion': 'Get certified'}],
+            'improvement_suggestions': [],
+            'emphasis_suggestions': [],
+            'general_suggestions': ['Quantify results']
+        }
+        invalid = '{"missing_skills": [{"skill": "AWS"}, ' + '{"skill": "padding", "suggestion": "x"}, ' * 50
+        client = MagicMock()
+        client.chat.side_effect = [stream_chunks(invalid), stream_chunks(json.dumps(analysis))]
+        with patch.object(ai_analysis, 'get_ollama_client', return_value=client), \
+                patch.object(ai_analysis, '_send_ollama_request', wraps=ai_analysis._send_ollama_request) as send, \
+                patch.object(ai_analysis.Config, 'ANALYSIS_ATTEMPTS', 2), \
+                patch.object(ai_analysis.analysis_cache, 'get', return_value=None), \
+                patch.object(ai_analysis.analysis_cache, 'set'):
+            result = ai_analysis.analyze_resume_for_job('resume text', 'job description')
+
+        self.assertEqual(result, analysis)
+        self.assertEqual([call.kwargs['repair'] for call in send.call_args_list], [False, True])
+
+    def test_retried_stream_publishes_entries_once(self):
+        analysis = {
+            'missing_skills': [{'skill': 'AWS', 'suggestion': 'Get certified'}, {'skill': 'Go', 'suggestion': 'Learn it'}],
+            'improvement_suggestions': [],
+            'emphasis_suggestions': [],
+            'general_suggestions': ['Quantify results']
+        }
+        text = json.dumps(analysis)
+
+        def dropped_chunks():
+            yield from stream_chunks(text[:text.index('"Go"')])
+            raise ConnectionError('connection reset')
+
+        published = []
+        client = MagicMock()
+        client.chat.side_effect = [dropped_chunks(), stream_chunks(text)]
+        with patch.object(ai_analysis, 'get_ollama_client', return_value=client), \
+                patch.object(ai_analysis.time, 'sleep'), \
+                patch.object(ai_analysis.analysis_cache, 'get', return_value=None), \
+                patch.object(ai_analysis.analysis_cache, 'set'):
+            result = ai_analysis.analyze_resume_for_job(
+                'resume text', 'job description', on_item=lambda field, item: published.append(item)
+            )
+
+        self.assertEqual(result, analysis)
+        self.assertEqual(client.chat.call_count, 2)
+        self.assertEqual(published, [
+            {'skill': 'AWS', 'suggestion': 'Get certified'},
+            {'skill': 'Go', 'suggestion': 'Learn it'},
+            'Quantify results'
+        ])
+
+    def test_generation_budget_grows_with_prompt_and_is_capped(self):
+        short_budget = ai_analysis._generation_budget('x' * 1000)
+        long_budget = ai_analysis._generation_budget('x' * 10000)
+        self.assertLess(short_budget, long_budget)
+        self.assertEqual(ai_analysis._generation_budget('x' * 10 ** 6), ai_analysis.Config.OLLAMA_NUM_PREDICT_MAX)
+
+
+class StructuredOutputTestCase(unittest.TestCase):
+    def setUp(self):
+        self.analysis = {
+            'missing_skills': [{'skill': 'AWS', 'suggestion': 'Get certified'}],
+            'improvement_suggestions': [],
+            'emphasis_suggestions': [],
+            'general_suggestions': ['Quantify results']
+        }
+
+    def test_schema_matches_validator(self):
+        schema = ai_analysis.ANALYSIS_SCHEMA
+        self.assertEqual(set(schema['required']), set(ai_analysis.ANALYSIS_FIELDS))
+        missing_skills = schema['properties']['missing_skills']
+        self.assertEqual(missing_skills['items']['required'], ['skill', 'suggestion'])
+        self.assertEqual(missing_skills['maxItems'], ai_analysis.ANALYSIS_ITEM_LIMITS['missing_skills'])
+        self.assertEqual(schema['properties']['general_suggestions']['items'], {'type': 'string'})
+
+    def test_format_is_passed_to_ollama(self):
+        client = MagicMock()
+        client.chat.return_value = stream_chunks(json.dumps(self.analysis))
+        with patch.object(ai_analysis, 'get_ollama_client', return_value=client):
+            ai_analysis._send_ollama_request('prompt', response_format=ai_analysis.ANALYSIS_SCHEMA)
+        self.assertIs(client.chat.call_args.kwargs['format'], ai_analysis.ANALYSIS_SCHEMA)
+
+    def test_only_broken_field_is_repaired(self):
+        broken = dict(self.analysis, improvement_suggestions=[{'current': 'Led team'}])
+        client = MagicMock()
+        client.chat.side_effect = [
+            stream_chunks(json.dumps(broken)),
+            {'message': {'content': json.dumps({'improvement_suggestions': [
+                {'current': 'Led team', 'suggested': 'Led a team of 5', 'reason': 'Quantified'}
+            ]})}}
+        ]
+        with patch.object(ai_analysis, 'get_ollama_client', return_value=client):
+            result = ai_analysis._send_ollama_request('prompt', repair=True)
+
+        self.assertEqual(client.chat.call_count, 2)
+        repair_call = client.chat.call_args.kwargs
+        self.assertEqual(repair_call['format']['required'], ['improvement_suggestions'])
+        self.assertIn('Led team', repair_call['messages'][0]['content'])
+        self.assertNotIn('Quantify results', repair_call['messages'][0]['content'])
+        self.assertEqual(result['missing_skills'], self.analysis['missing_skills'])
+        self.assertEqual(result['improvement_suggestions'][0]['suggested'], 'Led a team of 5')
+
+    def test_failed_repair_returns_invalid_payload(self):
+        broken = dict(self.analysis)
+        del broken['general_suggestions']
+        client = MagicMock()
+        client.chat.side_effect = [stream_chunks(json.dumps(broken)), ValueError('bad output')]
+        with patch.object(ai_analysis, 'get_ollama_client', return_value=client):
+            result = ai_analysis._send_ollama_request('prompt', repair=True)
+        self.assertEqual(result, ai_analysis.INVALID_RESPONSE_RESULT)
+
+    def test_only_connection_errors_are_retried(self):
+        client = MagicMock()
+        client.chat.side_effect = ValueError('unexpected')
+        with patch.object(ai_analysis, 'get_ollama_client', return_value=client):
+            with self.assertRaises(ValueError):
+                ai_analysis._send_ollama_request('prompt')
+        self.assertEqual(client.chat.call_count, 1)
+
+        client.chat.side_effect = [ConnectionError('refused'), stream_chunks(json.dumps(self.analysis))]
+        with patch.object(ai_analysis, 'get_ollama_client', return_value=client), \
+                patch.object(ai_analysis.time, 'sleep'):
+            self.assertEqual(ai_analysis._send_ollama_request('prompt'), self.analysis)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+from app.services import ai_analysis
+from app.services.resume_parser import extract_pdf_formatting
+
+
+class StructureAnalysisTestCase(unittest.TestCase):
+    def setUp(self):
+        self.structure = {
+            'sections': [{
+                'name': 'Experience',
+                'content': ['Software Engineer, Acme', '• Built APIs'],
+                'formatting': {'is_header': True, 'suggested_font_size': 14}
+            }]
+        }
+        self.client = MagicMock()
+        self.client.chat.return_value = {'message': {'content': json.dumps(self.structure)}}
+        patcher = patch.object(ai_analysis, 'get_ollama_client', return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_single_schema_constrained_request(self):
+        with patch.object(ai_analysis.structure_cache, 'get', return_value=None), \
+                patch.object(ai_analysis.structure_cache, 'set') as cache_set:
+            result = ai_analysis.analyze_resume_structure('Experience\nSoftware Engineer, Acme')
+
+        self.assertEqual(result['sections'], self.structure['sections'])
+        self.assertEqual(result['structure_analysis'], {'section_order': ['Experience']})
+        self.assertIs(self.client.chat.call_args.kwargs['format'], ai_analysis.STRUCTURE_SCHEMA)
+        cache_set.assert_called_once_with(ai_analysis.structure_cache_key('Experience\nSoftware Engineer, Acme'), result)
+
+    def test_cached_document_skips_generation(self):
+        with patch.object(ai_analysis.structure_cache, 'get', return_value=self.structure):
+            self.assertEqual(ai_analysis.analyze_document_structure('text'), self.structure)
+            self.assertEqual(ai_analysis.analyze_resume_sections('text'), self.structure)
+        self.client.chat.assert_not_called()
+
+    def test_invalid_response_is_not_cached(self):
+        self.client.chat.return_value = {'message': {'content': json.dumps({'sections': [{'name': 'Skills'}]})}}
+        with patch.object(ai_analysis.structure_cache, 'get', return_value=None), \
+                patch.object(ai_analysis.structure_cache, 'set') as cache_set:
+            self.assertEqual(ai_analysis.analyze_resume_structure('text'), {'sections': []})
+        cache_set.assert_not_called()
+
+    def _extract(self, words, **config):
+        page = MagicMock()
+        page.extract_words.return_value = words
+        page.extract_text.return_value = ' '.join(w['text'] for w in words)
+        pdf = MagicMock()
+        pdf.__enter__.return_value.pages = [page]
+
+        with patch('app.services.pdf_extraction.pdfplumber.open', return_value=pdf), \
+                patch.multiple('app.services.resume_parser.Config', **config), \
+                patch('app.services.resume_parser.analyze_resume_structure', return_value=self.structure) as analyze:
+            return extract_pdf_formatting('resume.pdf'), analyze
+
+    def test_pdf_formatting_does_not_call_llm_by_default(self):
+        words = [{'text': 'Experience', 'size': 12, 'x0': 10, 'top': 10, 'bottom': 22}]
+        formatting, analyze = self._extract(words, SECTION_LLM_FALLBACK=False)
+
+        analyze.assert_not_called()
+        self.assertEqual(formatting['section_analysis']['source'], 'font_statistics')
+        self.assertIs(formatting['ai_analysis'], formatting['section_analysis'])
+
+    def test_low_confidence_document_falls_back_to_llm(self):
+        words = [{'text': 'Lorem ipsum dolor sit amet consectetur', 'size': 10, 'x0': 10, 'top': 10, 'bottom': 20}]
+        formatting, analyze = self._extract(words, SECTION_LLM_FALLBACK=True, SECTION_CONFIDENCE_THRESHOLD=0.6)
+
+        analyze.assert_called_once()
+        self.assertEqual(formatting['ai_analysis'], self.structure)
+        self.assertEqual(formatting['section_analysis'], self.structure)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+from unittest.mock import patch
+
+from app.services.task_events import TaskEventPublisher, iter_task_events
+from tests.test_result_cache import FakeRedis
+
+
+class TaskEventsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = patch('app.services.task_events.get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_event_ids_survive_a_task_retry(self):
+        TaskEventPublisher('task-1').progress('Starting analysis...', 0)
+        # A retry runs under the same task id with a new publisher
+        retry = TaskEventPublisher('task-1')
+        retry.progress('Starting analysis...', 0)
+        retry.result({'status': 'completed'})
+
+        events = list(iter_task_events('task-1'))
+        self.assertEqual([event['id'] for event in events], [1, 2, 3])
+        self.assertEqual(events[-1]['event'], 'result')
+
+    def test_reconnect_resumes_after_last_event_id(self):
+        events = TaskEventPublisher('task-1')
+        events.progress('Starting analysis...', 0)
+        events.item('missing_skills', {'skill': 'AWS', 'suggestion': 'Add it'})
+        events.result({'status': 'completed'})
+
+        replayed = list(iter_task_events('task-1', last_event_id=2))
+        self.assertEqual([(event['id'], event['event']) for event in replayed], [(3, 'result')])
+
+    def test_live_events_after_replay_are_delivered_once(self):
+        publisher = TaskEventPublisher('task-1')
+        publisher.progress('Starting analysis...', 0)
+        stream = iter_task_events('task-1', last_event_id=0, heartbeat=0)
+        self.assertEqual(next(stream)['id'], 1)
+
+        publisher.result({'status': 'completed'})
+        remaining = [event for event in stream if event is not None]
+        self.assertEqual([event['id'] for event in remaining], [2])
+
+    def test_stream_closes_after_its_window(self):
+        TaskEventPublisher('task-1').progress('Starting analysis...', 0)
+        stream = iter_task_events('task-1', heartbeat=15.0, max_duration=0.05)
+        self.assertEqual(next(stream)['id'], 1)
+        with patch('app.services.task_events.time.monotonic', return_value=float('inf')):
+            self.assertEqual(list(stream), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
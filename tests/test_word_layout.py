@@ -0,0 +1,74 @@
+import json
+import random
+import unittest
+from unittest.mock import patch
+
+from app.services import word_layout
+from app.services.pdf_extraction import PageLayout
+from app.services.word_layout import WordLayout, load_word_layout
+
+
+def legacy_line_spacing(sections):
+    """The per-dict spacing computation WordLayout.line_spacing replaces."""
+    spacing = {}
+    sorted_sections = sorted(sections, key=lambda x: x['top'])
+    for curr, next_sect in zip(sorted_sections, sorted_sections[1:]):
+        space = next_sect['top'] - curr['bottom']
+        if space > 0:
+            spacing[curr['text']] = min(space / 2, 10)
+    return spacing
+
+
+class WordLayoutTestCase(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(7)
+        self.words = []
+        for i in range(400):
+            top = rng.uniform(0, 700)
+            size = rng.choice([10, 10, 10, 12, 16])
+            self.words.append({'text': f'word{i % 150}', 'size': size, 'top': top, 'bottom': top + size,
+                               'x0': 0, 'x1': 10})
+        self.page = PageLayout(0, 612, 792, '', self.words)
+
+    def test_sizes_are_normalized_to_page_body_size(self):
+        layout = WordLayout.from_pages([self.page])
+        self.assertEqual(len(layout), len(self.words))
+        self.assertEqual(layout.size_counts().most_common(1)[0][0], 10)
+        self.assertEqual(max(layout.font_size), 16.0)
+        self.assertEqual(layout.word(3), 'word3')
+
+    def test_line_spacing_matches_per_word_computation(self):
+        layout = WordLayout.from_pages([self.page])
+        expected = legacy_line_spacing(list(layout))
+        with patch.object(word_layout, 'np', None):
+            self.assertEqual(layout.line_spacing(), expected)
+        if word_layout.np is not None:
+            self.assertEqual(layout.line_spacing(), expected)
+
+    def test_round_trip_is_compact(self):
+        layout = WordLayout.from_pages([self.page])
+        layout.mark_headers('word12', True, 14)
+        data = json.loads(json.dumps(layout.to_dict()))
+        restored = load_word_layout(data)
+
+        self.assertEqual(restored.words(), layout.words())
+        self.assertEqual(list(restored.is_header), list(layout.is_header))
+        self.assertEqual(list(restored.font_size), list(layout.font_size))
+        headers = [entry for entry in restored if entry.get('is_header')]
+        self.assertTrue(all(entry['text'].startswith('word12') for entry in headers))
+        self.assertTrue(all(entry['font_size'] >= 14 for entry in headers))
+        self.assertLess(len(json.dumps(data)), len(json.dumps(list(layout))) * 0.6)
+
+    def test_legacy_per_word_sections_are_still_readable(self):
+        legacy = [{'text': 'Skills', 'font_size': 12, 'top': 10, 'bottom': 22, 'is_header': True},
+                  {'text': 'Python', 'font_size': 10, 'top': 30, 'bottom': 40}]
+        layout = load_word_layout(legacy)
+        self.assertEqual(list(layout), [
+            {'text': 'Skills', 'font_size': 12, 'top': 10, 'bottom': 22, 'is_header': True},
+            {'text': 'Python', 'font_size': 10, 'top': 30, 'bottom': 40}
+        ])
+        self.assertEqual(layout.line_spacing(), {'Skills': 4.0})
+
+
+if __name__ == '__main__':
+    unittest.main()